@@ -2,10 +2,18 @@
 Auto Multi-Agent Orchestrator
 
 This module provides an advanced multi-agent system optimized for Google ADK web interface.
-"""
 
-# Import the root agent directly for ADK web compatibility
-from .agent import root_agent
+`root_agent` is built on first access, so importing the package stays cheap
+(no model clients, MCP servers or network connections until it is needed).
+"""
 
 # Export for ADK
-__all__ = ['root_agent']
\ No newline at end of file
+__all__ = ['root_agent']
+
+
+def __getattr__(name):
+    # ADK web lee `root_agent` como atributo del paquete: construirlo en ese momento
+    if name == "root_agent":
+        from .agent import get_root_agent
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
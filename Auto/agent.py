@@ -1,122 +1,16 @@
-import os
 import asyncio
-from contextlib import AsyncExitStack
+import threading
 from typing import Dict, Any, Optional, List
 
-from google.adk.agents import Agent
-from google.adk.tools.agent_tool import AgentTool
-from google.adk.models.lite_llm import LiteLlm
+from .models import get_model
 
-# Importar agentes sincrónicos directamente
-from .sub_agents.conversational_agent.agent import conversational_agent
+# Importar Auto no crea modelos, clientes ni servidores MCP: el agente raíz se construye en
+# el primer acceso a `root_agent` (o con build_root_agent()), y los imports pesados
+# (ADK, litellm, firecrawl, sub-agentes) se hacen ahí.
 
-# Importar factory functions para agentes que requieren async
-from .sub_agents.file_system_agent.agent import create_agent as create_file_system_agent
-from .sub_agents.speaker_agent.agent import create_speaker_agent
+ROOT_MODEL = "gemini/gemini-1.5-flash"
 
-# Importar web searcher (convertido a sincrono)
-from .sub_agents.web_searcher_agent.agent import web_searcher_agent
-
-model = LiteLlm(
-    model="gemini/gemini-1.5-flash",
-    api_key=os.getenv("GOOGLE_API_KEY"),
-)
-
-# Función para inicializar agentes async de forma sincrona
-def initialize_async_agents():
-    """Inicializa agentes async de forma sincrona para compatibilidad con ADK web."""
-    
-    async def _init_async_agents():
-        agents = {}
-        exit_stacks = []
-        
-        try:
-            # File System Agent
-            print("🔧 Initializing File System Agent...")
-            try:
-                fs_agent, fs_stack = await create_file_system_agent()
-                agents['file_system'] = fs_agent
-                if fs_stack and hasattr(fs_stack, '__aenter__'):
-                    exit_stacks.append(fs_stack)
-                print("✅ File System Agent initialized")
-            except Exception as e:
-                print(f"⚠️ File System Agent failed: {e}")
-                # Crear agente dummy para evitar fallos
-                agents['file_system'] = Agent(
-                    name="file_system_dummy",
-                    model=model,
-                    description="File System agent (disabled - MCP server unavailable)",
-                    instruction="Sorry, File System functionality is currently unavailable due to MCP server issues."
-                )
-            
-            # Speaker Agent
-            print("🔧 Initializing Speaker Agent...")
-            try:
-                speaker_agent, speaker_stack = await create_speaker_agent()
-                agents['speaker'] = speaker_agent
-                if speaker_stack and hasattr(speaker_stack, '__aenter__'):
-                    exit_stacks.append(speaker_stack)
-                print("✅ Speaker Agent initialized")
-            except Exception as e:
-                print(f"⚠️ Speaker Agent failed: {e}")
-                # Crear agente dummy
-                agents['speaker'] = Agent(
-                    name="speaker_dummy",
-                    model=model,
-                    description="Text-to-speech agent (disabled - MCP server unavailable)",
-                    instruction="Sorry, text-to-speech functionality is currently unavailable due to MCP server issues."
-                )
-            
-            return agents, exit_stacks
-            
-        except Exception as e:
-            print(f"❌ Error initializing async agents: {e}")
-            return {}, []
-    
-    # Ejecutar de forma sincrona
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # Si ya hay un loop corriendo, usar asyncio.run en un thread
-            import threading
-            import concurrent.futures
-            
-            def run_in_thread():
-                return asyncio.run(_init_async_agents())
-            
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(run_in_thread)
-                return future.result()
-        else:
-            return loop.run_until_complete(_init_async_agents())
-    except RuntimeError:
-        # No hay loop, crear uno nuevo
-        return asyncio.run(_init_async_agents())
-
-# Inicializar agentes
-print("🚀 Initializing Auto Multi-Agent System...")
-async_agents, exit_stacks = initialize_async_agents()
-
-# Crear lista de todos los sub-agentes (sin coordinador ni resumidor)
-all_sub_agents = [
-    conversational_agent,
-    web_searcher_agent,
-    async_agents.get('file_system'),
-    async_agents.get('speaker')
-]
-
-# Filtrar agentes None
-all_sub_agents = [agent for agent in all_sub_agents if agent is not None]
-
-# Crear herramientas de agente para delegación
-agent_tools = [AgentTool(agent) for agent in all_sub_agents]
-
-# Crear el agente raíz
-root_agent = Agent(
-    name="Auto",
-    model=model,
-    description="Advanced Multi-Agent Orchestrator - Coordinates specialized agents for various tasks",
-    instruction="""
+ROOT_INSTRUCTION = """
     You are Auto, an intelligent multi-agent orchestrator that coordinates specialized sub-agents to handle user requests efficiently.
     
     AVAILABLE AGENTS:
@@ -140,6 +34,7 @@ root_agent = Agent(
        - "Read file...", "Create a file...", "Delete file...", "Move file..."
        - "List directory contents", "Show me files in...", "Copy file..."
        - "Write to file...", "Edit file...", "Create directory..."
+       - "Which files mention...", "Search my files for..." (searches file contents)
        - Any file or directory manipulation tasks
        
     4. **Text-to-Speech** → speaker_agent
@@ -176,23 +71,268 @@ root_agent = Agent(
     - Suggest alternative approaches when primary methods fail
     
     Remember: You are a coordinator, not a direct service provider. Your strength lies in intelligent task delegation to specialized agents.
-    """,
-    tools=agent_tools,
-    sub_agents=all_sub_agents,
-)
+    """
+
+# Exit stacks de los servidores MCP abiertos por build_root_agent()
+exit_stacks: List[Any] = []
+# Router local (AUTO_FAST_ROUTER) del agente construido, para consultar sus métricas
+intent_router = None
+# Medidor de TTFT por ruta (AUTO_TTFT_METRICS) del agente construido
+first_token_tracker = None
+# Tamaño de los prompts por agente y variante compacta (AUTO_PROMPTS / AUTO_PROMPT_MODE)
+prompt_assembler = None
+
+_root_agent = None
+_build_lock = threading.Lock()
+
+# Agentes dummy para cuando un servidor MCP no está disponible
+def _fallback_file_system_agent():
+    from google.adk.agents import Agent
+
+    return Agent(
+        name="file_system_dummy",
+        model=get_model(ROOT_MODEL, "GOOGLE_API_KEY"),
+        description="File System agent (disabled - MCP server unavailable)",
+        instruction="Sorry, File System functionality is currently unavailable due to MCP server issues."
+    )
+
+def _fallback_speaker_agent():
+    from google.adk.agents import Agent
+
+    return Agent(
+        name="speaker_dummy",
+        model=get_model(ROOT_MODEL, "GOOGLE_API_KEY"),
+        description="Text-to-speech agent (disabled - MCP server unavailable)",
+        instruction="Sorry, text-to-speech functionality is currently unavailable due to MCP server issues."
+    )
+
+def async_agent_specs():
+    """(clave, factory, fallback) de los agentes que necesitan un servidor MCP."""
+    # Importar factory functions para agentes que requieren async
+    from .sub_agents.file_system_agent.agent import create_agent as create_file_system_agent
+    from .sub_agents.speaker_agent.agent import create_speaker_agent
+
+    return [
+        ('file_system', create_file_system_agent, _fallback_file_system_agent),
+        ('speaker', create_speaker_agent, _fallback_speaker_agent),
+    ]
+
+# Placeholders para el modo lazy: mismo nombre y descripción que el agente real
+LAZY_PLACEHOLDERS = {
+    'file_system': ("file_system_agent", "File System agent that provides complete file system access using MCP File System tools"),
+    'speaker': ("speaker_agent", "Advanced Text-to-Speech agent using Elevenlabs API"),
+}
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+# Función para inicializar agentes async de forma sincrona
+def initialize_async_agents():
+    """Inicializa agentes async de forma sincrona para compatibilidad con ADK web."""
+    from .async_agents import INIT_MODE, init_agents
+    
+    async def _init_async_agents():
+        try:
+            return await init_agents(async_agent_specs(), concurrent=(INIT_MODE != "serial"))
+        except Exception as e:
+            print(f"❌ Error initializing async agents: {e}")
+            return {}, []
+    
+    # Ejecutar de forma sincrona
+    try:
+        loop = asyncio.get_event_loop()
+        if loop.is_running():
+            # Si ya hay un loop corriendo, usar asyncio.run en un thread
+            import concurrent.futures
+            
+            def run_in_thread():
+                return asyncio.run(_init_async_agents())
+            
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                future = executor.submit(run_in_thread)
+                return future.result()
+        else:
+            return loop.run_until_complete(_init_async_agents())
+    except RuntimeError:
+        # No hay loop, crear uno nuevo
+        return asyncio.run(_init_async_agents())
 
-print(f"✅ Auto orchestrator initialized with {len(all_sub_agents)} sub-agents")
-print("🌐 Ready for ADK web interface")
+def create_lazy_agent_tools(exit_stacks: List[Any]):
+    """Crea AgentTools que levantan su servidor MCP en la primera delegación."""
+    from google.adk.agents import Agent
+    from .async_agents import LazyAgentTool
+
+    tools = []
+    for key, factory, fallback in async_agent_specs():
+        name, description = LAZY_PLACEHOLDERS[key]
+        placeholder = Agent(
+            name=name,
+            model=get_model(ROOT_MODEL, "GOOGLE_API_KEY"),
+            description=description,
+            instruction="This agent is starting up, please try again in a moment.",
+        )
+        tools.append(LazyAgentTool(placeholder, key, factory, fallback, exit_stacks))
+    return tools
+
+def build_root_agent():
+    """Construye el agente raíz con sus sub-agentes, servidores MCP, router y trazas."""
+    global intent_router, first_token_tracker, prompt_assembler
+
+    from google.adk.agents import Agent
+    from google.adk.tools.agent_tool import AgentTool
+
+    # Importar agentes sincrónicos directamente
+    from .sub_agents.conversational_agent.agent import conversational_agent
+    # Importar web searcher (convertido a sincrono)
+    from .sub_agents.web_searcher_agent.agent import web_searcher_agent
+
+    from .async_agents import INIT_MODE, init_latencies
+    from .router import ROUTER_ENABLED, IntentRouter
+    from .mcp_pool import cached_tool_names
+    from .fanout import FANOUT_INSTRUCTION, create_fanout_tool_from_env
+    from .memory import create_conversation_memory_from_env
+    from .prompts import create_prompt_assembler_from_env
+    from .semantic_cache import create_semantic_cache_from_env
+    from .resilience import create_resilience_from_env
+    from .streaming import (
+        STREAM_DELEGATION,
+        STREAM_INSTRUCTION,
+        create_first_token_tracker_from_env,
+        enable_streaming_delegation,
+    )
+    from .tracing import tracer
+    from .lifecycle import lifecycle
+
+    # Inicializar agentes
+    print(f"🚀 Initializing Auto Multi-Agent System (MCP init mode: {INIT_MODE})...")
+    serving_loop = _running_loop()
+    if INIT_MODE == "lazy" or serving_loop is not None:
+        async_agents = {}
+        lazy_agent_tools = create_lazy_agent_tools(exit_stacks)
+        if INIT_MODE != "lazy":
+            # Construido desde el event loop que sirve (ADK web): no se puede bloquear para
+            # esperar a los servidores MCP, y levantarlos en un loop de otro hilo los deja
+            # huérfanos. Se arrancan ya, sin bloquear, en este loop, que es el que los cierra.
+            lifecycle.start(serving_loop)
+            for tool in lazy_agent_tools:
+                lifecycle.spawn(tool.ensure_agent())
+        # Sin arrancar nada: las herramientas que el pool de MCP ya descubrió (con el pool activo
+        # los agentes MCP se crean con ellas y solo se conectan en la primera llamada)
+        for server in ('file-system', 'elevenlabs'):
+            tool_names = cached_tool_names(server)
+            if tool_names:
+                print(f"📦 Cached {server} MCP tools: {', '.join(tool_names)}")
+    else:
+        async_agents, stacks = initialize_async_agents()
+        exit_stacks.extend(stacks)
+        lazy_agent_tools = []
+        if init_latencies:
+            summary = ", ".join(f"{key}={latency:.2f}s" for key, latency in init_latencies.items())
+            print(f"⏱️ MCP agents init latency: {summary}")
+
+    # Crear lista de todos los sub-agentes (sin coordinador ni resumidor)
+    all_sub_agents = [
+        conversational_agent,
+        web_searcher_agent,
+        async_agents.get('file_system'),
+        async_agents.get('speaker')
+    ]
+
+    # Filtrar agentes None
+    all_sub_agents = [agent for agent in all_sub_agents if agent is not None]
+
+    # Crear herramientas de agente para delegación
+    # (en modo lazy los agentes MCP solo existen como herramientas hasta su primera delegación)
+    agent_tools = [AgentTool(agent) for agent in all_sub_agents] + lazy_agent_tools
+
+    # Delegación en streaming (AUTO_STREAM_DELEGATION): transfer_to_agent para las peticiones de un solo
+    # especialista, que responde directamente al usuario sin la regeneración del raíz
+    transfer_targets = enable_streaming_delegation(all_sub_agents) if STREAM_DELEGATION else []
+
+    # Router local opcional: delega directamente las peticiones inequívocas sin pasar por el LLM raíz
+    intent_router = (
+        IntentRouter((tool.name for tool in agent_tools), transfer_targets=transfer_targets)
+        if ROUTER_ENABLED else None
+    )
+
+    # Peticiones compuestas: plan de sub-tareas con las ramas independientes en paralelo
+    fanout_tool = create_fanout_tool_from_env(agent_tools)
+
+    instruction = ROOT_INSTRUCTION + FANOUT_INSTRUCTION if fanout_tool else ROOT_INSTRUCTION
+    if transfer_targets:
+        instruction += STREAM_INSTRUCTION
+
+    # Crear el agente raíz
+    root_agent = Agent(
+        name="Auto",
+        model=get_model(ROOT_MODEL, "GOOGLE_API_KEY"),
+        description="Advanced Multi-Agent Orchestrator - Coordinates specialized agents for various tasks",
+        instruction=instruction,
+        tools=agent_tools + [fanout_tool] if fanout_tool else agent_tools,
+        sub_agents=all_sub_agents,
+        before_model_callback=intent_router.before_model_callback if intent_router else None,
+        after_model_callback=intent_router.after_model_callback if intent_router else None,
+    )
+
+    # Memoria acotada (AUTO_MEMORY): últimos turnos literales + resumen en segundo plano
+    memory = create_conversation_memory_from_env()
+    if memory is not None:
+        memory.attach(root_agent)
+
+    # Cache semántico opt-in (AUTO_SEMANTIC_CACHE) delante de los modelos de los sub-agentes
+    semantic_cache = create_semantic_cache_from_env()
+    if semantic_cache is not None:
+        semantic_cache.attach(root_agent)
+
+    # Timeouts por agente, failover/hedging entre proveedores y circuit breakers (AUTO_RESILIENCE)
+    resilience = create_resilience_from_env()
+    if resilience is not None:
+        resilience.attach(root_agent)
+
+    # Tiempo hasta el primer token por ruta (AUTO_TTFT_METRICS)
+    first_token_tracker = create_first_token_tracker_from_env()
+    if first_token_tracker is not None:
+        first_token_tracker.attach(root_agent)
+
+    # Tokens de instrucción/herramientas por agente e instrucciones compactas (AUTO_PROMPT_MODE);
+    # después de memoria y caches para medir lo que de verdad se envía
+    prompt_assembler = create_prompt_assembler_from_env()
+    if prompt_assembler is not None:
+        prompt_assembler.attach(root_agent)
+
+    # Trazas por turno (AUTO_TRACE): spans de LLM, delegaciones y herramientas
+    if tracer is not None:
+        tracer.instrument(root_agent)
+
+    print(f"✅ Auto orchestrator initialized with {len(agent_tools)} sub-agents")
+    print("🌐 Ready for ADK web interface")
+    return root_agent
+
+def get_root_agent():
+    """Devuelve el agente raíz del proceso, construyéndolo en la primera llamada."""
+    global _root_agent
+    if _root_agent is None:
+        with _build_lock:
+            if _root_agent is None:
+                _root_agent = build_root_agent()
+    return _root_agent
+
+def __getattr__(name):
+    # `root_agent` se construye en el primer acceso (ADK web lo lee como atributo)
+    if name == "root_agent":
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Función de limpieza para cuando se cierre la aplicación
 def cleanup_resources():
-    """Limpia recursos async si es necesario."""
+    """Drena las conexiones MCP y los clientes compartidos (también lo hace el atexit de Auto.lifecycle)."""
+    from .lifecycle import lifecycle
+
     try:
-        for stack in exit_stacks:
-            if hasattr(stack, '__aexit__'):
-                asyncio.run(stack.__aexit__(None, None, None))
+        lifecycle.shutdown_sync()
     except Exception as e:
         print(f"⚠️ Error during cleanup: {e}")
-
-import atexit
-atexit.register(cleanup_resources)
\ No newline at end of file
+    exit_stacks.clear()
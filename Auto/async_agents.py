@@ -0,0 +1,162 @@
+"""
+Inicialización de los agentes que dependen de servidores MCP (file system y speaker).
+
+El modo se elige con la variable de entorno AUTO_MCP_INIT_MODE:
+- "concurrent" (por defecto): los servidores MCP se levantan en paralelo, con timeout por servidor
+- "serial": un servidor detrás de otro (comportamiento original)
+- "lazy": cada servidor se levanta la primera vez que el agente raíz delega en su agente
+"""
+import os
+import time
+import asyncio
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable, Tuple
+
+from google.adk.agents import Agent
+from google.adk.tools.agent_tool import AgentTool
+
+from .lifecycle import lifecycle, child_pids
+
+INIT_MODES = ("concurrent", "serial", "lazy")
+
+INIT_MODE = os.getenv("AUTO_MCP_INIT_MODE", "concurrent").lower()
+if INIT_MODE not in INIT_MODES:
+    print(f"⚠️ Unknown AUTO_MCP_INIT_MODE '{INIT_MODE}', using 'concurrent'")
+    INIT_MODE = "concurrent"
+
+# Timeout (segundos) para levantar cada servidor MCP
+INIT_TIMEOUT = float(os.getenv("AUTO_MCP_INIT_TIMEOUT", "30"))
+
+# Latencia de inicialización medida por agente (segundos), p.ej. {'file_system': 1.8, 'speaker': 0.9}
+init_latencies: Dict[str, float] = {}
+
+# Se llaman con cada agente que LazyAgentTool crea (p.ej. para instrumentarlo)
+agent_ready_hooks: List[Callable[[Agent], None]] = []
+
+AgentFactory = Callable[[], Awaitable[Tuple[Agent, Any]]]
+FallbackFactory = Callable[[], Agent]
+
+
+async def init_agent_timed(
+    key: str,
+    factory: AgentFactory,
+    fallback: FallbackFactory,
+    timeout: float = INIT_TIMEOUT,
+) -> Tuple[Agent, Optional[Any]]:
+    """Crea un agente async con timeout, registrando su latencia en init_latencies."""
+    print(f"🔧 Initializing {key} agent...")
+    start = time.perf_counter()
+    before = child_pids()
+    try:
+        agent, exit_stack = await asyncio.wait_for(factory(), timeout=timeout)
+        if not (exit_stack and hasattr(exit_stack, '__aenter__')):
+            exit_stack = None
+        print(f"✅ {key} agent initialized")
+        if exit_stack is not None:
+            _register_connection(key, agent, exit_stack, factory, child_pids() - before)
+    except asyncio.TimeoutError:
+        print(f"⚠️ {key} agent timed out after {timeout:.0f}s")
+        agent, exit_stack = fallback(), None
+    except Exception as e:
+        print(f"⚠️ {key} agent failed: {e}")
+        agent, exit_stack = fallback(), None
+    finally:
+        init_latencies[key] = time.perf_counter() - start
+
+    print(f"⏱️ {key} agent init took {init_latencies[key]:.2f}s")
+    return agent, exit_stack
+
+
+def _register_connection(
+    key: str,
+    agent: Agent,
+    exit_stack: Any,
+    factory: AgentFactory,
+    spawned: Set[int],
+) -> None:
+    """Registra la conexión MCP del agente en el gestor de ciclo de vida, con su reinicio.
+
+    `spawned` son los subprocesos nacidos mientras se creaba el agente: en la inicialización
+    concurrente incluye también los de los otros agentes, así que si uno muere se reinician
+    todos los que lo lanzaron a la vez (más reinicios de la cuenta, pero ninguno sin vigilar).
+    """
+    resource = lifecycle.register_exit_stack(f"mcp:{key}", exit_stack, pids=spawned)
+
+    async def restart():
+        # Cerrar la conexión caída y pasar al mismo objeto Agent las herramientas de una nueva
+        await lifecycle.close(resource)
+        before = child_pids()
+        new_agent, new_stack = await asyncio.wait_for(factory(), timeout=INIT_TIMEOUT)
+        if not (new_stack and hasattr(new_stack, '__aenter__')):
+            raise RuntimeError(f"{key} MCP server did not come back")
+        agent.tools = new_agent.tools
+        _register_connection(key, agent, new_stack, factory, child_pids() - before)
+
+    resource.restart = restart
+
+
+async def init_agents(
+    specs: List[Tuple[str, AgentFactory, FallbackFactory]],
+    concurrent: bool = True,
+) -> Tuple[Dict[str, Agent], List[Any]]:
+    """Inicializa varios agentes async, en paralelo o en serie según `concurrent`."""
+    if concurrent:
+        results = await asyncio.gather(*(init_agent_timed(*spec) for spec in specs))
+    else:
+        results = [await init_agent_timed(*spec) for spec in specs]
+
+    agents = {}
+    exit_stacks = []
+    for (key, _, _), (agent, exit_stack) in zip(specs, results):
+        agents[key] = agent
+        if exit_stack is not None:
+            exit_stacks.append(exit_stack)
+    return agents, exit_stacks
+
+
+class LazyAgentTool(AgentTool):
+    """AgentTool que crea el agente real (y su servidor MCP) en la primera delegación.
+
+    Hasta entonces expone un agente placeholder con el mismo nombre y descripción,
+    de forma que la declaración de la herramienta que ve el LLM no cambia.
+    """
+
+    def __init__(
+        self,
+        placeholder: Agent,
+        key: str,
+        factory: AgentFactory,
+        fallback: FallbackFactory,
+        exit_stacks: List[Any],
+    ):
+        super().__init__(placeholder)
+        self._key = key
+        self._factory = factory
+        self._fallback = fallback
+        self._exit_stacks = exit_stacks
+        self._lock: Optional[asyncio.Lock] = None
+        self._ready = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    async def ensure_agent(self) -> Agent:
+        """Levanta el agente real una única vez, aunque lleguen varias delegaciones a la vez."""
+        if self._ready:
+            return self.agent
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._ready:
+                agent, exit_stack = await init_agent_timed(self._key, self._factory, self._fallback)
+                if exit_stack is not None:
+                    self._exit_stacks.append(exit_stack)
+                for hook in agent_ready_hooks:
+                    hook(agent)
+                self.agent = agent
+                self._ready = True
+        return self.agent
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context) -> Any:
+        await self.ensure_agent()
+        return await super().run_async(args=args, tool_context=tool_context)
@@ -0,0 +1,254 @@
+"""
+Ejecución por lotes de root_agent sobre un archivo JSONL de prompts (evaluación, precalentar caches).
+
+    python -m Auto.batch prompts.jsonl results.jsonl [--concurrency 16] [--timeout 300] [--restart]
+
+Entrada: una línea JSON por prompt, {"id": "...", "prompt": "..."} (también valen "text" o
+"message", o directamente un string JSON). Sin "id" se usa el número de línea.
+
+Salida: una línea JSON por prompt en cuanto termina (en orden de finalización) con
+id, line, prompt, response, route (herramientas/agentes a los que delegó el agente raíz),
+latency, llm_calls, input_tokens, output_tokens y error.
+
+Reanudación: <salida>.checkpoint guarda la línea hasta la que todo está hecho, las líneas ya
+terminadas por encima de ella y el tamaño de la salida en ese momento. Al relanzar el mismo
+comando se trunca la salida a ese tamaño y se saltan las líneas hechas: cada prompt aparece
+una sola vez aunque el proceso se haya cortado a mitad de una escritura.
+
+La memoria no depende del tamaño de la entrada: se lee en streaming, no se adelantan más de
+--window líneas respecto a la primera pendiente y cada sesión se borra al terminar su prompt.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+CONCURRENCY = int(os.getenv("AUTO_BATCH_CONCURRENCY", "16"))
+TIMEOUT = float(os.getenv("AUTO_BATCH_TIMEOUT", "300"))
+WINDOW = int(os.getenv("AUTO_BATCH_WINDOW", "1000"))
+PROMPT_FIELDS = ("prompt", "text", "message")
+APP_NAME = "Auto"
+USER_ID = "batch"
+
+
+class Checkpoint:
+    """Progreso de un lote: marca de agua + líneas terminadas fuera de orden + bytes de salida válidos."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # Todas las líneas < next_line están hechas
+        self.next_line = 0
+        self.done: set = set()
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.next_line = state["next_line"]
+        self.done = set(state["done"])
+        self.output_bytes = state["output_bytes"]
+        return True
+
+    def is_done(self, line: int) -> bool:
+        return line < self.next_line or line in self.done
+
+    def mark(self, line: int, output_bytes: int) -> None:
+        self.done.add(line)
+        while self.next_line in self.done:
+            self.done.remove(self.next_line)
+            self.next_line += 1
+        self.output_bytes = output_bytes
+        self.save()
+
+    def save(self) -> None:
+        state = {"next_line": self.next_line, "done": sorted(self.done), "output_bytes": self.output_bytes}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_prompts(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Lee el JSONL de entrada línea a línea: (número de línea, registro)."""
+    with open(path, encoding="utf-8") as f:
+        for line, raw in enumerate(f):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError as e:
+                yield line, {"error": f"invalid JSON: {e}"}
+                continue
+            if isinstance(record, str):
+                record = {"prompt": record}
+            elif not isinstance(record, dict):
+                record = {"error": "expected a JSON object or string"}
+            yield line, record
+
+
+def prompt_of(record: Dict[str, Any]) -> Optional[str]:
+    for field in PROMPT_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str) and value.strip():
+            return value
+    return None
+
+
+async def run_prompt(runner, root_name: str, prompt: str) -> Dict[str, Any]:
+    """Ejecuta un prompt en una sesión nueva y devuelve respuesta, ruta y tokens."""
+    from google.genai import types
+    from .models import usage_scope
+
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=USER_ID)
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+    route: List[str] = []
+    response = ""
+    try:
+        with usage_scope() as usage:
+            async for event in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=message):
+                if event.author == root_name:
+                    for call in event.get_function_calls():
+                        target = (call.args or {}).get("agent_name") if call.name == "transfer_to_agent" else call.name
+                        if target and target not in route:
+                            route.append(target)
+                # Con delegación en streaming la respuesta final la da el sub-agente transferido
+                if event.is_final_response() and event.content and event.content.parts:
+                    response = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+    finally:
+        # Sin historial acumulado entre prompts: la memoria no crece con el tamaño del lote
+        await runner.session_service.delete_session(app_name=runner.app_name, user_id=USER_ID, session_id=session.id)
+    return {"response": response, "route": route, **usage}
+
+
+class BatchRunner:
+    """Reparte las líneas de entrada entre `concurrency` sesiones y escribe cada resultado al terminar."""
+
+    def __init__(self, root_agent, concurrency: int = CONCURRENCY, timeout: float = TIMEOUT, window: int = WINDOW):
+        from google.adk.runners import InMemoryRunner
+
+        self.root_agent = root_agent
+        self.runner = InMemoryRunner(agent=root_agent, app_name=APP_NAME)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.window = max(window, self.concurrency)
+        self.stats = {"completed": 0, "errors": 0, "skipped": 0, "latency_total": 0.0, "latency_max": 0.0}
+
+    async def process(self, line: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"id": record.get("id", line), "line": line}
+        prompt = prompt_of(record)
+        if prompt is None:
+            return {**result, "error": record.get("error") or f"missing prompt field ({', '.join(PROMPT_FIELDS)})"}
+        result["prompt"] = prompt
+        start = time.perf_counter()
+        try:
+            result.update(await asyncio.wait_for(run_prompt(self.runner, self.root_agent.name, prompt), self.timeout))
+            result["error"] = None
+        except asyncio.TimeoutError:
+            result["error"] = f"timed out after {self.timeout:.0f}s"
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    async def run(self, input_path: str, output_path: str, restart: bool = False) -> Dict[str, Any]:
+        checkpoint = Checkpoint(f"{output_path}.checkpoint")
+        if restart:
+            for path in (output_path, checkpoint.path):
+                if os.path.exists(path):
+                    os.remove(path)
+        elif checkpoint.load():
+            print(f"↩️ Resuming {input_path} from line {checkpoint.next_line} ({len(checkpoint.done)} later lines done)")
+        elif os.path.exists(output_path) and os.path.getsize(output_path):
+            raise FileExistsError(f"{output_path} exists without a checkpoint; use --restart to overwrite it")
+
+        # Descartar resultados escritos después del último checkpoint (se vuelven a ejecutar)
+        with open(output_path, "ab") as f:
+            f.truncate(checkpoint.output_bytes)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        progress = asyncio.Condition()
+        started = time.perf_counter()
+
+        with open(output_path, "ab") as output:
+
+            async def worker() -> None:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    result = await self.process(*item)
+                    output.write((json.dumps(result, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                    output.flush()
+                    checkpoint.mark(result["line"], output.tell())
+                    self._record(result)
+                    async with progress:
+                        progress.notify_all()
+
+            async def produce() -> None:
+                for line, record in read_prompts(input_path):
+                    if checkpoint.is_done(line):
+                        self.stats["skipped"] += 1
+                        continue
+                    # No adelantarse más de `window` líneas a la primera pendiente (acota checkpoint.done)
+                    async with progress:
+                        await progress.wait_for(lambda: line - checkpoint.next_line < self.window)
+                    await queue.put((line, record))
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+            await asyncio.gather(produce(), *(worker() for _ in range(self.concurrency)))
+
+        seconds = time.perf_counter() - started
+        completed = self.stats["completed"]
+        return {
+            **self.stats,
+            "seconds": seconds,
+            "prompts_per_second": completed / seconds if seconds else 0.0,
+            "latency_avg": self.stats["latency_total"] / completed if completed else 0.0,
+        }
+
+    def _record(self, result: Dict[str, Any]) -> None:
+        self.stats["completed"] += 1
+        if result.get("error"):
+            self.stats["errors"] += 1
+        latency = result.get("latency", 0.0)
+        self.stats["latency_total"] += latency
+        self.stats["latency_max"] = max(self.stats["latency_max"], latency)
+        if self.stats["completed"] % 50 == 0:
+            print(f"⏱️ {self.stats['completed']} prompts done ({self.stats['errors']} errors)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run root_agent over a JSONL file of prompts")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("output", help="JSONL results file (resumable)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="concurrent sessions")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="seconds per prompt")
+    parser.add_argument("--window", type=int, default=WINDOW, help="max lines read ahead of the oldest pending one")
+    parser.add_argument("--restart", action="store_true", help="discard previous results and checkpoint")
+    args = parser.parse_args(argv)
+
+    from .agent import get_root_agent
+
+    batch = BatchRunner(get_root_agent(), args.concurrency, args.timeout, args.window)
+    try:
+        summary = asyncio.run(batch.run(args.input, args.output, restart=args.restart))
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        print(f"⏸️ Interrupted; rerun the same command to resume from {args.output}.checkpoint")
+        return 130
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Benchmarks de Auto. Cada módulo se ejecuta con `python -m Auto.benchmarks.<nombre>`
+y escribe sus resultados en JSON para comparar entre commits.
+"""
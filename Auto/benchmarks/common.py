@@ -0,0 +1,60 @@
+"""
+Utilidades compartidas por los benchmarks.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from typing import Dict, Any, List, Optional
+
+
+def percentiles(samples: List[float]) -> Dict[str, Any]:
+    """p50/p95/p99/media en milisegundos para una lista de duraciones en segundos."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, results: Dict[str, Any], output: Optional[str] = None) -> Dict[str, Any]:
+    """Añade metadatos (commit, python, fecha) y escribe el JSON en `output` o en stdout."""
+    report = {
+        "benchmark": name,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"📊 Results written to {output}")
+    else:
+        sys.stdout.write(text + "\n")
+    return report
@@ -0,0 +1,572 @@
+"""
+Benchmark end-to-end de Auto sin red.
+
+    python -m Auto.benchmarks.e2e [--turns 20] [--concurrency 1,4,16] [--cold-starts 3]
+                                  [--llm-latency 0] [--tool-latency 0] [--chunk-latency 0.005]
+                                  [--answer-words 60] [--output e2e.json]
+
+Todo corre offline: los modelos son FakeLlm con respuestas guionizadas (el agente raíz
+delega por AgentTool y cada sub-agente llama a su herramienta), los servidores MCP son
+Auto/testing/stub_mcp_server.py y Firecrawl es un FakeFirecrawlApp.
+
+Cada medición corre en un proceso nuevo (el entorno offline tiene que estar configurado
+antes de importar Auto) y reporta:
+- cold start: tiempo de `import Auto`, de construir root_agent (incluye la inicialización
+  MCP, con la latencia por agente) y del primer turno
+- latencia por turno (p50/p95/p99) por ruta: conversational, web_search, file_system, speaker
+- latencia por herramienta (delegación raíz -> AgentTool y llamadas a herramientas)
+- throughput con N sesiones concurrentes
+- streaming: tiempo hasta el primer token y hasta el final por ruta con StreamingMode.SSE,
+  delegando con AgentTool frente a AUTO_STREAM_DELEGATION=1 (transfer_to_agent)
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+
+from .common import percentiles, write_results
+from ..callbacks import add_callbacks, walk_agents
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(PACKAGE_DIR)
+STUB_SERVER = os.path.join(PACKAGE_DIR, "testing", "stub_mcp_server.py")
+
+RESULT_MARKER = "__AUTO_E2E_RESULT__"
+
+# Ruta -> (prefijo del AgentTool del agente raíz, mensaje del usuario)
+ROUTES: Dict[str, Tuple[str, str]] = {
+    "conversational": ("conversational_agent", "Hi! How are you doing today?"),
+    "web_search": ("web_searcher_agent", "Search the web for the latest Python release"),
+    "file_system": ("file_system", "Read the file notes.txt"),
+    "speaker": ("speaker", "Read this aloud: the benchmark is running"),
+}
+
+# Petición compuesta: tres sub-tareas independientes (una a una o con delegate_in_parallel)
+COMPOUND_MESSAGE = "Search the web for Python and for Rust, and read the file notes.txt"
+COMPOUND_TASKS = [
+    ("search_python", "web_searcher_agent", "Search the web for Python"),
+    ("search_rust", "web_searcher_agent", "Search the web for Rust"),
+    ("notes", "file_system", "Read the file notes.txt"),
+]
+
+# Sub-agente -> (herramienta que llama, argumentos a partir del mensaje recibido)
+SUB_AGENT_CALLS = {
+    "web_searcher_agent": ("web_search_tool", lambda text: {"query": text}),
+    "file_system_agent": ("read_file", lambda text: {"path": "notes.txt"}),
+    "speaker_agent": ("text_to_speech", lambda text: {"text": text, "voice_name": "Will"}),
+}
+
+# Se ejecuta en el proceso hijo: mide `import Auto` antes de cualquier otra cosa
+WORKER_CODE = """
+import sys, time
+start = time.perf_counter()
+import Auto
+import_seconds = time.perf_counter() - start
+from Auto.benchmarks.e2e import worker_main
+worker_main(import_seconds, sys.argv[1])
+"""
+
+
+def offline_env(root: str, tool_latency: float = 0.0) -> Dict[str, str]:
+    """Variables de entorno que desconectan Auto de todos los servicios externos."""
+    stub = f"{shlex.quote(sys.executable)} {shlex.quote(STUB_SERVER)}"
+    return {
+        "AUTO_MCP_POOL": "0",
+        "AUTO_MCP_INIT_MODE": "concurrent",
+        "AUTO_MCP_FILE_SYSTEM_COMMAND": f"{stub} file-system --latency {tool_latency}",
+        "AUTO_MCP_ELEVENLABS_COMMAND": f"{stub} elevenlabs --latency {tool_latency} --output-dir {shlex.quote(os.path.join(root, 'tts'))}",
+        "AUTO_FS_ROOT": root,
+        "AUTO_SEARCH_CACHE": "0",
+        "AUTO_TTS_CACHE": "0",
+        # Almacén de investigación activo (es el valor por defecto) pero en el directorio temporal
+        "AUTO_RESEARCH_DB": os.path.join(root, "research.sqlite"),
+        "AUTO_MEMORY_SUMMARIZER": "extractive",
+        # Los fakes no tienen cuota: el planificador solo limita concurrencia
+        "AUTO_SCHED_RATES": "",
+        "GOOGLE_API_KEY": "offline",
+        "GROQ_API_KEY": "offline",
+        "FIRECRAWL_API_KEY": "offline",
+        "ELEVENLABS_API_KEY": "offline",
+    }
+
+
+# --- Proceso hijo ---
+
+def _text_response(text: str):
+    from google.genai import types
+    from google.adk.models.llm_response import LlmResponse
+
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _call_response(name: str, args: Dict[str, Any]):
+    from google.genai import types
+    from google.adk.models.llm_response import LlmResponse
+
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+    )
+
+
+def _last_user_text(llm_request) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == "user":
+            for part in content.parts or []:
+                if part.text:
+                    return part.text
+    return ""
+
+
+def _declared_tools(llm_request) -> List[str]:
+    """Nombres de las herramientas declaradas al modelo, que es lo único que ve un LLM real.
+
+    Si una declaración no coincide con su clave en tools_dict, ADK no encuentra la herramienta
+    cuando el modelo la llama: el benchmark falla en vez de ocultarlo.
+    """
+    tools = llm_request.config.tools if llm_request.config else None
+    names = [
+        declaration.name
+        for tool in tools or []
+        for declaration in getattr(tool, "function_declarations", None) or []
+    ]
+    if sorted(names) != sorted(llm_request.tools_dict):
+        raise RuntimeError(f"declared tools {sorted(names)} != tools_dict {sorted(llm_request.tools_dict)}")
+    return names
+
+
+def _answered(llm_request) -> bool:
+    """True si el último contenido es la respuesta de una herramienta."""
+    if not llm_request.contents:
+        return False
+    return any(part.function_response for part in llm_request.contents[-1].parts or [])
+
+
+def _responses_this_turn(llm_request) -> int:
+    """Respuestas de herramientas recibidas desde el último mensaje de texto del usuario."""
+    count = 0
+    for content in reversed(llm_request.contents):
+        if content.role == "user" and any(part.text for part in content.parts or []):
+            break
+        count += sum(1 for part in content.parts or [] if part.function_response)
+    return count
+
+
+def _compound_script(llm_request):
+    """Petición compuesta: un plan con delegate_in_parallel o las delegaciones una a una."""
+    done = _responses_this_turn(llm_request)
+    declared = _declared_tools(llm_request)
+    tools = {prefix: next((name for name in declared if name.startswith(prefix)), prefix)
+             for _, prefix, _ in COMPOUND_TASKS}
+    if "delegate_in_parallel" in declared:
+        if done:
+            return _text_response("Here is everything you asked for.")
+        return _call_response("delegate_in_parallel", {"tasks": [
+            {"id": task_id, "agent": tools[prefix], "request": request}
+            for task_id, prefix, request in COMPOUND_TASKS
+        ]})
+    if done < len(COMPOUND_TASKS):
+        _, prefix, request = COMPOUND_TASKS[done]
+        return _call_response(tools[prefix], {"request": request})
+    return _text_response("Here is everything you asked for.")
+
+
+def _root_script(llm_request):
+    """El agente raíz delega en el AgentTool de la ruta del mensaje y luego resume.
+
+    Con delegación en streaming (la instrucción pide transfer_to_agent) transfiere al sub-agente.
+    """
+    if _last_user_text(llm_request) == COMPOUND_MESSAGE:
+        return _compound_script(llm_request)
+    if _answered(llm_request):
+        return _text_response("Here is what the specialist found.")
+    text = _last_user_text(llm_request)
+    declared = _declared_tools(llm_request)
+    for prefix, message in ROUTES.values():
+        if text == message:
+            tool = next((name for name in declared if name.startswith(prefix)), None)
+            if tool is not None and _hands_off(llm_request) and "transfer_to_agent" in declared:
+                return _call_response("transfer_to_agent", {"agent_name": tool})
+            if tool is not None:
+                return _call_response(tool, {"request": text})
+    return _text_response("I can help with that.")
+
+
+def _hands_off(llm_request) -> bool:
+    from ..streaming import STREAM_INSTRUCTION
+
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return isinstance(instruction, str) and STREAM_INSTRUCTION.strip() in instruction
+
+
+def _padded(script, words: int):
+    """Alarga las respuestas de texto del guion hasta `words` palabras (respuestas largas en streaming)."""
+
+    def padded(llm_request):
+        llm_response = script(llm_request)
+        parts = llm_response.content.parts if llm_response.content else []
+        if words and parts and all(part.text for part in parts):
+            text = "".join(part.text for part in parts)
+            filler = max(0, words - len(text.split()))
+            return _text_response(text + " " + " ".join(["details"] * filler) if filler else text)
+        return llm_response
+
+    return padded
+
+
+def _sub_agent_script(agent_name: str):
+    call = SUB_AGENT_CALLS.get(agent_name)
+
+    def script(llm_request):
+        if _answered(llm_request) or call is None or call[0] not in _declared_tools(llm_request):
+            return _text_response(f"{agent_name} finished the task.")
+        tool, make_args = call
+        return _call_response(tool, make_args(_last_user_text(llm_request)))
+
+    return script
+
+
+class ToolTimer:
+    """before/after_tool_callback que miden cada llamada a herramienta por nombre."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._started: Dict[str, float] = {}
+
+    def before_tool_callback(self, tool, args, tool_context):
+        self._started[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    def after_tool_callback(self, tool, args, tool_context, tool_response):
+        started = self._started.pop(tool_context.function_call_id, None)
+        if started is not None:
+            self.samples.setdefault(tool.name, []).append(time.perf_counter() - started)
+        return None
+
+    def attach(self, agent) -> None:
+        # Van primero: un callback anterior que devuelva un resultado corta la cadena
+        add_callbacks(
+            agent,
+            first=True,
+            before_tool_callback=self.before_tool_callback,
+            after_tool_callback=self.after_tool_callback,
+        )
+
+
+def install_fakes(
+    root_agent,
+    llm_latency: float,
+    search_latency: float,
+    chunk_latency: float = 0.0,
+    answer_words: int = 0,
+) -> Tuple[List[Any], ToolTimer]:
+    """Reemplaza los modelos por FakeLlm guionizados y Firecrawl por un FakeFirecrawlApp."""
+    from ..testing.fakes import FakeLlm, FakeFirecrawlApp
+    from ..sub_agents.web_searcher_agent.agent import set_search_client
+
+    fakes = []
+    timer = ToolTimer()
+    for agent in walk_agents(root_agent):
+        script = _root_script if agent is root_agent else _sub_agent_script(agent.name)
+        agent.model = FakeLlm(
+            model=f"fake/{agent.name}",
+            latency=llm_latency,
+            chunk_latency=chunk_latency,
+            script=_padded(script, answer_words),
+        )
+        fakes.append(agent.model)
+        timer.attach(agent)
+    set_search_client(FakeFirecrawlApp(latency=search_latency))
+    return fakes, timer
+
+
+async def _run_turn(runner, user_id: str, text: str) -> float:
+    from google.genai import types
+
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    start = time.perf_counter()
+    async for _ in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        pass
+    return time.perf_counter() - start
+
+
+async def bench_routes(runner, fakes: List[Any], turns: int) -> Dict[str, Any]:
+    results = {}
+    for route, (_, message) in ROUTES.items():
+        calls_before = sum(fake.calls for fake in fakes)
+        samples = [await _run_turn(runner, "bench", message) for _ in range(turns)]
+        llm_calls = sum(fake.calls for fake in fakes) - calls_before
+        results[route] = {**percentiles(samples), "llm_calls_per_turn": llm_calls / turns}
+    return results
+
+
+async def bench_throughput(runner, turns: int, concurrency: int) -> Dict[str, Any]:
+    messages = [message for _, message in ROUTES.values()]
+    samples: List[float] = []
+
+    async def session(index: int) -> None:
+        for turn in range(turns):
+            samples.append(await _run_turn(runner, f"user-{index}", messages[(index + turn) % len(messages)]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "sessions": concurrency,
+        "turns": len(samples),
+        "seconds": elapsed,
+        "turns_per_second": len(samples) / elapsed if elapsed else 0.0,
+        "latency": percentiles(samples),
+    }
+
+
+async def _stream_turn(runner, user_id: str, text: str) -> Tuple[Optional[float], float]:
+    """(segundos hasta el primer texto visible para el cliente, segundos hasta el final) con SSE."""
+    from google.genai import types
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    first_token = None
+    start = time.perf_counter()
+    async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message, run_config=run_config):
+        if first_token is None and event.content and any(part.text for part in event.content.parts or []):
+            first_token = time.perf_counter() - start
+    return first_token, time.perf_counter() - start
+
+
+async def bench_streaming(runner, turns: int) -> Dict[str, Any]:
+    results = {}
+    for route, (_, message) in ROUTES.items():
+        first_tokens, totals = [], []
+        for _ in range(turns):
+            first_token, total = await _stream_turn(runner, "bench", message)
+            if first_token is not None:
+                first_tokens.append(first_token)
+            totals.append(total)
+        results[route] = {"first_token": percentiles(first_tokens), "total": percentiles(totals)}
+    return results
+
+
+def _assembled_tokens(assembler) -> int:
+    return sum(
+        stats["instruction_tokens"] + stats["tool_tokens"] + stats["content_tokens"]
+        for stats in assembler.stats.values()
+    )
+
+
+async def bench_prompts(runner, root_agent, fakes: List[Any], turns: int) -> Dict[str, Any]:
+    """Tokens de entrada por turno y ruta, según el PromptAssembler (con herramientas) y según FakeLlm."""
+    from ..agent import prompt_assembler
+
+    if prompt_assembler is None:
+        raise RuntimeError("prompt accounting is disabled (AUTO_PROMPTS=0)")
+    prompt_assembler.stats.clear()
+    routes = {}
+    for route, (_, message) in ROUTES.items():
+        fake_before = sum(fake.input_tokens for fake in fakes)
+        calls_before = sum(fake.calls for fake in fakes)
+        assembled_before = _assembled_tokens(prompt_assembler)
+        samples = [await _run_turn(runner, "bench", message) for _ in range(turns)]
+        routes[route] = {
+            **percentiles(samples),
+            "llm_calls_per_turn": (sum(fake.calls for fake in fakes) - calls_before) / turns,
+            "input_tokens_per_turn": (_assembled_tokens(prompt_assembler) - assembled_before) / turns,
+            "fake_llm_input_tokens_per_turn": (sum(fake.input_tokens for fake in fakes) - fake_before) / turns,
+        }
+    return {
+        "routes": routes,
+        "agents": prompt_assembler.metrics()["agents"],
+        "static": prompt_assembler.static_footprint(root_agent),
+    }
+
+
+async def run_worker(config: Dict[str, Any], root_agent, startup: Dict[str, float]) -> Dict[str, Any]:
+    from google.adk.runners import InMemoryRunner
+    from ..async_agents import init_latencies
+    from ..models import model_registry
+    from ..scheduler import scheduler
+    from ..tracing import tracer
+
+    fakes, timer = install_fakes(
+        root_agent,
+        config["llm_latency"],
+        config["search_latency"],
+        config.get("chunk_latency", 0.0),
+        config.get("answer_words", 0),
+    )
+    runner = InMemoryRunner(agent=root_agent, app_name="Auto")
+
+    start = time.perf_counter()
+    await _run_turn(runner, "bench", ROUTES["conversational"][1])
+    result: Dict[str, Any] = {
+        **startup,
+        "mcp_init_seconds": dict(init_latencies),
+        "first_turn_seconds": time.perf_counter() - start,
+    }
+    if config["mode"] == "cold_start":
+        return result
+    if config["mode"] == "streaming":
+        from ..agent import first_token_tracker
+
+        return {
+            "routes": await bench_streaming(runner, config["turns"]),
+            "ttft_metrics": first_token_tracker.metrics() if first_token_tracker is not None else None,
+        }
+    if config["mode"] == "prompts":
+        return await bench_prompts(runner, root_agent, fakes, config["turns"])
+    if config["mode"] == "compound":
+        calls_before = sum(fake.calls for fake in fakes)
+        samples = [await _run_turn(runner, "bench", COMPOUND_MESSAGE) for _ in range(config["turns"])]
+        llm_calls = sum(fake.calls for fake in fakes) - calls_before
+        return {**percentiles(samples), "llm_calls_per_turn": llm_calls / config["turns"]}
+
+    timer.samples.clear()
+    model_registry.reset_stats()
+    result["routes"] = await bench_routes(runner, fakes, config["turns"])
+    result["tools"] = {name: percentiles(samples) for name, samples in timer.samples.items()}
+    result["throughput"] = [
+        await bench_throughput(runner, config["turns"], concurrency) for concurrency in config["concurrency"]
+    ]
+    result["models"] = model_registry.metrics()["models"]
+    result["scheduler"] = scheduler.metrics()["keys"]
+    if tracer is not None:
+        result["tracing"] = tracer.summary()
+    return result
+
+
+def worker_main(import_seconds: float, config_json: str) -> None:
+    from ..agent import get_root_agent
+
+    # Construir fuera del event loop, como lo hace ADK web al cargar el agente
+    start = time.perf_counter()
+    root_agent = get_root_agent()
+    startup = {"import_seconds": import_seconds, "build_seconds": time.perf_counter() - start}
+    result = asyncio.run(run_worker(json.loads(config_json), root_agent, startup))
+    sys.stdout.write(RESULT_MARKER + json.dumps(result, default=str) + "\n")
+    sys.stdout.flush()
+
+
+# --- Proceso principal ---
+
+def spawn_worker(config: Dict[str, Any], env: Dict[str, str], timeout: float = 600) -> Dict[str, Any]:
+    """Lanza un proceso nuevo con el entorno offline y devuelve su resultado."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", WORKER_CODE, json.dumps(config)],
+        cwd=REPO_DIR,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            result = json.loads(line[len(RESULT_MARKER):])
+            result["process_seconds"] = time.perf_counter() - start
+            return result
+    raise RuntimeError(
+        f"Benchmark worker failed (exit {completed.returncode}):\n{completed.stderr[-2000:]}"
+    )
+
+
+def run_benchmark(
+    turns: int = 20,
+    concurrency: Optional[List[int]] = None,
+    cold_starts: int = 3,
+    llm_latency: float = 0.0,
+    tool_latency: float = 0.0,
+    chunk_latency: float = 0.005,
+    answer_words: int = 60,
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="auto-e2e-") as root:
+        with open(os.path.join(root, "notes.txt"), "w") as f:
+            f.write("benchmark notes\n" * 20)
+        env = offline_env(root, tool_latency)
+        base_config = {"llm_latency": llm_latency, "search_latency": tool_latency}
+
+        runs = [spawn_worker({**base_config, "mode": "cold_start"}, env) for _ in range(cold_starts)]
+        cold_start = {
+            "runs": runs,
+            "import": percentiles([run["import_seconds"] for run in runs]),
+            "build": percentiles([run["build_seconds"] for run in runs]),
+            "first_turn": percentiles([run["first_turn_seconds"] for run in runs]),
+        }
+
+        warm = spawn_worker(
+            {**base_config, "mode": "full", "turns": turns, "concurrency": concurrency or [1, 4, 16]},
+            env,
+        )
+        # Petición compuesta: delegaciones una a una (AUTO_FANOUT=0) frente a delegate_in_parallel
+        compound_config = {**base_config, "mode": "compound", "turns": turns}
+        compound = {
+            "sequential": spawn_worker(compound_config, {**env, "AUTO_FANOUT": "0"}),
+            "fanout": spawn_worker(compound_config, env),
+        }
+        # Respuestas largas generadas palabra a palabra: AgentTool frente a transfer_to_agent
+        streaming_config = {
+            **base_config,
+            "mode": "streaming",
+            "turns": turns,
+            "chunk_latency": chunk_latency,
+            "answer_words": answer_words,
+        }
+        streaming = {
+            "agent_tool": spawn_worker(streaming_config, {**env, "AUTO_STREAM_DELEGATION": "0"}),
+            "stream_delegation": spawn_worker(streaming_config, {**env, "AUTO_STREAM_DELEGATION": "1"}),
+        }
+        return {
+            "config": {
+                **base_config,
+                "tool_latency": tool_latency,
+                "turns": turns,
+                "cold_starts": cold_starts,
+                "chunk_latency": chunk_latency,
+                "answer_words": answer_words,
+            },
+            "cold_start": cold_start,
+            "routes": warm["routes"],
+            "compound": compound,
+            "streaming": streaming,
+            "tools": warm["tools"],
+            "throughput": warm["throughput"],
+            "models": warm["models"],
+            "scheduler": warm["scheduler"],
+            "tracing": warm.get("tracing"),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency and throughput benchmark")
+    parser.add_argument("--turns", type=int, default=20, help="turns per route and per concurrent session")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrent session counts")
+    parser.add_argument("--cold-starts", type=int, default=3, help="fresh processes to measure import/init time")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="seconds per stub MCP / search call")
+    parser.add_argument("--chunk-latency", type=float, default=0.005, help="seconds per streamed word")
+    parser.add_argument("--answer-words", type=int, default=60, help="words per answer in the streaming run")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        turns=args.turns,
+        concurrency=[int(value) for value in args.concurrency.split(",") if value],
+        cold_starts=args.cold_starts,
+        llm_latency=args.llm_latency,
+        tool_latency=args.tool_latency,
+        chunk_latency=args.chunk_latency,
+        answer_words=args.answer_words,
+    )
+    write_results("e2e", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
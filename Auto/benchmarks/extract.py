@@ -0,0 +1,66 @@
+"""
+Benchmark de la etapa de extracción de búsquedas profundas (web_searcher_agent/extract.py).
+
+    python -m Auto.benchmarks.extract [--latency 0.2] [--runs 5] [--budget 3000] [--output extract.json]
+
+Sirve páginas de prueba desde un servidor HTTP local con latencia por petición y compara
+la descarga una a una (concurrencia 1) con la descarga concurrente del pipeline. Informa de
+tiempos, pasajes duplicados eliminados y tokens devueltos frente a tokens extraídos.
+"""
+import os
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+
+async def run(latency: float, runs: int, budget: int, query: str) -> Dict[str, Any]:
+    import httpx
+    from ..testing.fixture_server import serve_fixture_pages
+    from ..sub_agents.web_searcher_agent import extract
+
+    results: Dict[str, Any] = {}
+    with serve_fixture_pages(latency=latency) as server:
+        search_results = server.search_results()
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            for mode, concurrency in (("sequential", 1), ("concurrent", extract.FETCH_CONCURRENCY)):
+                samples: List[float] = []
+                for _ in range(runs):
+                    output = await extract.extract_passages(
+                        query, search_results, token_budget=budget, client=client, concurrency=concurrency
+                    )
+                    samples.append(output["seconds"])
+                results[mode] = percentiles(samples)
+        results["last_output"] = {
+            "pages": len(search_results),
+            "pages_fetched": output["pages_fetched"],
+            "failures": output["failures"],
+            "passages_total": output["passages_total"],
+            "duplicates_removed": output["duplicates_removed"],
+            "passages_returned": len(output["passages"]),
+            "extracted_tokens": output["extracted_tokens"],
+            "returned_tokens": output["tokens"],
+            "top_passage": output["passages"][0] if output["passages"] else None,
+        }
+        results["http_requests"] = server.requests
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent page fetch and passage extraction")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fixture HTTP request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=3000, help="token budget of the returned passages")
+    parser.add_argument("--query", default="python free-threaded build without the GIL")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    # El servidor de fixtures escucha en 127.0.0.1, que el extractor rechaza por defecto
+    os.environ.setdefault("AUTO_FETCH_ALLOW_HOSTS", "127.0.0.1")
+    results = asyncio.run(run(args.latency, args.runs, args.budget, args.query))
+    write_results("extract", {"latency": args.latency, "budget": args.budget, **results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compara las herramientas de file system nativas con el servidor stdio file-system-mcp.
+
+    python -m Auto.benchmarks.fs_backends [--iterations 100] [--output fs.json] [--skip-mcp]
+
+Crea un árbol de prueba temporal (archivo pequeño, log grande y un directorio con muchas
+entradas) y mide la latencia de read_file y list_directory por cada backend.
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from .common import percentiles, write_results
+from ..sub_agents.file_system_agent import native_tools
+
+
+def make_fixture(root: str, large_lines: int = 200_000, directory_entries: int = 2000) -> Dict[str, str]:
+    """Crea los archivos de prueba y devuelve sus rutas absolutas."""
+    small = os.path.join(root, "small.txt")
+    with open(small, "w") as f:
+        f.write("hello world\n" * 80)
+
+    large = os.path.join(root, "large.log")
+    with open(large, "w") as f:
+        for i in range(large_lines):
+            f.write(f"2024-01-01T00:00:{i % 60:02d} INFO request {i} handled in {i % 97} ms\n")
+
+    many = os.path.join(root, "many")
+    os.makedirs(many, exist_ok=True)
+    for i in range(directory_entries):
+        with open(os.path.join(many, f"file_{i:05d}.txt"), "w") as f:
+            f.write(str(i))
+
+    return {"small": small, "large": large, "many": many}
+
+
+async def _measure(call: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def bench_native(paths: Dict[str, str], iterations: int) -> Dict[str, Any]:
+    async def run(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    return {
+        "read_small": await _measure(lambda: run(native_tools.read_file, paths["small"]), iterations),
+        "read_large_preview": await _measure(lambda: run(native_tools.read_file, paths["large"]), iterations),
+        "read_large_range": await _measure(
+            lambda: run(native_tools.read_file, paths["large"], start_line=100_000, end_line=100_100), iterations
+        ),
+        "list_directory": await _measure(lambda: run(native_tools.list_directory, paths["many"]), iterations),
+    }
+
+
+async def bench_mcp(paths: Dict[str, str], iterations: int) -> Optional[Dict[str, Any]]:
+    from ..sub_agents.file_system_agent.agent import get_tools_async
+
+    start = time.perf_counter()
+    tools, exit_stack = await get_tools_async()
+    connect_seconds = time.perf_counter() - start
+    if not tools:
+        return None
+
+    try:
+        by_name = {tool.name: tool for tool in tools}
+        results: Dict[str, Any] = {"connect_ms": connect_seconds * 1000}
+        if "read_file" in by_name:
+            read_tool = by_name["read_file"]
+            results["read_small"] = await _measure(
+                lambda: read_tool.run_async(args={"path": paths["small"]}, tool_context=None), iterations
+            )
+            results["read_large"] = await _measure(
+                lambda: read_tool.run_async(args={"path": paths["large"]}, tool_context=None), iterations
+            )
+        if "list_directory" in by_name:
+            list_tool = by_name["list_directory"]
+            results["list_directory"] = await _measure(
+                lambda: list_tool.run_async(args={"path": paths["many"]}, tool_context=None), iterations
+            )
+        return results
+    finally:
+        if exit_stack is not None:
+            await exit_stack.aclose()
+
+
+async def run_benchmark(iterations: int, skip_mcp: bool = False) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="auto-fs-bench-") as root:
+        paths = make_fixture(root)
+        # Las herramientas nativas quedan confinadas al árbol de prueba
+        previous_root = native_tools.FS_ROOT
+        native_tools.FS_ROOT = os.path.realpath(root)
+        try:
+            results = {"native": await bench_native(paths, iterations)}
+        finally:
+            native_tools.FS_ROOT = previous_root
+
+        if skip_mcp:
+            results["mcp"] = "skipped"
+        else:
+            mcp_results = await bench_mcp(paths, iterations)
+            results["mcp"] = mcp_results if mcp_results is not None else "unavailable"
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Native vs MCP file system tool latency")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--skip-mcp", action="store_true", help="only measure the native tools")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmark(args.iterations, args.skip_mcp))
+    write_results("fs_backends", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
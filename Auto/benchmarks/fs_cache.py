@@ -0,0 +1,208 @@
+"""
+Benchmark del cache de lecturas y del índice de contenido de file_system_agent.
+
+    python -m Auto.benchmarks.fs_cache [--iterations 200] [--files 5000] [--workers 4] [--output fs_cache.json] [--skip-mcp]
+
+- read_cache: latencia de read_file/list_directory sin cache y con el cache caliente (herramientas
+  nativas y, si está disponible, el servidor file-system-mcp); cuenta lecturas obsoletas después
+  de modificar los archivos fuera del agente
+- index: construcción completa del índice en serie y con pool de procesos, actualización
+  incremental tras modificar el 1% de los archivos, y búsqueda con el índice frente a recorrer y
+  leer todos los archivos
+"""
+import os
+import time
+import types
+import random
+import asyncio
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from .common import percentiles, write_results
+from .fs_backends import make_fixture
+from ..sub_agents.file_system_agent import native_tools
+from ..sub_agents.file_system_agent.read_cache import ReadCache
+from ..sub_agents.file_system_agent.search_index import SearchIndex, walk_files
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+
+
+class _Tool:
+    """Herramienta nativa con la interfaz que esperan los callbacks (name + run_async)."""
+
+    def __init__(self, func):
+        self.name = func.__name__
+        self.func = func
+
+    async def run_async(self, args: Dict[str, Any], tool_context=None) -> Any:
+        return self.func(**args)
+
+
+async def _call(tool, args: Dict[str, Any], cache: Optional[ReadCache], call_id: int) -> Any:
+    """Ejecuta la herramienta como lo haría ADK: before_tool_callback, herramienta, after_tool_callback."""
+    context = types.SimpleNamespace(function_call_id=str(call_id))
+    if cache is not None:
+        cached = cache.before_tool_callback(tool, args, context)
+        if cached is not None:
+            return cached
+    response = await tool.run_async(args=args, tool_context=None)
+    if cache is not None:
+        cache.after_tool_callback(tool, args, context, response)
+    return response
+
+
+async def _measure(call: Callable[[int], Awaitable[Any]], iterations: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await call(i)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def bench_tools(tools: Dict[str, Any], paths: Dict[str, str], iterations: int) -> Dict[str, Any]:
+    calls = {
+        "read_small": ("read_file", {"path": paths["small"]}),
+        "read_large": ("read_file", {"path": paths["large"]}),
+        "list_directory": ("list_directory", {"path": paths["many"]}),
+    }
+    results: Dict[str, Any] = {}
+    for label, (name, args) in calls.items():
+        if name not in tools:
+            continue
+        tool = tools[name]
+        cache = ReadCache()
+        results[label] = {
+            "uncached": await _measure(lambda i: _call(tool, args, None, i), iterations),
+            "cached": await _measure(lambda i: _call(tool, args, cache, i), iterations),
+        }
+        results[label]["cache"] = cache.metrics()
+    return results
+
+
+async def bench_staleness(tools: Dict[str, Any], root: str, rounds: int) -> Dict[str, Any]:
+    """Modifica archivos por fuera del agente y comprueba que el cache nunca devuelve contenido viejo."""
+    cache = ReadCache()
+    read_tool = tools["read_file"]
+    path = os.path.join(root, "changing.txt")
+    stale = 0
+    for i in range(rounds):
+        with open(path, "w") as f:
+            f.write(f"version {i}\n")
+        for j in range(3):
+            response = await _call(read_tool, {"path": path}, cache, i * 3 + j)
+            if f"version {i}" not in str(response):
+                stale += 1
+    return {"rounds": rounds, "stale_reads": stale, "cache": cache.metrics()}
+
+
+def make_tree(root: str, files: int, lines: int = 40) -> None:
+    """Árbol de `files` archivos de texto en directorios de 100, con palabras pseudoaleatorias."""
+    rng = random.Random(7)
+    for i in range(files):
+        directory = os.path.join(root, f"dir_{i // 100:03d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file_{i:05d}.txt"), "w") as f:
+            for line in range(lines):
+                f.write(" ".join(rng.choice(WORDS) for _ in range(12)) + f" id{i}_{line}\n")
+
+
+def naive_search(root: str, term: str) -> List[str]:
+    """Búsqueda sin índice: recorrer el árbol y leer cada archivo."""
+    found = []
+    for path, _, _ in walk_files(root):
+        with open(os.path.join(root, path), encoding="utf-8", errors="replace") as f:
+            if term in f.read():
+                found.append(path)
+    return found
+
+
+def bench_index(files: int, workers: int, iterations: int) -> Dict[str, Any]:
+    # Las bases de datos van fuera del árbol indexado
+    with tempfile.TemporaryDirectory(prefix="auto-fs-index-") as root, tempfile.TemporaryDirectory() as db_dir:
+        make_tree(root, files)
+        results: Dict[str, Any] = {"files": files, "workers": workers}
+        for label, build_workers in (("build_serial", 1), ("build_pool", workers)):
+            index = SearchIndex(root, db_path=os.path.join(db_dir, f"{label}.sqlite"), workers=build_workers, pool_threshold=1)
+            results[label] = index.refresh()
+            index.close()
+
+        index = SearchIndex(root, db_path=os.path.join(db_dir, "build_serial.sqlite"), refresh_seconds=3600, workers=workers)
+        touched = max(1, files // 100)
+        for i in range(touched):
+            with open(os.path.join(root, f"dir_{i // 100:03d}", f"file_{i:05d}.txt"), "a") as f:
+                f.write("zulu extra line\n")
+        results["incremental_refresh"] = index.refresh()
+
+        term = f"id{files // 2}_3"
+        samples: List[float] = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            index.search(term)
+            samples.append(time.perf_counter() - start)
+        results["search_index"] = percentiles(samples)
+        naive: List[float] = []
+        for _ in range(max(1, iterations // 20)):
+            start = time.perf_counter()
+            naive_search(root, term)
+            naive.append(time.perf_counter() - start)
+        results["search_naive_scan"] = percentiles(naive)
+        results["index"] = index.metrics()
+        index.close()
+        return results
+
+
+async def bench_mcp(paths: Dict[str, str], iterations: int) -> Optional[Dict[str, Any]]:
+    from ..sub_agents.file_system_agent.agent import get_tools_async
+
+    tools, exit_stack = await get_tools_async()
+    if not tools:
+        return None
+    try:
+        return await bench_tools({tool.name: tool for tool in tools}, paths, iterations)
+    finally:
+        if exit_stack is not None:
+            await exit_stack.aclose()
+
+
+async def run_benchmark(iterations: int, files: int, workers: int, skip_mcp: bool = False) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="auto-fs-cache-") as root:
+        paths = make_fixture(root)
+        previous_root = native_tools.FS_ROOT
+        native_tools.FS_ROOT = os.path.realpath(root)
+        try:
+            tools = {func.__name__: _Tool(func) for func in native_tools.NATIVE_TOOLS}
+            results: Dict[str, Any] = {
+                "read_cache_native": await bench_tools(tools, paths, iterations),
+                "staleness": await bench_staleness(tools, root, rounds=max(10, iterations // 10)),
+            }
+        finally:
+            native_tools.FS_ROOT = previous_root
+
+        if skip_mcp:
+            results["read_cache_mcp"] = "skipped"
+        else:
+            mcp_results = await bench_mcp(paths, iterations)
+            results["read_cache_mcp"] = mcp_results if mcp_results is not None else "unavailable"
+
+    results["index"] = await asyncio.to_thread(bench_index, files, workers, iterations)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="File system read cache and content index")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--files", type=int, default=5000, help="files in the index benchmark tree")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="process pool size for the index build")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--skip-mcp", action="store_true", help="only measure the native tools")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmark(args.iterations, args.files, args.workers, args.skip_mcp))
+    write_results("fs_cache", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
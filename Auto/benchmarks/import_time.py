@@ -0,0 +1,134 @@
+"""
+Presupuesto de tiempo de `import Auto` y `import Auto.agent` (chequeo de regresión para CI).
+
+    python -m Auto.benchmarks.import_time [--budget-ms 100] [--runs 5] [--output import.json]
+
+Ejecuta `python -X importtime -c "import <módulo>"` en procesos nuevos para cada módulo de
+PACKAGES y falla (exit 1) si, para alguno:
+- la mediana del tiempo acumulado (el módulo y sus paquetes padre) supera el presupuesto
+- importarlo carga módulos pesados (ADK, litellm, firecrawl, httpx, mcp...)
+- importarlo imprime algo por stdout
+
+El agente raíz se construye en el primer acceso a `Auto.root_agent`, no al importar; Auto.agent
+es lo que importa `adk web`, así que tampoco debe cargar ADK hasta construir el agente.
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, Any, List, Optional, Tuple
+
+from .common import write_results
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(PACKAGE_DIR)
+
+DEFAULT_BUDGET_MS = 100.0
+PACKAGES = ("Auto", "Auto.agent")
+# Prefijos de módulos que no deben cargarse al importar Auto
+FORBIDDEN_MODULES = ("litellm", "firecrawl", "httpx", "mcp", "google.adk", "google.genai")
+
+
+def parse_importtime(stderr: str, package: str = "Auto") -> Tuple[Optional[int], List[Tuple[str, int, int]]]:
+    """Tiempo acumulado (µs) de `package` y los módulos que importó: (nombre, self µs, acumulado µs).
+
+    Para un submódulo (Auto.agent) suma también sus paquetes padre (Auto), que se importan antes.
+    """
+    parts = package.split(".")
+    targets = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+    total: Optional[int] = None
+    modules: List[Tuple[str, int, int]] = []
+    subtree: List[Tuple[str, int, int]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Cabecera "self [us] | cumulative | imported package"
+            continue
+        name = fields[2]
+        if not name.startswith("  "):
+            if name.strip() in targets:
+                total = (total or 0) + cumulative_us
+                modules.extend(subtree)
+            # Si no, módulo de nivel superior ajeno a Auto (arranque del intérprete)
+            subtree = []
+            continue
+        subtree.append((name.strip(), self_us, cumulative_us))
+    return total, modules
+
+
+def measure_once(package: str = "Auto") -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {package}"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {package} failed:\n{completed.stderr[-2000:]}")
+    cumulative_us, subtree = parse_importtime(completed.stderr, package)
+    return {
+        "cumulative_ms": (cumulative_us or 0) / 1000,
+        "modules": subtree,
+        "stdout": completed.stdout,
+    }
+
+
+def check_package(package: str, runs: int = 5, budget_ms: float = DEFAULT_BUDGET_MS) -> Dict[str, Any]:
+    samples = [measure_once(package) for _ in range(runs)]
+    median_ms = statistics.median(sample["cumulative_ms"] for sample in samples)
+    modules = samples[-1]["modules"]
+    forbidden = sorted({
+        name for name, _, _ in modules
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in FORBIDDEN_MODULES)
+    })
+    printed = next((sample["stdout"] for sample in samples if sample["stdout"].strip()), "")
+
+    failures = []
+    if median_ms > budget_ms:
+        failures.append(f"import {package} took {median_ms:.1f} ms (budget {budget_ms:.1f} ms)")
+    if forbidden:
+        failures.append(f"import {package} loaded heavy modules: {', '.join(forbidden[:10])}")
+    if printed:
+        failures.append(f"import {package} printed to stdout: {printed.strip()[:200]!r}")
+
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:15]
+    return {
+        "budget_ms": budget_ms,
+        "median_ms": median_ms,
+        "samples_ms": [sample["cumulative_ms"] for sample in samples],
+        "modules_imported": len(modules),
+        "slowest_modules": [{"module": name, "self_ms": self_us / 1000} for name, self_us, _ in slowest],
+        "forbidden_modules": forbidden,
+        "failures": failures,
+        "passed": not failures,
+    }
+
+
+def check(runs: int = 5, budget_ms: float = DEFAULT_BUDGET_MS) -> Dict[str, Any]:
+    packages = {package: check_package(package, runs, budget_ms) for package in PACKAGES}
+    failures = [failure for result in packages.values() for failure in result["failures"]]
+    return {"budget_ms": budget_ms, "packages": packages, "failures": failures, "passed": not failures}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time budget of Auto and Auto.agent")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("AUTO_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = check(args.runs, args.budget_ms)
+    write_results("import_time", results, args.output)
+    for failure in results["failures"]:
+        print(f"❌ {failure}", file=sys.stderr)
+    return 0 if results["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""
+Soak de recargas en caliente: subprocesos, descriptores y memoria no deben crecer.
+
+    python -m Auto.benchmarks.lifecycle_soak [--reloads 30] [--warmup 3] [--max-fd-growth 2] [--output soak.json]
+
+Hace lo mismo que ADK web con --reload_agents: borra los módulos Auto.* de sys.modules, vuelve a
+importar el paquete, construye root_agent y le envía un turno (delegación en file_system, que
+llama al servidor MCP falso, y en web_searcher). Todo offline, con el entorno de benchmarks/e2e.py.
+
+Dos fases de --reloads recargas cada una:
+- serving_loop: root_agent se construye dentro del event loop que sirve, como en ADK web
+- foreign_thread: se construye en un hilo sin loop, de modo que las conexiones MCP nacen en un
+  loop que se cierra enseguida (el caso que dejaba servidores huérfanos)
+
+Después de cada recarga se miden hijos vivos, descriptores, hilos y RSS. Tras --warmup recargas
+se fija la base; la fase falla si los descriptores crecen más de --max-fd-growth o si quedan más
+hijos vivos que en la base. Al final se drena el gestor y se comprueba que no queda ningún hijo.
+Sale con código 1 si alguna comprobación falla.
+
+El RSS se reporta pero no se comprueba: los lru_cache de ADK (maxsize=1024, indexados por la
+función de cada herramienta) retienen las últimas generaciones de módulos hasta que se expulsan,
+así que la memoria sube durante las primeras decenas de recargas y luego se estabiliza.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import importlib
+import tempfile
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+# El turno de cada recarga: una delegación con herramienta MCP y otra con Firecrawl falso
+MESSAGES = ["Read the file notes.txt", "Search the web for the latest Python release"]
+
+
+def purge_modules() -> None:
+    """Lo que hace el agent loader de ADK web al detectar un cambio en el paquete."""
+    for name in [name for name in sys.modules if name == "Auto" or name.startswith("Auto.")]:
+        del sys.modules[name]
+
+
+def _build_root_agent():
+    return importlib.import_module("Auto.agent").get_root_agent()
+
+
+async def reload_once(build_in_thread: bool) -> Dict[str, Any]:
+    """Recarga el paquete, construye root_agent, espera a sus servidores y ejecuta un turno."""
+    from google.adk.runners import InMemoryRunner
+
+    previous = sys.modules.get("Auto.lifecycle")
+    previous_manager = previous.lifecycle if previous is not None else None
+    purge_modules()
+
+    start = time.perf_counter()
+    if build_in_thread:
+        root_agent = await asyncio.to_thread(_build_root_agent)
+    else:
+        root_agent = _build_root_agent()
+    lifecycle = importlib.import_module("Auto.lifecycle").lifecycle
+    # Arranques de servidores MCP y drenado de la recarga anterior
+    await lifecycle.wait_idle()
+    reload_seconds = time.perf_counter() - start
+    if previous_manager is not None and previous_manager.resources:
+        # Construido en otro hilo: la importación no podía drenar en este loop sin bloquear
+        await previous_manager.shutdown()
+
+    e2e = importlib.import_module("Auto.benchmarks.e2e")
+    e2e.install_fakes(root_agent, llm_latency=0.0, search_latency=0.0)
+    runner = InMemoryRunner(agent=root_agent, app_name="Auto")
+    start = time.perf_counter()
+    for text in MESSAGES:
+        await e2e._run_turn(runner, "soak", text)
+    turn_seconds = time.perf_counter() - start
+    await runner.close()
+
+    return {
+        "reload_seconds": reload_seconds,
+        "turn_seconds": turn_seconds,
+        "drain_seconds": previous_manager.stats["last_shutdown_seconds"] if previous_manager is not None else None,
+        "killed": previous_manager.stats["killed"] if previous_manager is not None else 0,
+        "resources": len(lifecycle.resources),
+    }
+
+
+async def soak(reloads: int, warmup: int, max_fd_growth: int, build_in_thread: bool) -> Dict[str, Any]:
+    from ..lifecycle import process_stats
+
+    samples: List[Dict[str, Any]] = []
+    for _ in range(reloads):
+        sample = await reload_once(build_in_thread)
+        sample.update(process_stats())
+        samples.append(sample)
+
+    baseline = samples[min(warmup, reloads) - 1]
+    steady = samples[min(warmup, reloads) - 1:]
+    fd_growth = max(sample["fds"] for sample in steady) - baseline["fds"]
+    children_growth = max(sample["children"] for sample in steady) - baseline["children"]
+    drains = [sample["drain_seconds"] for sample in samples if sample["drain_seconds"] is not None]
+    return {
+        "reloads": reloads,
+        "baseline": {key: baseline[key] for key in ("children", "fds", "threads", "rss_mb") if key in baseline},
+        "final": {key: samples[-1][key] for key in ("children", "fds", "threads", "rss_mb") if key in samples[-1]},
+        "fd_growth": fd_growth,
+        "children_growth": children_growth,
+        "rss_growth_mb": samples[-1].get("rss_mb", 0.0) - baseline.get("rss_mb", 0.0),
+        "reload": percentiles([sample["reload_seconds"] for sample in samples]),
+        "turn": percentiles([sample["turn_seconds"] for sample in samples]),
+        "drain": percentiles(drains),
+        "killed_after_timeout": sum(sample["killed"] for sample in samples),
+        "passed": fd_growth <= max_fd_growth and children_growth <= 0,
+    }
+
+
+async def run_benchmark(reloads: int, warmup: int, max_fd_growth: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for phase, build_in_thread in (("serving_loop", False), ("foreign_thread", True)):
+        results[phase] = await soak(reloads, warmup, max_fd_growth, build_in_thread)
+
+    lifecycle = importlib.import_module("Auto.lifecycle").lifecycle
+    metrics = await lifecycle.shutdown()
+    results["shutdown"] = {
+        "seconds": metrics["last_shutdown_seconds"],
+        "process": metrics["process"],
+        "passed": metrics["process"]["children"] == 0,
+    }
+    results["passed"] = all(results[key]["passed"] for key in ("serving_loop", "foreign_thread", "shutdown"))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-reload soak: subprocess, fd and memory growth")
+    parser.add_argument("--reloads", type=int, default=30, help="reloads per phase")
+    parser.add_argument("--warmup", type=int, default=3, help="reloads before the baseline sample")
+    parser.add_argument("--max-fd-growth", type=int, default=2, help="allowed open fd growth over the baseline")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    from .e2e import offline_env
+
+    with tempfile.TemporaryDirectory(prefix="auto-soak-") as root:
+        with open(os.path.join(root, "notes.txt"), "w") as f:
+            f.write("soak test notes\n")
+        # Se lee en cada recarga: los módulos de Auto leen el entorno al importarse
+        os.environ.update({**offline_env(root), "AUTO_HEALTH_INTERVAL": "1"})
+        results = asyncio.run(run_benchmark(args.reloads, args.warmup, args.max_fd_growth))
+    write_results("lifecycle_soak", results, args.output)
+    return 0 if results["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark de la memoria de conversación acotada (Auto/memory.py).
+
+    python -m Auto.benchmarks.memory [--turns 60] [--keep-turns 6] [--budget 2000] [--output memory.json]
+
+Ejecuta una sesión larga contra un agente con FakeLlm (cuenta los tokens de entrada) con la
+memoria desactivada y activada, y compara tokens de entrada por turno y latencia por turno.
+El resumidor es también un FakeLlm con latencia, para comprobar que no bloquea los turnos.
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+USER_MESSAGE = "Turn {turn}: my project is called Auto and I'd like to talk about item {turn}. " * 3
+
+
+async def run_session(turns: int, memory=None, llm_latency: float = 0.0, reply_chars: int = 400) -> Dict[str, Any]:
+    from google.genai import types
+    from google.adk.agents import Agent
+    from google.adk.runners import InMemoryRunner
+    from ..testing.fakes import FakeLlm
+
+    fake = FakeLlm(model="fake/chat", reply=("Sure. " + "x" * reply_chars), latency=llm_latency)
+    agent = Agent(name="chat", model=fake, instruction="You are a helpful assistant.")
+    if memory is not None:
+        memory.attach(agent)
+
+    runner = InMemoryRunner(agent=agent, app_name="memory_bench")
+    session = await runner.session_service.create_session(app_name="memory_bench", user_id="bench")
+
+    tokens: List[int] = []
+    samples: List[float] = []
+    for turn in range(turns):
+        message = types.Content(role="user", parts=[types.Part(text=USER_MESSAGE.format(turn=turn))])
+        before = fake.input_tokens
+        start = time.perf_counter()
+        async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            pass
+        samples.append(time.perf_counter() - start)
+        tokens.append(fake.input_tokens - before)
+
+    if memory is not None:
+        await memory.wait_idle()
+    last = tokens[-10:]
+    return {
+        "input_tokens_total": sum(tokens),
+        "input_tokens_first_turn": tokens[0],
+        "input_tokens_last_10_avg": sum(last) / len(last),
+        "input_tokens_max": max(tokens),
+        "latency": percentiles(samples),
+        "input_tokens_per_turn": tokens,
+    }
+
+
+async def bench(turns: int, keep_turns: int, budget: int, llm_latency: float, summary_latency: float) -> Dict[str, Any]:
+    from ..memory import ConversationMemory, llm_summarizer
+    from ..models import set_model_factory
+    from ..testing.fakes import fake_model_factory
+
+    set_model_factory(fake_model_factory(reply="User works on project Auto; discussed several items.", latency=summary_latency))
+    try:
+        baseline = await run_session(turns, None, llm_latency)
+        memory = ConversationMemory(
+            keep_turns=keep_turns,
+            token_budget=budget,
+            summarizer=llm_summarizer("fake/summary", None),
+        )
+        bounded = await run_session(turns, memory, llm_latency)
+    finally:
+        set_model_factory(None)
+
+    return {
+        "turns": turns,
+        "keep_turns": keep_turns,
+        "token_budget": budget,
+        "memory_off": baseline,
+        "memory_on": {**bounded, "memory": memory.metrics()},
+        "token_reduction": 1 - bounded["input_tokens_total"] / baseline["input_tokens_total"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bounded conversation memory")
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--keep-turns", type=int, default=6)
+    parser.add_argument("--budget", type=int, default=2000, help="token budget per model call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--summary-latency", type=float, default=0.05, help="seconds per fake summary call")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(bench(args.turns, args.keep_turns, args.budget, args.llm_latency, args.summary_latency))
+    write_results("memory", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de huella de prompt (Auto/prompts.py): instrucciones completas frente a compactas.
+
+    python -m Auto.benchmarks.prompts [--turns 5] [--output prompts.json]
+
+Lanza dos procesos con el entorno offline de benchmarks/e2e.py (FakeLlm guionizados, servidor MCP
+falso), uno con AUTO_PROMPT_MODE=full y otro con AUTO_PROMPT_MODE=compact, y envía --turns turnos
+por ruta. Reporta:
+- tokens estáticos por agente (instrucción + declaraciones de herramientas), sin ningún turno
+- tokens de entrada por turno y ruta: lo que mide el PromptAssembler (con herramientas) y lo que
+  cuenta el FakeLlm (instrucción y contenidos)
+- llamadas con prefijo estable y tokens que un cache de contexto del proveedor podría reutilizar
+
+Los tokens se estiman con chars/4, como en Auto/memory.py: sirven para comparar, no para facturar.
+"""
+import os
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional
+
+from .common import write_results
+
+
+def _savings(full: float, compact: float) -> Optional[float]:
+    return round(100.0 * (full - compact) / full, 1) if full else None
+
+
+def compare(full: Dict[str, Any], compact: Dict[str, Any]) -> Dict[str, Any]:
+    # static_footprint ya trae ambas variantes; se toma la del proceso compacto
+    static = {
+        agent: {
+            "tools": counts["tools"],
+            "full": counts["full"]["static_tokens"],
+            "compact": counts["compact"]["static_tokens"],
+            "savings_pct": _savings(counts["full"]["static_tokens"], counts["compact"]["static_tokens"]),
+            "example_bank": counts["compact"]["example_bank"],
+        }
+        for agent, counts in compact["static"].items()
+    }
+    routes = {}
+    for route, counts in full["routes"].items():
+        other = compact["routes"][route]
+        routes[route] = {
+            "llm_calls_per_turn": counts["llm_calls_per_turn"],
+            "input_tokens_per_turn": {
+                "full": counts["input_tokens_per_turn"],
+                "compact": other["input_tokens_per_turn"],
+                "savings_pct": _savings(counts["input_tokens_per_turn"], other["input_tokens_per_turn"]),
+            },
+            "fake_llm_input_tokens_per_turn": {
+                "full": counts["fake_llm_input_tokens_per_turn"],
+                "compact": other["fake_llm_input_tokens_per_turn"],
+                "savings_pct": _savings(counts["fake_llm_input_tokens_per_turn"], other["fake_llm_input_tokens_per_turn"]),
+            },
+            "p50_ms": {"full": counts["p50_ms"], "compact": other["p50_ms"]},
+        }
+    full_total = sum(counts["full"] for counts in static.values())
+    compact_total = sum(counts["compact"] for counts in static.values())
+    return {
+        "static": static,
+        "static_total": {"full": full_total, "compact": compact_total, "savings_pct": _savings(full_total, compact_total)},
+        "routes": routes,
+    }
+
+
+def run_benchmark(turns: int, llm_latency: float) -> Dict[str, Any]:
+    from .e2e import offline_env, spawn_worker
+
+    with tempfile.TemporaryDirectory(prefix="auto-prompts-") as root:
+        with open(os.path.join(root, "notes.txt"), "w") as f:
+            f.write("benchmark notes\n" * 20)
+        env = {**offline_env(root), "AUTO_PROMPTS": "1"}
+        config = {"mode": "prompts", "turns": turns, "llm_latency": llm_latency, "search_latency": 0.0}
+        runs = {mode: spawn_worker(config, {**env, "AUTO_PROMPT_MODE": mode}) for mode in ("full", "compact")}
+    return {
+        "config": {"turns": turns, "llm_latency": llm_latency},
+        **compare(runs["full"], runs["compact"]),
+        "agents": {mode: run["agents"] for mode, run in runs.items()},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prompt footprint: full vs compact instructions and tool schemas")
+    parser.add_argument("--turns", type=int, default=5, help="turns per route")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    write_results("prompts", run_benchmark(args.turns, args.llm_latency), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
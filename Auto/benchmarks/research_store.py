@@ -0,0 +1,182 @@
+"""
+Benchmark del almacén local de investigación (web_searcher_agent/research_store.py).
+
+    python -m Auto.benchmarks.research_store [--queries 200] [--topics 40] [--upstream-latency 0.5] [--output research.json]
+
+Simula usuarios que investigan temas solapados: cada consulta es una variante de uno de --topics
+temas, buscada con web_search_tool contra un Firecrawl falso con --upstream-latency segundos por
+búsqueda. Cada llamada del modelo a una herramienta suma --llm-latency segundos.
+
+- lookup: tasa de aciertos locales, aciertos del tema correcto, llamadas upstream y al modelo, y
+  latencia de un acierto local frente a una búsqueda upstream, en dos modos:
+  transparent (web_search_tool consulta el almacén por dentro) y lookup_tool (una herramienta de
+  consulta aparte antes de buscar, que cuesta otra llamada al modelo en cada fallo)
+- compaction: ingesta con un tamaño máximo pequeño; compactaciones, documentos borrados y tamaño final
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+TEMPLATES = [
+    "{topic}",
+    "what is {topic}",
+    "{topic} explained",
+    "how does {topic} work",
+    "{topic} tutorial for beginners",
+    "best resources to learn {topic}",
+]
+SUBJECTS = [
+    "rust ownership", "python asyncio", "kubernetes operators", "postgres vacuum", "react hooks",
+    "sourdough starter", "marathon training", "solar panels", "home espresso", "bonsai pruning",
+    "quantum annealing", "linear regression", "css grid", "git rebase", "docker volumes",
+    "vegetable fermentation", "chess openings", "film photography", "urban beekeeping", "tide pools",
+]
+
+
+# Variantes de un mismo tema: comparten casi todas las palabras pero son otra pregunta
+QUALIFIERS = ["", "history", "performance", "costs", "part 2"]
+
+
+def make_topics(count: int) -> List[str]:
+    topics = []
+    for i in range(count):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        qualifier = QUALIFIERS[(i // len(SUBJECTS)) % len(QUALIFIERS)]
+        topics.append(f"{subject} {qualifier}".strip())
+    return topics
+
+
+async def bench_lookup(queries: int, topics: int, upstream_latency: float, llm_latency: float, db_path: str, mode: str) -> Dict[str, Any]:
+    """Una pasada de consultas con un almacén vacío.
+
+    mode="transparent": web_search_tool consulta el almacén por dentro (una llamada al modelo por consulta).
+    mode="lookup_tool": el protocolo anterior, con una herramienta de consulta aparte que el modelo
+    llamaba antes de buscar (una llamada al modelo más en cada fallo).
+    Las llamadas al modelo no se esperan: se suman --llm-latency segundos por cada una.
+    """
+    from ..testing.fakes import FakeFirecrawlApp
+    from ..sub_agents.web_searcher_agent import agent as web_agent
+    from ..sub_agents.web_searcher_agent.research_store import ResearchStore, set_research_store
+    from ..scheduler import scheduler
+
+    rng = random.Random(11)
+    subjects = make_topics(topics)
+    fake = FakeFirecrawlApp(latency=upstream_latency)
+    store = ResearchStore(db_path)
+    previous_cache = web_agent.search_cache
+    scheduler_enabled = scheduler.enabled
+    # El Firecrawl falso no tiene cuota: el ritmo de FIRECRAWL_API_KEY solo añadiría esperas
+    scheduler.enabled = False
+    web_agent.set_search_client(fake)
+    # Sin el cache exacto de consultas: solo se mide el almacén
+    web_agent.search_cache = None
+    set_research_store(store)
+
+    local: List[float] = []
+    upstream: List[float] = []
+    model_calls = 0
+    # Acierto correcto: el primer resultado es de una búsqueda sobre el mismo tema (o uno que lo incluye)
+    correct = 0
+    try:
+        for _ in range(queries):
+            subject = rng.choice(subjects)
+            query = rng.choice(TEMPLATES).format(topic=subject)
+            start = time.perf_counter()
+            calls = 1
+            if mode == "transparent":
+                result = await web_agent.web_search_tool_async(query)
+                hit = result.get("source") == "research_store"
+            else:
+                result = await asyncio.to_thread(store.lookup, query, web_agent.SEARCH_LIMIT)
+                hit = result["fresh"]
+                if not hit:
+                    calls += 1
+                    result = await web_agent._search_and_remember_async(query, web_agent.SEARCH_LIMIT)
+            seconds = time.perf_counter() - start + calls * llm_latency
+            model_calls += calls
+            if hit:
+                local.append(seconds)
+                correct += subject in result["results"][0]["title"]
+            else:
+                upstream.append(seconds)
+    finally:
+        web_agent.set_search_client(None)
+        web_agent.search_cache = previous_cache
+        scheduler.enabled = scheduler_enabled
+        set_research_store(None)
+
+    metrics = store.metrics()
+    store.close()
+    return {
+        "queries": queries,
+        "topics": topics,
+        "local_hits": len(local),
+        "local_hit_rate": len(local) / queries,
+        "correct_topic_rate": correct / len(local) if local else 0.0,
+        "upstream_calls": fake.calls,
+        "model_calls": model_calls,
+        # Tiempo hasta tener resultados, contando las llamadas al modelo que los piden
+        "hit_latency": percentiles(local),
+        "miss_latency": percentiles(upstream),
+        "mean_query_ms": sum(local + upstream) / queries * 1000,
+        "store": metrics,
+    }
+
+
+def bench_compaction(documents: int, max_mb: float, db_path: str) -> Dict[str, Any]:
+    from ..sub_agents.web_searcher_agent.research_store import ResearchStore
+
+    rng = random.Random(5)
+    words = [word for subject in SUBJECTS for word in subject.split()]
+    store = ResearchStore(db_path, max_bytes=int(max_mb * 1024 * 1024))
+    start = time.perf_counter()
+    for i in range(0, documents, 5):
+        store.add_search(f"query {i}", [
+            {"url": f"https://example.com/{i}/{j}", "title": f"Result {i}.{j}", "description": " ".join(rng.choices(words, k=80))}
+            for j in range(5)
+        ])
+    ingest_seconds = time.perf_counter() - start
+    metrics = store.metrics()
+    store.close()
+    return {
+        "documents_ingested": documents,
+        "ingest_ms_per_document": ingest_seconds / documents * 1000,
+        "db_file_mb": os.path.getsize(db_path) / (1024 * 1024),
+        "store": metrics,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local research store hits vs upstream search")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=40, help="distinct topics the queries are drawn from")
+    parser.add_argument("--upstream-latency", type=float, default=0.5, help="seconds per fake Firecrawl search")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds added per model call that requests a tool")
+    parser.add_argument("--documents", type=int, default=5000, help="documents ingested in the compaction run")
+    parser.add_argument("--max-mb", type=float, default=2.0, help="store size limit in the compaction run")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="auto-research-") as root:
+        results = {
+            "lookup": {
+                mode: asyncio.run(bench_lookup(
+                    args.queries, args.topics, args.upstream_latency, args.llm_latency,
+                    os.path.join(root, f"lookup-{mode}.sqlite"), mode,
+                ))
+                for mode in ("transparent", "lookup_tool")
+            },
+            "compaction": bench_compaction(args.documents, args.max_mb, os.path.join(root, "compaction.sqlite")),
+        }
+    write_results("research_store", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
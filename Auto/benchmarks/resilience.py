@@ -0,0 +1,124 @@
+"""
+Benchmark de la capa de resiliencia entre proveedores (Auto/resilience.py).
+
+    python -m Auto.benchmarks.resilience [--calls 200] [--concurrency 8] [--output resilience.json]
+
+Usa dos proveedores falsos (FakeLlm con inyección de latencia y errores):
+- tail: el primario tarda --slow-latency en una fracción --slow-rate de las llamadas;
+  compara la latencia sin resiliencia, con failover y con hedging
+- outage: el primario falla siempre durante la primera mitad y se recupera después;
+  mide errores vistos por el agente, failovers, aperturas del breaker y pruebas half-open
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+
+def _request():
+    from google.genai import types
+    from google.adk.models.llm_request import LlmRequest
+
+    return LlmRequest(
+        model="fakea/primary",
+        contents=[types.Content(role="user", parts=[types.Part(text="hello")])],
+    )
+
+
+async def _drive(llm, calls: int, concurrency: int, on_call=None) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = 0
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            if on_call is not None:
+                on_call(index)
+            start = time.perf_counter()
+            try:
+                async for _ in llm.generate_content_async(_request()):
+                    pass
+                samples.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one(index) for index in range(calls)))
+    return {"latency": percentiles(samples), "errors": errors}
+
+
+async def bench(calls: int, concurrency: int, latency: float, slow_rate: float, slow_latency: float) -> Dict[str, Any]:
+    import random
+    from ..resilience import ResilientLlm, provider_health
+    from ..testing.fakes import FakeLlm
+
+    random.seed(7)
+    results: Dict[str, Any] = {}
+
+    def providers(**primary_faults):
+        primary = FakeLlm(model="fakea/primary", latency=latency, **primary_faults)
+        backup = FakeLlm(model="fakeb/backup", latency=latency * 1.5)
+        return primary, backup
+
+    # --- Cola de latencia ---
+    tail = {"slow_rate": slow_rate, "slow_latency": slow_latency}
+    primary, _ = providers(**tail)
+    results["tail_no_resilience"] = await _drive(primary, calls, concurrency)
+    for name, hedge in (("tail_failover_only", False), ("tail_hedged", True)):
+        provider_health.reset()
+        primary, backup = providers(**tail)
+        llm = ResilientLlm(model=primary.model, primary=primary, alternates=[backup], timeout=30, hedge=hedge)
+        # Calentar el p95 del primario antes de medir
+        await _drive(llm, 40, concurrency)
+        provider_health.stats.update(calls=0, hedges=0, hedge_wins=0, failovers=0)
+        results[name] = {
+            **await _drive(llm, calls, concurrency),
+            "backup_calls": backup.calls,
+            "health": provider_health.metrics(),
+        }
+
+    # --- Caída del proveedor primario ---
+    primary, _ = providers(error_rate=1.0)
+    results["outage_no_resilience"] = await _drive(primary, calls, concurrency)
+
+    provider_health.reset()
+    provider_health.reset_timeout = max(0.2, latency * 5)
+    primary, backup = providers(error_rate=1.0)
+    llm = ResilientLlm(model=primary.model, primary=primary, alternates=[backup], timeout=30, hedge=False)
+
+    def recover(index: int) -> None:
+        if index == calls // 2:
+            primary.error_rate = 0.0
+
+    start = time.perf_counter()
+    outage = await _drive(llm, calls, concurrency, on_call=recover)
+    results["outage_with_breaker"] = {
+        **outage,
+        "seconds": time.perf_counter() - start,
+        "primary_calls": primary.calls,
+        "primary_errors": primary.errors,
+        "backup_calls": backup.calls,
+        "health": provider_health.metrics(),
+    }
+    provider_health.reset()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests, failover and circuit breakers")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="normal fake provider latency")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="fraction of slow primary calls")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="latency of slow primary calls")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(bench(args.calls, args.concurrency, args.latency, args.slow_rate, args.slow_latency))
+    write_results("resilience", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark del planificador por API key (Auto/scheduler.py).
+
+    python -m Auto.benchmarks.scheduler [--calls 60] [--quota 20] [--output scheduler.json]
+
+- pacing: una ráfaga de --calls llamadas a un proveedor falso que devuelve 429 si recibe más de
+  --quota llamadas por segundo; compara 429, reintentos y duración sin planificador y con él
+- priority: la cola está llena de trabajo de fondo cuando llegan llamadas interactivas;
+  compara la espera de unas y otras
+- backpressure: una ráfaga mayor que AUTO_SCHED_MAX_QUEUE; cuenta rechazos y profundidad máxima
+"""
+import time
+import asyncio
+import argparse
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class QuotaProvider:
+    """Proveedor falso con cuota de `quota` llamadas por ventana de `window` segundos."""
+
+    def __init__(self, quota: int, window: float = 1.0, latency: float = 0.05):
+        self.quota = quota
+        self.window = window
+        self.latency = latency
+        self.calls = 0
+        self.rejected = 0
+        self._recent: deque = deque()
+
+    async def stream(self):
+        from google.genai import types
+        from google.adk.models.llm_response import LlmResponse
+
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+        if len(self._recent) >= self.quota:
+            self.rejected += 1
+            raise RateLimitError("quota exceeded")
+        self._recent.append(now)
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+async def pacing(calls: int, quota: int, enabled: bool) -> Dict[str, Any]:
+    from ..models import ModelRegistry
+    from ..scheduler import scheduler
+
+    provider = QuotaProvider(quota)
+    registry = ModelRegistry(max_concurrency=calls, max_retries=5, backoff_base=0.5)
+    scheduler.enabled = enabled
+    # Ritmo algo por debajo de la cuota; ráfaga + ritmo de un segundo no superan la ventana del proveedor
+    scheduler.configure("FAKE_API_KEY", rate=quota * 0.5, burst=quota * 0.5, max_concurrency=calls)
+    samples: List[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            async for _ in registry.run("fake/quota", provider.stream):
+                pass
+            samples.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    stats = registry.metrics()["models"]["fake/quota"]
+    return {
+        "seconds": time.perf_counter() - start,
+        "errors": errors,
+        "provider_429": provider.rejected,
+        "retries": stats["retries"],
+        "latency": percentiles(samples),
+        "scheduler": scheduler.limiter("FAKE_API_KEY").metrics() if enabled else None,
+    }
+
+
+async def priority(background: int, interactive: int) -> Dict[str, Any]:
+    from ..scheduler import scheduler, BACKGROUND, INTERACTIVE
+
+    scheduler.enabled = True
+    limiter = scheduler.configure("PRIORITY_API_KEY", rate=50.0, burst=1.0, max_concurrency=2, max_queue=1000)
+    waits: Dict[int, List[float]] = {BACKGROUND: [], INTERACTIVE: []}
+
+    async def one(level: int) -> None:
+        waited = await limiter.acquire(level)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            limiter.release()
+        waits[level].append(waited)
+
+    jobs = [asyncio.create_task(one(BACKGROUND)) for _ in range(background)]
+    # Las interactivas llegan cuando la cola de fondo ya está formada
+    await asyncio.sleep(0.05)
+    jobs += [asyncio.create_task(one(INTERACTIVE)) for _ in range(interactive)]
+    await asyncio.gather(*jobs)
+    return {
+        "interactive_wait": percentiles(waits[INTERACTIVE]),
+        "background_wait": percentiles(waits[BACKGROUND]),
+        "scheduler": limiter.metrics(),
+    }
+
+
+async def backpressure(calls: int, max_queue: int) -> Dict[str, Any]:
+    from ..scheduler import scheduler, SchedulerBusy
+
+    scheduler.enabled = True
+    scheduler.configure("BUSY_API_KEY", rate=20.0, burst=1.0, max_concurrency=1, max_queue=max_queue, max_wait=5)
+    completed = rejected = 0
+
+    async def one() -> None:
+        nonlocal completed, rejected
+        try:
+            async with scheduler.slot("BUSY_API_KEY"):
+                await asyncio.sleep(0.01)
+            completed += 1
+        except SchedulerBusy:
+            rejected += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return {
+        "seconds": time.perf_counter() - start,
+        "completed": completed,
+        "rejected": rejected,
+        "scheduler": scheduler.limiter("BUSY_API_KEY").metrics(),
+    }
+
+
+async def bench(calls: int, quota: int) -> Dict[str, Any]:
+    from ..scheduler import scheduler
+
+    enabled = scheduler.enabled
+    try:
+        return {
+            "pacing_no_scheduler": await pacing(calls, quota, enabled=False),
+            "pacing_scheduler": await pacing(calls, quota, enabled=True),
+            "priority": await priority(background=calls, interactive=max(1, calls // 10)),
+            "backpressure": await backpressure(calls, max_queue=calls // 3),
+        }
+    finally:
+        scheduler.enabled = enabled
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-API-key admission control")
+    parser.add_argument("--calls", type=int, default=60, help="calls per burst")
+    parser.add_argument("--quota", type=int, default=20, help="fake provider calls per second before 429")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(bench(args.calls, args.quota))
+    write_results("scheduler", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
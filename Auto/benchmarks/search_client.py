@@ -0,0 +1,116 @@
+"""
+Benchmark del cliente async de Firecrawl (web_searcher_agent/client.py) contra un stub local.
+
+    python -m Auto.benchmarks.search_client [--searches 20] [--latency 0.1] [--output search_client.json]
+
+Arranca el servidor de fixtures (que responde POST /v1/search como Firecrawl), apunta
+FIRECRAWL_API_URL a él y compara:
+- per_call_client: un cliente httpx nuevo por búsqueda (lo que hacía FirecrawlApp), concurrentes
+- pooled_sequential: get_async_client().search una a una
+- pooled_concurrent: get_async_client().search todas a la vez (pool compartido y límite de concurrencia)
+- tool_concurrent: web_search_tool_async, con el planificador y sin cache ni almacén de investigación
+
+Para cada modo informa de la latencia por búsqueda, el tiempo total, las conexiones TCP que
+abrió el servidor y el mayor retraso del event loop mientras había búsquedas en vuelo.
+"""
+import os
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from .common import percentiles, write_results
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Mayor retraso (s) de un temporizador de `interval` hasta que se activa `stop`."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _measure(server, searches: int, concurrent: bool, search: Callable[[str], Awaitable[Any]]) -> Dict[str, Any]:
+    samples: List[float] = []
+
+    async def one(index: int) -> None:
+        started = time.perf_counter()
+        await search(f"benchmark query {index}")
+        samples.append(time.perf_counter() - started)
+
+    connections = server.connections
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    started = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(one(index) for index in range(searches)))
+    else:
+        for index in range(searches):
+            await one(index)
+    total = time.perf_counter() - started
+    stop.set()
+    return {
+        "per_search": percentiles(samples),
+        "total_seconds": total,
+        "connections_opened": server.connections - connections,
+        "max_loop_lag_ms": await lag * 1000,
+    }
+
+
+async def run(searches: int, latency: float) -> Dict[str, Any]:
+    import httpx
+    from ..testing.fixture_server import serve_fixture_pages
+
+    results: Dict[str, Any] = {}
+    with serve_fixture_pages(latency=latency, slow_paths={}) as server:
+        # El cliente lee FIRECRAWL_API_URL al importarse
+        os.environ["FIRECRAWL_API_URL"] = server.base_url
+        from ..sub_agents.web_searcher_agent import client as search_client
+        from ..sub_agents.web_searcher_agent import agent as web_agent
+
+        async def per_call(query: str) -> None:
+            async with httpx.AsyncClient(base_url=server.base_url) as http:
+                response = await http.post("/v1/search", json={"query": query, "limit": web_agent.SEARCH_LIMIT})
+                response.raise_for_status()
+
+        async def pooled(query: str) -> None:
+            data = await search_client.get_async_client().search(query, limit=web_agent.SEARCH_LIMIT)
+            if not data:
+                raise RuntimeError("stub search returned no results")
+
+        async def tool(query: str) -> None:
+            result = await web_agent.web_search_tool_async(query)
+            if not result.get("success"):
+                raise RuntimeError(f"web_search_tool failed: {result}")
+
+        results["per_call_client"] = await _measure(server, searches, True, per_call)
+        results["pooled_sequential"] = await _measure(server, searches, False, pooled)
+        results["pooled_concurrent"] = await _measure(server, searches, True, pooled)
+        results["tool_concurrent"] = await _measure(server, searches, True, tool)
+        results["client_stats"] = dict(search_client.get_async_client().stats)
+        results["http_requests"] = server.requests
+        await search_client.close_async_clients()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pooled async Firecrawl client against a local stub server")
+    parser.add_argument("--searches", type=int, default=20, help="searches per mode")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per stub HTTP request")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    # Solo se mide el cliente: sin cache de resultados, almacén de investigación ni cuotas
+    os.environ.setdefault("FIRECRAWL_API_KEY", "offline")
+    os.environ.setdefault("AUTO_SEARCH_CACHE", "0")
+    os.environ.setdefault("AUTO_RESEARCH_STORE", "0")
+    os.environ.setdefault("AUTO_SCHED_RATES", "")
+    results = asyncio.run(run(args.searches, args.latency))
+    write_results("search_client", {"searches": args.searches, "latency": args.latency, **results}, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark del cache semántico (Auto/semantic_cache.py).
+
+    python -m Auto.benchmarks.semantic_cache [--rounds 3] [--llm-latency 0.3] [--output semantic.json]
+
+Envía a un agente con FakeLlm grupos de paráfrasis (deberían acertar entre sí) y preguntas
+parecidas pero distintas (no deberían acertar), y mide tasa de aciertos, aciertos correctos
+frente a falsos según los grupos, latencia de búsqueda y latencia por turno con y sin cache.
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+# Cada grupo son paráfrasis de la misma pregunta
+PARAPHRASE_GROUPS: List[List[str]] = [
+    ["What's the weather like in Paris?", "what is the weather like in paris", "What's the weather like in Paris today?"],
+    ["What's the weather like in Rome?", "What is the weather like in Rome?"],
+    ["How do I reset my password?", "how do i reset my password", "How can I reset my password?"],
+    ["What are your opening hours?", "what are your opening hours?", "What are the opening hours?"],
+    ["Convert 10 miles to kilometers", "convert 10 miles to km", "Convert 10 miles into kilometers"],
+    ["Convert 20 miles to kilometers"],
+    ["Tell me a joke about cats", "tell me a joke about cats!", "Tell me a cat joke"],
+    ["Tell me a joke about dogs"],
+    ["Who wrote Don Quixote?", "who wrote don quixote", "Who is the author of Don Quixote?"],
+    ["¿Qué hora es en Madrid?", "que hora es en madrid", "¿Qué hora es ahora en Madrid?"],
+]
+
+
+def _answer_script(llm_request):
+    from google.genai import types
+    from google.adk.models.llm_response import LlmResponse
+
+    prompt = llm_request.contents[-1].parts[0].text
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"Answer for group of: {prompt}")]))
+
+
+async def run(rounds: int, llm_latency: float, cache=None) -> Dict[str, Any]:
+    from google.genai import types
+    from google.adk.agents import Agent
+    from google.adk.runners import InMemoryRunner
+    from ..testing.fakes import FakeLlm
+
+    fake = FakeLlm(model="fake/conversational", latency=llm_latency, script=_answer_script)
+    agent = Agent(name="conversational_agent", model=fake, instruction="Answer briefly.")
+    if cache is not None:
+        cache.attach(agent)
+    runner = InMemoryRunner(agent=agent, app_name="semantic_bench")
+
+    group_of = {prompt: index for index, group in enumerate(PARAPHRASE_GROUPS) for prompt in group}
+    prompts = [prompt for _ in range(rounds) for group in PARAPHRASE_GROUPS for prompt in group]
+    samples: List[float] = []
+    correct_hits = false_hits = hits = 0
+    for prompt in prompts:
+        # Sesión nueva por petición, como una delegación vía AgentTool
+        session = await runner.session_service.create_session(app_name="semantic_bench", user_id="bench")
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        start = time.perf_counter()
+        answer, cached = "", False
+        async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            if event.content and event.content.parts and event.content.parts[0].text:
+                answer = event.content.parts[0].text
+                cached = bool(event.custom_metadata and "semantic_cache" in event.custom_metadata)
+        samples.append(time.perf_counter() - start)
+        if cached:
+            hits += 1
+            source = answer[len("Answer for group of: "):]
+            if group_of.get(source) == group_of[prompt]:
+                correct_hits += 1
+            else:
+                false_hits += 1
+
+    return {
+        "requests": len(prompts),
+        "model_calls": fake.calls,
+        "hits": hits,
+        "correct_hits": correct_hits,
+        "false_hits": false_hits,
+        "latency": percentiles(samples),
+        "cache": cache.metrics() if cache is not None else None,
+    }
+
+
+async def bench(rounds: int, llm_latency: float, threshold: float) -> Dict[str, Any]:
+    from ..semantic_cache import SemanticCache
+
+    baseline = await run(rounds, llm_latency)
+    cached = await run(rounds, llm_latency, SemanticCache(["conversational_agent"], threshold=threshold, audit_rate=0.0))
+    audited = await run(rounds, llm_latency, SemanticCache(["conversational_agent"], threshold=threshold, audit_rate=1.0))
+    return {
+        "rounds": rounds,
+        "threshold": threshold,
+        "no_cache": baseline,
+        "cache": cached,
+        "cache_audit_all_hits": audited,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the semantic response cache")
+    parser.add_argument("--rounds", type=int, default=3, help="times each paraphrase group is sent")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per fake LLM call")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(bench(args.rounds, args.llm_latency, args.threshold))
+    write_results("semantic_cache", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark del pipeline TTS por fragmentos (speaker_agent/pipeline.py) con un backend falso.
+
+    python -m Auto.benchmarks.tts [--chars 4000] [--runs 5] [--concurrency 1,3,6] [--output tts.json]
+
+Sintetiza un texto largo con FakeTtsBackend (latencia fija por llamada más una por carácter):
+- whole_text: una sola llamada con todo el texto, como hacía text_to_speech (el primer audio
+  llega cuando termina todo)
+- pipeline_c<N>: TtsPipeline con N fragmentos en paralelo
+
+Para cada modo informa del tiempo hasta el primer audio, el tiempo total (con la unión de los
+fragmentos) y la duración de cada fragmento.
+"""
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional
+
+from .common import percentiles, write_results
+
+SENTENCES = [
+    "The benchmark reads a long article aloud, one sentence after another.",
+    "Each chunk is synthesized as soon as a worker is free, and delivered in order.",
+    "Listeners should hear the first words long before the whole text is ready!",
+    "Short clauses, long clauses; commas and semicolons all count as natural pauses.",
+    "Is the stitched file identical to the chunks played back to back?",
+]
+
+
+def make_text(chars: int) -> str:
+    text = []
+    length = 0
+    while length < chars:
+        sentence = SENTENCES[len(text) % len(SENTENCES)]
+        text.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(text)
+
+
+async def bench_whole_text(text: str, runs: int, seconds_per_char: float, base_latency: float, output_dir: str) -> Dict[str, Any]:
+    from ..testing.fakes import FakeTtsBackend
+
+    backend = FakeTtsBackend(seconds_per_char, base_latency, output_dir)
+    samples: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await backend(text)
+        samples.append(time.perf_counter() - started)
+    return {"chunks": 1, "time_to_first_audio": percentiles(samples), "total": percentiles(samples)}
+
+
+async def bench_pipeline(text: str, runs: int, concurrency: int, seconds_per_char: float, base_latency: float, output_dir: str) -> Dict[str, Any]:
+    from ..testing.fakes import FakeTtsBackend
+    from ..sub_agents.speaker_agent.pipeline import TtsPipeline
+
+    backend = FakeTtsBackend(seconds_per_char, base_latency, output_dir)
+    pipeline = TtsPipeline(backend, max_concurrency=concurrency, output_dir=output_dir)
+    first: List[float] = []
+    total: List[float] = []
+    chunk_seconds: List[float] = []
+    for _ in range(runs):
+        result = await pipeline.run(text)
+        first.append(result["time_to_first_audio"])
+        total.append(result["total_time"])
+        chunk_seconds.extend(result["chunk_seconds"])
+    return {
+        "chunks": result["chunks"],
+        "backend_calls": len(backend.calls),
+        "time_to_first_audio": percentiles(first),
+        "total": percentiles(total),
+        "per_chunk": percentiles(chunk_seconds),
+    }
+
+
+async def run(chars: int, runs: int, concurrency: List[int], seconds_per_char: float, base_latency: float) -> Dict[str, Any]:
+    text = make_text(chars)
+    with tempfile.TemporaryDirectory(prefix="auto-tts-bench-") as output_dir:
+        results: Dict[str, Any] = {
+            "text_chars": len(text),
+            "whole_text": await bench_whole_text(text, runs, seconds_per_char, base_latency, output_dir),
+        }
+        for workers in concurrency:
+            results[f"pipeline_c{workers}"] = await bench_pipeline(
+                text, runs, workers, seconds_per_char, base_latency, output_dir
+            )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Chunked TTS pipeline: time to first audio and per-chunk timings")
+    parser.add_argument("--chars", type=int, default=4000, help="length of the synthesized text")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", default="1,3,6", help="comma-separated pipeline concurrency levels")
+    parser.add_argument("--seconds-per-char", type=float, default=0.0005, help="fake backend latency per character")
+    parser.add_argument("--base-latency", type=float, default=0.05, help="fake backend latency per call")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    concurrency = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    results = asyncio.run(run(args.chars, args.runs, concurrency, args.seconds_per_char, args.base_latency))
+    write_results("tts", {
+        "seconds_per_char": args.seconds_per_char,
+        "base_latency": args.base_latency,
+        **results,
+    }, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""
+Helpers para combinar callbacks de ADK en los agentes.
+
+Los campos *_callback de un Agent aceptan una función o una lista. add_callbacks() añade
+callbacks sin pisar los que ya tenga el agente (router, cache de audio, límites de
+resultados...). En las listas de ADK el primer callback que devuelve un valor corta la
+cadena, así que el orden importa: `first=True` los pone delante.
+"""
+from typing import Any, Callable, List, Optional
+
+from google.adk.tools.agent_tool import AgentTool
+
+
+def as_list(callback: Any) -> List[Callable]:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def add_callbacks(agent: Any, first: bool = False, **callbacks: Optional[Callable]) -> None:
+    """Añade callbacks (p.ej. before_model_callback=f) a `agent`, una sola vez cada uno."""
+    for field, callback in callbacks.items():
+        if callback is None or field not in type(agent).model_fields:
+            # Campos que no existen en esta versión de ADK (p.ej. on_tool_error_callback)
+            continue
+        existing = as_list(getattr(agent, field))
+        if callback in existing:
+            continue
+        setattr(agent, field, [callback] + existing if first else existing + [callback])
+
+
+def walk_agents(root: Any) -> List[Any]:
+    """El agente raíz y todos los agentes alcanzables por sub_agents o AgentTool."""
+    found: List[Any] = []
+    pending = [root]
+    while pending:
+        agent = pending.pop()
+        if any(agent is seen for seen in found):
+            continue
+        found.append(agent)
+        pending.extend(agent.sub_agents)
+        pending.extend(tool.agent for tool in getattr(agent, "tools", []) if isinstance(tool, AgentTool))
+    return found
+
+
+class _LazyAttach:
+    """Hook de agent_ready_hooks que aplica `attach` al árbol de un agente lazy recién creado."""
+
+    def __init__(self, attach: Callable[[Any], None]):
+        self.attach = attach
+
+    def __call__(self, agent: Any) -> None:
+        attach_including_lazy(agent, self.attach)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _LazyAttach) and other.attach == self.attach
+
+    def __hash__(self) -> int:
+        return hash(self.attach)
+
+
+def attach_including_lazy(root: Any, attach: Callable[[Any], None]) -> None:
+    """Llama a attach(agent) con cada agente de walk_agents(root), incluidos los lazy.
+
+    Los agentes de un LazyAgentTool se crean en su primera delegación; para ellos se registra
+    (una sola vez por `attach`) un hook en async_agents.agent_ready_hooks.
+    """
+    from .async_agents import LazyAgentTool, agent_ready_hooks
+
+    hook = _LazyAttach(attach)
+    for agent in walk_agents(root):
+        attach(agent)
+        if any(isinstance(tool, LazyAgentTool) for tool in getattr(agent, "tools", [])):
+            if hook not in agent_ready_hooks:
+                agent_ready_hooks.append(hook)
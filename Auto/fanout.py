@@ -0,0 +1,259 @@
+"""
+Delegación en paralelo (fan-out) para peticiones compuestas.
+
+El LLM raíz planifica una petición como "busca X e Y y luego léeme el resumen" en una sola
+llamada a `delegate_in_parallel`, con un grafo de dependencias entre sub-tareas:
+
+    [{"id": "x", "agent": "web_searcher_agent", "request": "search X"},
+     {"id": "y", "agent": "web_searcher_agent", "request": "search Y"},
+     {"id": "tts", "agent": "speaker_agent", "request": "read the summary aloud", "depends_on": ["x", "y"]}]
+
+Las ramas independientes se ejecutan a la vez en el event loop (como mucho
+AUTO_FANOUT_MAX_CONCURRENCY delegaciones simultáneas) y cada tarea recibe los resultados de
+sus dependencias como contexto. El tiempo total es el de la rama más larga, no la suma.
+Los resultados se devuelven juntos al final; si una tarea falla, las que dependen de ella
+se omiten y el resto sigue.
+
+Se desactiva con AUTO_FANOUT=0.
+"""
+import os
+import time
+import asyncio
+from typing import Dict, Any, Optional, List, Iterable
+
+from google.genai import types
+from google.adk.tools.base_tool import BaseTool
+
+FANOUT_ENABLED = os.getenv("AUTO_FANOUT", "1").lower() not in ("0", "false", "no", "off")
+MAX_CONCURRENCY = int(os.getenv("AUTO_FANOUT_MAX_CONCURRENCY", "4"))
+MAX_TASKS = int(os.getenv("AUTO_FANOUT_MAX_TASKS", "8"))
+TASK_TIMEOUT = float(os.getenv("AUTO_FANOUT_TASK_TIMEOUT", "120"))
+# Caracteres de cada resultado previo que se pasan como contexto a las tareas dependientes
+CONTEXT_CHARS = int(os.getenv("AUTO_FANOUT_CONTEXT_CHARS", "4000"))
+
+FANOUT_INSTRUCTION = """
+    PARALLEL DELEGATION:
+    - When a request has several parts (e.g. "search X and Y", "search A and list the files in B",
+      "search X, then read the summary aloud"), call delegate_in_parallel ONCE with one task per part
+      instead of calling the agents one by one.
+    - Independent tasks run at the same time. If a task needs the result of another one
+      (e.g. reading aloud what was found), list that task's id in depends_on; it will receive
+      those results as context.
+    - For a single-part request, delegate to the agent directly.
+"""
+
+
+class PlanError(ValueError):
+    """El plan de tareas no es válido (agente desconocido, dependencia inexistente, ciclo...)."""
+
+
+def parse_plan(tasks: Any, available: Iterable[str], max_tasks: int = MAX_TASKS) -> List[Dict[str, Any]]:
+    """Valida y normaliza el plan; devuelve las tareas en orden topológico."""
+    available = set(available)
+    if not isinstance(tasks, list) or not tasks:
+        raise PlanError("tasks must be a non-empty list")
+    if len(tasks) > max_tasks:
+        raise PlanError(f"too many tasks ({len(tasks)}); the limit is {max_tasks}")
+
+    plan: Dict[str, Dict[str, Any]] = {}
+    for index, task in enumerate(tasks):
+        if not isinstance(task, dict):
+            raise PlanError(f"task {index} must be an object")
+        task_id = str(task.get("id") or f"task{index + 1}")
+        agent = task.get("agent")
+        request = task.get("request")
+        depends_on = task.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        if task_id in plan:
+            raise PlanError(f"duplicate task id: {task_id}")
+        if agent not in available:
+            raise PlanError(f"unknown agent for task {task_id}: {agent!r} (available: {', '.join(sorted(available))})")
+        if not isinstance(request, str) or not request.strip():
+            raise PlanError(f"task {task_id} needs a request")
+        plan[task_id] = {"id": task_id, "agent": agent, "request": request, "depends_on": [str(dep) for dep in depends_on]}
+
+    for task in plan.values():
+        for dep in task["depends_on"]:
+            if dep not in plan:
+                raise PlanError(f"task {task['id']} depends on unknown task {dep}")
+            if dep == task["id"]:
+                raise PlanError(f"task {task['id']} depends on itself")
+
+    # Orden topológico (Kahn): si quedan tareas sin ordenar hay un ciclo
+    pending = {task_id: set(task["depends_on"]) for task_id, task in plan.items()}
+    ordered: List[Dict[str, Any]] = []
+    while pending:
+        ready = [task_id for task_id, deps in pending.items() if not deps]
+        if not ready:
+            raise PlanError(f"dependency cycle between tasks: {', '.join(sorted(pending))}")
+        for task_id in ready:
+            ordered.append(plan[task_id])
+            del pending[task_id]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return ordered
+
+
+def _result_text(result: Any) -> str:
+    return result if isinstance(result, str) else str(result)
+
+
+def _with_context(task: Dict[str, Any], outcomes: Dict[str, Dict[str, Any]]) -> str:
+    """Añade a la petición los resultados de sus dependencias."""
+    if not task["depends_on"]:
+        return task["request"]
+    context = "\n\n".join(
+        f"[{dep} - {outcomes[dep]['agent']}]\n{_result_text(outcomes[dep]['result'])[:CONTEXT_CHARS]}"
+        for dep in task["depends_on"]
+    )
+    return f"{task['request']}\n\nRESULTS FROM PREVIOUS STEPS:\n{context}"
+
+
+class FanoutExecutor:
+    """Ejecuta un plan de delegaciones con las ramas independientes en paralelo."""
+
+    def __init__(
+        self,
+        agent_tools: Iterable[BaseTool],
+        max_concurrency: int = MAX_CONCURRENCY,
+        task_timeout: float = TASK_TIMEOUT,
+    ):
+        self.tools: Dict[str, BaseTool] = {tool.name: tool for tool in agent_tools}
+        self.max_concurrency = max(1, max_concurrency)
+        self.task_timeout = task_timeout
+        self.stats = {
+            "plans": 0,
+            "invalid_plans": 0,
+            "tasks": 0,
+            "failed": 0,
+            "skipped": 0,
+            "wall_seconds": 0.0,
+            "branch_seconds": 0.0,
+        }
+
+    async def _run_task(self, task: Dict[str, Any], request: str, tool_context) -> Any:
+        tool = self.tools[task["agent"]]
+        return await asyncio.wait_for(
+            tool.run_async(args={"request": request}, tool_context=tool_context),
+            timeout=self.task_timeout,
+        )
+
+    async def execute(self, tasks: Any, tool_context) -> Dict[str, Any]:
+        """Ejecuta el plan y devuelve los resultados de todas las tareas (en orden topológico)."""
+        try:
+            plan = parse_plan(tasks, self.tools)
+        except PlanError as e:
+            self.stats["invalid_plans"] += 1
+            return {"status": "error", "message": f"Invalid plan: {e}"}
+
+        self.stats["plans"] += 1
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        runners: Dict[str, asyncio.Task] = {}
+
+        async def run(task: Dict[str, Any]) -> None:
+            if task["depends_on"]:
+                await asyncio.gather(*(runners[dep] for dep in task["depends_on"]))
+            outcome: Dict[str, Any] = {"id": task["id"], "agent": task["agent"]}
+            outcomes[task["id"]] = outcome
+            failed = [dep for dep in task["depends_on"] if outcomes[dep]["status"] != "success"]
+            if failed:
+                outcome.update(status="skipped", error=f"depends on failed task(s): {', '.join(failed)}")
+                self.stats["skipped"] += 1
+                return
+
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    outcome["result"] = await self._run_task(task, _with_context(task, outcomes), tool_context)
+                    outcome["status"] = "success"
+                except asyncio.TimeoutError:
+                    outcome.update(status="error", error=f"timed out after {self.task_timeout:.0f}s")
+                except Exception as e:
+                    outcome.update(status="error", error=str(e))
+                outcome["seconds"] = round(time.perf_counter() - start, 3)
+            self.stats["tasks"] += 1
+            self.stats["branch_seconds"] += outcome["seconds"]
+            if outcome["status"] != "success":
+                self.stats["failed"] += 1
+
+        start = time.perf_counter()
+        # El plan está en orden topológico: las dependencias ya tienen su tarea creada
+        for task in plan:
+            runners[task["id"]] = asyncio.ensure_future(run(task))
+        await asyncio.gather(*runners.values())
+        wall_seconds = time.perf_counter() - start
+        self.stats["wall_seconds"] += wall_seconds
+
+        results = [outcomes[task["id"]] for task in plan]
+        succeeded = sum(1 for outcome in results if outcome["status"] == "success")
+        return {
+            "status": "success" if succeeded == len(results) else ("partial" if succeeded else "error"),
+            "results": results,
+            "wall_seconds": round(wall_seconds, 3),
+            "sequential_seconds": round(sum(outcome.get("seconds", 0.0) for outcome in results), 3),
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        wall, branch = self.stats["wall_seconds"], self.stats["branch_seconds"]
+        return {**self.stats, "parallel_speedup": (branch / wall) if wall else None}
+
+
+class DelegateInParallelTool(BaseTool):
+    """Herramienta del agente raíz que ejecuta un plan de delegaciones con FanoutExecutor."""
+
+    def __init__(self, executor: FanoutExecutor):
+        super().__init__(
+            name="delegate_in_parallel",
+            description=(
+                "Delegate a multi-part request to several specialist agents at once. "
+                "Independent tasks run concurrently; a task listed in another task's depends_on "
+                "runs after it and receives its result as context. Returns every task's result."
+            ),
+        )
+        self.executor = executor
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "tasks": types.Schema(
+                        type=types.Type.ARRAY,
+                        description="One entry per sub-task of the user's request.",
+                        items=types.Schema(
+                            type=types.Type.OBJECT,
+                            properties={
+                                "id": types.Schema(type=types.Type.STRING, description="Short unique id, e.g. 'search_x'."),
+                                "agent": types.Schema(
+                                    type=types.Type.STRING,
+                                    enum=sorted(self.executor.tools),
+                                    description="Agent that handles this sub-task.",
+                                ),
+                                "request": types.Schema(type=types.Type.STRING, description="What the agent must do."),
+                                "depends_on": types.Schema(
+                                    type=types.Type.ARRAY,
+                                    items=types.Schema(type=types.Type.STRING),
+                                    description="Ids of tasks whose results this task needs (empty if independent).",
+                                ),
+                            },
+                            required=["id", "agent", "request"],
+                        ),
+                    ),
+                },
+                required=["tasks"],
+            ),
+        )
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context) -> Any:
+        return await self.executor.execute(args.get("tasks"), tool_context)
+
+
+def create_fanout_tool_from_env(agent_tools: Iterable[BaseTool]) -> Optional[DelegateInParallelTool]:
+    """Crea la herramienta de delegación en paralelo según AUTO_FANOUT* (None si está desactivada)."""
+    if not FANOUT_ENABLED:
+        return None
+    return DelegateInParallelTool(FanoutExecutor(agent_tools))
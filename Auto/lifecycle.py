@@ -0,0 +1,416 @@
+"""
+Ciclo de vida de los recursos de larga duración: sesiones MCP (y sus subprocesos), clientes
+HTTP compartidos, watchers de inotify y bases de datos locales.
+
+Cada recurso se registra con la función que lo cierra y el event loop en el que se creó, y se
+cierra en ese mismo loop (las sesiones MCP y los clientes httpx no se pueden cerrar desde otro).
+El gestor adopta como loop de servicio el primer loop en marcha que registra algo (el de
+ADK web) y en él:
+- comprueba periódicamente la salud de los recursos que lo permiten (AUTO_HEALTH_INTERVAL
+  segundos, 0 lo desactiva) y reinicia los que fallan
+- drena todo en shutdown(), con un tiempo máximo (AUTO_SHUTDOWN_TIMEOUT segundos); los
+  subprocesos que sigan vivos al terminar el plazo se matan
+
+Las recargas en caliente de ADK web borran los módulos Auto.* de sys.modules y los vuelven a
+importar: el gestor nuevo encuentra al anterior en un registro fuera del paquete y lo drena,
+de modo que los servidores MCP y los descriptores de la recarga anterior no se acumulan.
+
+Recuentos en vivo de subprocesos, descriptores, hilos y memoria con lifecycle.metrics().
+"""
+import os
+import sys
+import time
+import types
+import signal
+import asyncio
+import inspect
+import threading
+from typing import Dict, Any, Optional, List, Callable, Iterable, Set
+
+SHUTDOWN_TIMEOUT = float(os.getenv("AUTO_SHUTDOWN_TIMEOUT", "10"))
+HEALTH_INTERVAL = float(os.getenv("AUTO_HEALTH_INTERVAL", "30"))
+# Margen entre SIGTERM y SIGKILL para los subprocesos que sobreviven al cierre
+KILL_GRACE = 1.0
+
+# Módulo fuera de Auto.*: sobrevive a las recargas en caliente y guarda el gestor vigente
+_REGISTRY_NAME = "_auto_lifecycle_registry"
+
+Closer = Callable[[], Any]
+
+
+# --- Recuentos del proceso ---
+
+def child_pids() -> Set[int]:
+    """PIDs de los procesos hijos directos vivos (no zombis)."""
+    me = os.getpid()
+    pids = set()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # pid (comm) estado ppid ...: comm puede tener espacios y paréntesis
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if fields[0] != "Z" and int(fields[1]) == me:
+            pids.add(int(entry))
+    return pids
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        pass
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def process_stats() -> Dict[str, Any]:
+    """Subprocesos hijos, descriptores abiertos, hilos y memoria residente del proceso."""
+    stats: Dict[str, Any] = {"children": len(child_pids()), "threads": threading.active_count()}
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            stats["fds"] = len(os.listdir(fd_dir))
+            break
+        except OSError:
+            continue
+    try:
+        with open("/proc/self/statm") as f:
+            stats["rss_mb"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    return stats
+
+
+async def _call(closer: Closer) -> Any:
+    result = closer()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class Resource:
+    """Un recurso registrado: cómo se cierra, en qué loop vive y qué subprocesos lanzó."""
+
+    def __init__(
+        self,
+        name: str,
+        close: Closer,
+        loop: Optional[asyncio.AbstractEventLoop],
+        health_check: Optional[Closer] = None,
+        restart: Optional[Closer] = None,
+        pids: Iterable[int] = (),
+    ):
+        self.name = name
+        self.close = close
+        self.loop = loop
+        self.health_check = health_check
+        self.restart = restart
+        self.pids = set(pids)
+        self.restarts = 0
+
+    def processes_alive(self) -> bool:
+        return all(pid_alive(pid) for pid in self.pids)
+
+
+class LifecycleManager:
+    """Arranca, vigila, reinicia y drena los recursos de larga duración del proceso."""
+
+    def __init__(self, shutdown_timeout: float = SHUTDOWN_TIMEOUT, health_interval: float = HEALTH_INTERVAL):
+        self.shutdown_timeout = shutdown_timeout
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._resources: List[Resource] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._health_task: Optional[asyncio.Task] = None
+        # Tareas de fondo lanzadas en el loop de servicio (arranques, drenado de la recarga anterior)
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            "registered": 0, "closed": 0, "close_errors": 0, "close_timeouts": 0,
+            "health_failures": 0, "restarts": 0, "killed": 0, "shutdowns": 0,
+            "last_shutdown_seconds": None,
+        }
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Loop de servicio adoptado (None si todavía no hay o ya se cerró)."""
+        if self._loop is not None and self._loop.is_closed():
+            self._loop = None
+        return self._loop
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Adopta `loop` (o el loop en marcha) como loop de servicio y arranca los health checks."""
+        loop = loop or _running_loop()
+        if loop is None or loop is self.loop:
+            return
+        self._loop = loop
+        if self.health_interval > 0:
+            self._health_task = self.spawn(self._health_loop(), loop)
+
+    def spawn(self, coro, loop: Optional[asyncio.AbstractEventLoop] = None) -> "asyncio.Future":
+        """Lanza `coro` en el loop de servicio sin bloquear y guarda la referencia de la tarea."""
+        loop = loop or self.loop or _running_loop()
+        if loop is None:
+            raise RuntimeError("no event loop to run lifecycle tasks")
+        if loop is _running_loop():
+            task = loop.create_task(coro)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return task
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    async def wait_idle(self) -> None:
+        """Espera a las tareas de fondo pendientes (p.ej. arranques en curso de servidores MCP)."""
+        current = asyncio.current_task()
+        while True:
+            pending = [task for task in self._tasks if task is not current and task is not self._health_task]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def register(
+        self,
+        name: str,
+        close: Closer,
+        health_check: Optional[Closer] = None,
+        restart: Optional[Closer] = None,
+        pids: Iterable[int] = (),
+    ) -> Resource:
+        """Registra un recurso creado en el loop actual; `close` puede ser síncrona o async."""
+        loop = _running_loop()
+        resource = Resource(name, close, loop, health_check, restart, pids)
+        with self._lock:
+            self._resources.append(resource)
+            self.stats["registered"] += 1
+        if loop is not None and self.loop is None:
+            self.start(loop)
+        return resource
+
+    def register_exit_stack(self, name: str, exit_stack: Any, **kwargs) -> Resource:
+        """Registra el exit stack de una conexión MCP."""
+        return self.register(name, lambda: exit_stack.__aexit__(None, None, None), **kwargs)
+
+    def unregister(self, resource: Resource) -> None:
+        with self._lock:
+            if resource in self._resources:
+                self._resources.remove(resource)
+
+    @property
+    def resources(self) -> List[Resource]:
+        with self._lock:
+            return list(self._resources)
+
+    async def _on_owner(self, resource: Resource, closer: Closer, timeout: Optional[float]) -> Any:
+        """Ejecuta `closer` en el loop del recurso; si ese loop ya no corre, en el actual (None: sin límite)."""
+        owner = resource.loop
+        current = asyncio.get_running_loop()
+        if owner is None or owner is current or owner.is_closed() or not owner.is_running():
+            return await asyncio.wait_for(_call(closer), timeout)
+        future = asyncio.run_coroutine_threadsafe(_call(closer), owner)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise
+
+    async def close(self, resource: Resource, timeout: Optional[float] = None) -> bool:
+        """Cierra y da de baja un recurso; False si falló o no terminó a tiempo."""
+        self.unregister(resource)
+        try:
+            await self._on_owner(resource, resource.close, self.shutdown_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.stats["close_timeouts"] += 1
+            print(f"⚠️ Closing {resource.name} timed out")
+            return False
+        except Exception as e:
+            # Los exit stacks de anyio se quejan al cerrarse fuera de su tarea, pero cierran los pipes
+            self.stats["close_errors"] += 1
+            print(f"⚠️ Error closing {resource.name}: {e}")
+            return False
+        self.stats["closed"] += 1
+        return True
+
+    async def check_health(self) -> Dict[str, bool]:
+        """Comprueba los recursos con health check (o con subprocesos) y reinicia los caídos."""
+        results = {}
+        for resource in self.resources:
+            if resource.health_check is None and not resource.pids:
+                continue
+            try:
+                if resource.health_check is not None:
+                    healthy = bool(await self._on_owner(resource, resource.health_check, self.shutdown_timeout))
+                else:
+                    healthy = resource.processes_alive()
+            except Exception:
+                healthy = False
+            results[resource.name] = healthy
+            if healthy:
+                continue
+            self.stats["health_failures"] += 1
+            print(f"⚠️ {resource.name} failed its health check")
+            if resource.restart is not None:
+                try:
+                    # Sin límite aquí: el reinicio aplica el timeout de arranque de su servidor
+                    await self._on_owner(resource, resource.restart, None)
+                    self.stats["restarts"] += 1
+                    resource.restarts += 1
+                    print(f"🔄 {resource.name} restarted")
+                except Exception as e:
+                    print(f"⚠️ Restarting {resource.name} failed: {e}")
+        return results
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"⚠️ Health check error: {e}")
+
+    async def shutdown(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Drena todos los recursos (en orden inverso de registro) en como mucho `timeout` segundos."""
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        current = asyncio.current_task()
+        for task in list(self._tasks):
+            loop = task.get_loop()
+            if task is current or loop.is_closed():
+                continue
+            if loop is asyncio.get_running_loop():
+                task.cancel()
+            else:
+                loop.call_soon_threadsafe(task.cancel)
+        self._health_task = None
+
+        resources = self.resources
+        pids = set().union(*(resource.pids for resource in resources)) if resources else set()
+        for resource in reversed(resources):
+            await self.close(resource, timeout=max(0.05, deadline - time.monotonic()))
+
+        # Lo que siga vivo después del cierre (o del plazo) se termina a la fuerza
+        survivors = {pid for pid in pids if pid_alive(pid)}
+        if survivors:
+            self._signal(survivors, signal.SIGTERM)
+            grace = min(KILL_GRACE, max(0.0, deadline - time.monotonic()))
+            while survivors and grace > 0:
+                await asyncio.sleep(0.05)
+                grace -= 0.05
+                survivors = {pid for pid in survivors if pid_alive(pid)}
+            self._signal(survivors, signal.SIGKILL)
+            self.stats["killed"] += len(survivors)
+        self._reap(pids)
+
+        self._loop = None
+        self.stats["shutdowns"] += 1
+        self.stats["last_shutdown_seconds"] = time.monotonic() - start
+        return self.metrics()
+
+    def shutdown_sync(self, timeout: Optional[float] = None) -> Optional["asyncio.Future"]:
+        """shutdown() desde código síncrono (atexit, recargas).
+
+        Si se llama desde el hilo de un loop en marcha no se puede bloquear: el drenado se
+        programa en ese loop y se devuelve la tarea.
+        """
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        running = _running_loop()
+        if running is not None:
+            return self.spawn(self.shutdown(timeout), running)
+        serving = self.loop
+        if serving is not None and serving.is_running():
+            # El loop de servicio corre en otro hilo: los recursos se cierran allí
+            future = asyncio.run_coroutine_threadsafe(self.shutdown(timeout), serving)
+            try:
+                future.result(timeout + KILL_GRACE + 1)
+            except Exception as e:
+                print(f"⚠️ Error during shutdown: {e}")
+            return None
+        # Un loop parado pero abierto (run_until_complete en el hilo principal) puede volver a usarse
+        owners = {resource.loop for resource in self.resources if resource.loop is not None}
+        idle = [loop for loop in owners if not loop.is_closed() and not loop.is_running()]
+        try:
+            if len(idle) == 1:
+                idle[0].run_until_complete(self.shutdown(timeout))
+            else:
+                asyncio.run(self.shutdown(timeout))
+        except Exception as e:
+            print(f"⚠️ Error during shutdown: {e}")
+        return None
+
+    @staticmethod
+    def _signal(pids: Iterable[int], sig: int) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _reap(pids: Iterable[int]) -> None:
+        """Recoge los hijos terminados para que no queden zombis."""
+        for pid in pids:
+            try:
+                os.waitpid(pid, os.WNOHANG)
+            except (ChildProcessError, OSError):
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        resources = self.resources
+        return {
+            **self.stats,
+            "resources": len(resources),
+            "resource_names": [resource.name for resource in resources],
+            "tracked_pids": sum(len(resource.pids) for resource in resources),
+            "serving_loop": self.loop is not None,
+            "process": process_stats(),
+        }
+
+
+def _adopt() -> LifecycleManager:
+    """Crea el gestor del proceso y drena el de la importación anterior (recarga en caliente)."""
+    registry = sys.modules.get(_REGISTRY_NAME)
+    if registry is None:
+        registry = types.ModuleType(_REGISTRY_NAME)
+        registry.manager = None
+        sys.modules[_REGISTRY_NAME] = registry
+
+        # Un único atexit por proceso, que cierra siempre el gestor vigente
+        import atexit
+
+        def _shutdown_current():
+            if registry.manager is not None:
+                registry.manager.shutdown_sync()
+
+        atexit.register(_shutdown_current)
+
+    manager = LifecycleManager()
+    previous = registry.manager
+    registry.manager = manager
+    if previous is not None and previous.resources:
+        print(f"♻️ Draining {len(previous.resources)} resource(s) from the previous Auto import")
+        if _running_loop() is not None:
+            # Importado desde el loop de servicio (recarga de ADK web): drenar sin bloquearlo
+            manager.spawn(previous.shutdown())
+        else:
+            previous.shutdown_sync()
+    return manager
+
+
+lifecycle = _adopt()
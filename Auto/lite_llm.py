@@ -0,0 +1,27 @@
+"""
+LiteLlm conectado al ModelRegistry.
+
+Módulo aparte para que importar Auto.models no cargue litellm (lo importa el factory
+por defecto al crear el primer modelo).
+"""
+from typing import AsyncGenerator
+
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from .models import model_registry
+
+
+class PooledLiteLlm(LiteLlm):
+    """LiteLlm cuyas llamadas pasan por el ModelRegistry (concurrencia, backoff y métricas)."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        parent = super()
+        async for llm_response in model_registry.run(
+            self.model,
+            lambda: parent.generate_content_async(llm_request, stream=stream),
+        ):
+            yield llm_response
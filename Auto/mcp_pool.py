@@ -0,0 +1,616 @@
+"""
+Pool persistente de servidores MCP pre-calentados, compartido entre procesos worker.
+
+Un supervisor mantiene, por cada servidor MCP (file-system-mcp, elevenlabs-mcp), varios
+procesos stdio ya arrancados y escucha en un socket Unix local. Cada conexión recibe un
+proceso caliente en exclusiva (las sesiones MCP tienen estado) y el pool repone otro.
+El supervisor comprueba la salud de los procesos, reemplaza los que mueren y guarda en
+disco la lista de herramientas descubiertas de cada servidor.
+
+Los agentes se conectan a través de un puente stdio<->socket (este mismo archivo con
+`connect`), así que no necesitan resolver ni arrancar uvx. Con las herramientas ya descubiertas
+(tools.json, con sus esquemas) el agente se crea sin conectarse: el puente se lanza en la
+primera llamada a una herramienta.
+
+Los sockets viven en $XDG_RUNTIME_DIR/auto-mcp-pool (o /tmp/auto-mcp-pool-<uid>), un directorio
+0700 del usuario; los clientes comprueban el dueño del directorio y de los sockets antes de usarlos.
+
+Uso:
+    python Auto/mcp_pool.py serve [--size 2] [--servers file-system elevenlabs]
+    python Auto/mcp_pool.py status
+    python Auto/mcp_pool.py connect file-system      (lo usa MCPToolset, no a mano)
+
+Este módulo no usa imports relativos para poder ejecutarse como script sin importar Auto.
+"""
+import os
+import sys
+import stat
+import json
+import time
+import shlex
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from typing import Dict, Any, Optional, List, Set, Tuple
+
+
+def _default_pool_dir() -> str:
+    """$XDG_RUNTIME_DIR (privado del usuario) o, si no existe, un directorio por uid en /tmp."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "auto-mcp-pool")
+    return os.path.join(tempfile.gettempdir(), f"auto-mcp-pool-{os.getuid()}")
+
+
+POOL_DIR = os.getenv("AUTO_MCP_POOL_DIR") or _default_pool_dir()
+POOL_SIZE = int(os.getenv("AUTO_MCP_POOL_SIZE", "2"))
+HEALTH_INTERVAL = float(os.getenv("AUTO_MCP_POOL_HEALTH_INTERVAL", "5"))
+DISCOVERY_TIMEOUT = float(os.getenv("AUTO_MCP_POOL_DISCOVERY_TIMEOUT", "60"))
+
+# Servidores MCP conocidos: comando por defecto y variables de entorno que necesitan
+SERVERS: Dict[str, Dict[str, Any]] = {
+    "file-system": {"command": "uvx", "args": ["file-system-mcp"], "env": []},
+    "elevenlabs": {"command": "uvx", "args": ["elevenlabs-mcp"], "env": ["ELEVENLABS_API_KEY"]},
+}
+
+CONTROL_SOCKET = "control.sock"
+TOOLS_CACHE_FILE = "tools.json"
+
+
+# --- Helpers para los agentes ---
+
+def server_command(name: str) -> Tuple[str, List[str], Dict[str, str]]:
+    """Comando, argumentos y entorno para lanzar un servidor MCP.
+
+    AUTO_MCP_<NOMBRE>_COMMAND (p.ej. AUTO_MCP_FILE_SYSTEM_COMMAND) reemplaza el comando por defecto.
+    """
+    spec = SERVERS[name]
+    override = os.getenv(f"AUTO_MCP_{name.upper().replace('-', '_')}_COMMAND")
+    if override:
+        command, *args = shlex.split(override)
+    else:
+        command, args = spec["command"], list(spec["args"])
+    env = {key: os.environ[key] for key in spec["env"] if os.getenv(key)}
+    return command, args, env
+
+
+def socket_path(name: str) -> str:
+    return os.path.join(POOL_DIR, f"{name}.sock")
+
+
+def _owned(path: str, kind: Optional[int] = None) -> bool:
+    """True si `path` existe, no es un enlace, es del usuario actual y (si se pide) es de tipo `kind`."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if info.st_uid != os.getuid() or stat.S_ISLNK(info.st_mode):
+        return False
+    return kind is None or stat.S_IFMT(info.st_mode) == kind
+
+
+def pool_dir_secure() -> bool:
+    """El directorio del pool es nuestro y nadie más puede escribir en él (si no, otro usuario
+    local podría crear los sockets y hacerse pasar por los servidores MCP)."""
+    if not _owned(POOL_DIR, stat.S_IFDIR):
+        return False
+    return os.stat(POOL_DIR).st_mode & 0o077 == 0
+
+
+def ensure_pool_dir() -> None:
+    """Crea el directorio del pool con modo 0700; PermissionError si existe y no es seguro."""
+    os.makedirs(POOL_DIR, mode=0o700, exist_ok=True)
+    if _owned(POOL_DIR, stat.S_IFDIR):
+        os.chmod(POOL_DIR, 0o700)
+    if not pool_dir_secure():
+        raise PermissionError(f"MCP pool directory {POOL_DIR} is not a private directory owned by this user")
+
+
+def _trusted_socket(path: str) -> bool:
+    return pool_dir_secure() and _owned(path, stat.S_IFSOCK)
+
+
+def pool_available(name: str) -> bool:
+    """True si hay un supervisor escuchando para `name` (y el pool no está desactivado)."""
+    if os.getenv("AUTO_MCP_POOL", "1").lower() in ("0", "false", "no", "off"):
+        return False
+    if not _trusted_socket(socket_path(name)) or not _trusted_socket(os.path.join(POOL_DIR, CONTROL_SOCKET)):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(os.path.join(POOL_DIR, CONTROL_SOCKET))
+        return True
+    except OSError:
+        return False
+
+
+def bridge_command(name: str) -> Tuple[str, List[str]]:
+    """Comando stdio que conecta con el servidor `name` del pool (para StdioServerParameters).
+
+    El directorio va en los argumentos: el cliente MCP lanza el puente con un entorno mínimo,
+    sin AUTO_MCP_POOL_DIR ni XDG_RUNTIME_DIR.
+    """
+    return sys.executable, [os.path.abspath(__file__), "connect", name, "--dir", POOL_DIR]
+
+
+def cached_tools(name: str) -> Optional[List[Dict[str, Any]]]:
+    """Herramientas descubiertas por el supervisor para `name`, o None si no hay cache."""
+    path = os.path.join(POOL_DIR, TOOLS_CACHE_FILE)
+    if not pool_dir_secure() or not _owned(path, stat.S_IFREG):
+        return None
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(name)
+    except (OSError, ValueError):
+        return None
+    return entry["tools"] if entry else None
+
+
+def cached_tool_names(name: str) -> Optional[List[str]]:
+    tools = cached_tools(name)
+    return [tool["name"] for tool in tools] if tools is not None else None
+
+
+def pooled_tools(name: str, env: Optional[Dict[str, str]] = None) -> Optional[Tuple[List[Any], Any]]:
+    """Herramientas MCP de `name` construidas con los esquemas de tools.json, sin arrancar nada.
+
+    Cada herramienta abre la sesión (el puente al pool) en su primera llamada, así que crear el
+    agente no lanza subprocesos ni hace el handshake MCP. Devuelve (herramientas, exit_stack) como
+    connect_server, o None si no hay esquemas en cache o esta versión de ADK no lo permite.
+    """
+    tools = cached_tools(name)
+    if not tools or any("inputSchema" not in tool for tool in tools):
+        return None
+    from contextlib import AsyncExitStack
+    from google.adk.tools.mcp_tool import mcp_toolset
+    from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
+
+    if hasattr(mcp_toolset.MCPToolset, "connect_to_server"):
+        return None
+    from mcp.types import Tool
+    from google.adk.tools.mcp_tool.mcp_tool import McpTool
+    from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager, StdioConnectionParams
+
+    command, args = bridge_command(name)
+    session_manager = MCPSessionManager(
+        StdioConnectionParams(
+            server_params=StdioServerParameters(command=command, args=args, env=env),
+            timeout=DISCOVERY_TIMEOUT,
+        )
+    )
+    exit_stack = AsyncExitStack()
+    exit_stack.push_async_callback(session_manager.close)
+    return [
+        McpTool(
+            mcp_tool=Tool(name=tool["name"], description=tool.get("description") or None, inputSchema=tool["inputSchema"]),
+            mcp_session_manager=session_manager,
+        )
+        for tool in tools
+    ], exit_stack
+
+
+async def connect_server(command: str, args: List[str], env: Optional[Dict[str, str]] = None) -> Tuple[List[Any], Any]:
+    """Conecta con un servidor MCP stdio y devuelve (herramientas, exit_stack) con cualquier versión de ADK.
+
+    Las versiones antiguas exponen MCPToolset.connect_to_server; en las nuevas el toolset abre la
+    sesión bajo demanda y se cierra con close(), que aquí se envuelve en un AsyncExitStack.
+    """
+    from contextlib import AsyncExitStack
+    from google.adk.tools.mcp_tool import mcp_toolset
+    from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
+
+    server_params = StdioServerParameters(command=command, args=args, env=env)
+    if hasattr(mcp_toolset.MCPToolset, "connect_to_server"):
+        return await mcp_toolset.MCPToolset().connect_to_server(connection_params=server_params)
+
+    from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+
+    toolset = mcp_toolset.McpToolset(
+        connection_params=StdioConnectionParams(server_params=server_params, timeout=DISCOVERY_TIMEOUT)
+    )
+    exit_stack = AsyncExitStack()
+    exit_stack.push_async_callback(toolset.close)
+    try:
+        tools = await toolset.get_tools()
+    except BaseException:
+        await exit_stack.aclose()
+        raise
+    return tools, exit_stack
+
+
+# --- Supervisor ---
+
+class ServerPool:
+    """Procesos calientes de un servidor MCP stdio."""
+
+    def __init__(self, name: str, size: int = POOL_SIZE):
+        self.name = name
+        self.size = size
+        self._warm: List[asyncio.subprocess.Process] = []
+        self._active: Dict[int, asyncio.subprocess.Process] = {}
+        self._spawning = 0
+        self._available = asyncio.Condition()
+        # Reposiciones en segundo plano: referencia fuerte hasta que terminan (si no, el GC las puede cortar)
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"spawned": 0, "crashed": 0, "served": 0, "spawn_failures": 0}
+
+    async def _spawn(self) -> Optional[asyncio.subprocess.Process]:
+        command, args, env = server_command(self.name)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                command, *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                env={**os.environ, **env},
+            )
+        except (OSError, ValueError) as e:
+            self.stats["spawn_failures"] += 1
+            print(f"!!! ERROR: cannot start {self.name} MCP server: {e} !!!")
+            return None
+        self.stats["spawned"] += 1
+        return process
+
+    async def replenish(self) -> None:
+        """Arranca procesos hasta tener `size` calientes."""
+        while len(self._warm) + self._spawning < self.size:
+            self._spawning += 1
+            try:
+                process = await self._spawn()
+            finally:
+                self._spawning -= 1
+            if process is None:
+                return
+            async with self._available:
+                self._warm.append(process)
+                self._available.notify()
+
+    def _replenish_later(self) -> None:
+        task = asyncio.get_running_loop().create_task(self.replenish())
+        self._tasks.add(task)
+        task.add_done_callback(self._replenish_done)
+
+    def _replenish_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"!!! ERROR: replenishing the {self.name} MCP pool failed: {task.exception()} !!!")
+
+    async def acquire(self) -> asyncio.subprocess.Process:
+        """Entrega un proceso caliente y vivo, esperando a que haya uno si hace falta."""
+        while True:
+            if not self._warm:
+                await self.replenish()
+            async with self._available:
+                if not self._warm:
+                    try:
+                        await asyncio.wait_for(
+                            self._available.wait_for(lambda: bool(self._warm)),
+                            timeout=DISCOVERY_TIMEOUT,
+                        )
+                    except asyncio.TimeoutError:
+                        raise ConnectionError(f"no warm '{self.name}' MCP process available")
+                process = self._warm.pop(0)
+            self._replenish_later()
+            if process.returncode is None:
+                self._active[process.pid] = process
+                return process
+            self.stats["crashed"] += 1
+
+    async def health_check(self) -> None:
+        """Descarta los procesos calientes que murieron y repone el pool."""
+        async with self._available:
+            alive = [process for process in self._warm if process.returncode is None]
+            self.stats["crashed"] += len(self._warm) - len(alive)
+            self._warm = alive
+        await self.replenish()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Conecta un cliente del socket con un proceso caliente hasta que uno de los dos cierre."""
+        try:
+            process = await self.acquire()
+        except ConnectionError as e:
+            print(f"⚠️ {e}")
+            writer.close()
+            return
+        self.stats["served"] += 1
+
+        async def client_to_server():
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                process.stdin.write(data)
+                await process.stdin.drain()
+            # El cliente cerró su extremo: cerrar stdin para que el servidor termine
+            process.stdin.close()
+
+        async def server_to_client():
+            while True:
+                data = await process.stdout.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+
+        inbound = asyncio.create_task(client_to_server())
+        outbound = asyncio.create_task(server_to_client())
+        try:
+            await asyncio.wait([inbound, outbound], return_when=asyncio.FIRST_COMPLETED)
+            if not outbound.done():
+                # Dar tiempo al servidor para responder lo pendiente antes de cerrarlo
+                await asyncio.wait([outbound], timeout=5.0)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for task in (inbound, outbound):
+                task.cancel()
+            await asyncio.gather(inbound, outbound, return_exceptions=True)
+            writer.close()
+            # La sesión MCP tenía estado: el proceso no se reutiliza
+            await _terminate(process)
+            self._active.pop(process.pid, None)
+
+    async def discover_tools(self) -> List[Dict[str, Any]]:
+        """Hace el handshake MCP con un proceso dedicado y devuelve tools/list."""
+        process = await self._spawn()
+        if process is None:
+            return []
+        try:
+            return await asyncio.wait_for(_list_tools(process), timeout=DISCOVERY_TIMEOUT)
+        finally:
+            await _terminate(process)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "warm": len(self._warm),
+            "active": len(self._active),
+            "size": self.size,
+            **self.stats,
+        }
+
+    async def close(self) -> None:
+        # Primero las reposiciones pendientes: no deben arrancar procesos después de cerrar
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        processes = self._warm + list(self._active.values())
+        self._warm = []
+        self._active.clear()
+        await asyncio.gather(*(_terminate(process) for process in processes))
+
+
+async def _terminate(process: asyncio.subprocess.Process, timeout: float = 5.0) -> None:
+    if process.returncode is not None:
+        return
+    try:
+        process.terminate()
+        await asyncio.wait_for(process.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def _list_tools(process: asyncio.subprocess.Process) -> List[Dict[str, Any]]:
+    """initialize + notifications/initialized + tools/list sobre stdio (JSON-RPC por líneas)."""
+
+    async def send(message: Dict[str, Any]) -> None:
+        process.stdin.write((json.dumps(message) + "\n").encode())
+        await process.stdin.drain()
+
+    async def response(request_id: int) -> Dict[str, Any]:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                raise ConnectionError("MCP server closed stdout")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise RuntimeError(message["error"])
+                return message.get("result") or {}
+
+    await send({
+        "jsonrpc": "2.0", "id": 1, "method": "initialize",
+        "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "auto-mcp-pool", "version": "1.0"},
+        },
+    })
+    await response(1)
+    await send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    await send({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+    result = await response(2)
+    # Con el esquema de entrada: los workers construyen las herramientas sin conectarse (pooled_tools)
+    return [
+        {
+            "name": tool["name"],
+            "description": tool.get("description", ""),
+            "inputSchema": tool.get("inputSchema") or {"type": "object", "properties": {}},
+        }
+        for tool in result.get("tools", [])
+    ]
+
+
+class Supervisor:
+    """Levanta un ServerPool por servidor y los expone por sockets Unix."""
+
+    def __init__(self, names: List[str], size: int = POOL_SIZE):
+        self.pools = {name: ServerPool(name, size) for name in names}
+        self._servers: List[asyncio.AbstractServer] = []
+        self.started_at = time.time()
+
+    async def start(self) -> None:
+        ensure_pool_dir()
+        await self._discover_all()
+        for name, pool in self.pools.items():
+            await pool.replenish()
+            self._servers.append(await _start_unix_server(pool.handle_client, socket_path(name)))
+            print(f"✅ MCP pool '{name}' ready with {pool.status()['warm']} warm process(es)")
+        self._servers.append(
+            await _start_unix_server(self._handle_control, os.path.join(POOL_DIR, CONTROL_SOCKET))
+        )
+
+    async def _discover_all(self) -> None:
+        results = await asyncio.gather(
+            *(pool.discover_tools() for pool in self.pools.values()), return_exceptions=True
+        )
+        cache = {}
+        for name, result in zip(self.pools, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ Tool discovery failed for '{name}': {result}")
+                continue
+            cache[name] = {"tools": result, "discovered_at": time.time()}
+            print(f"--- Discovered {len(result)} tool(s) for '{name}': {', '.join(t['name'] for t in result)} ---")
+        tmp_path = os.path.join(POOL_DIR, TOOLS_CACHE_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, os.path.join(POOL_DIR, TOOLS_CACHE_FILE))
+
+    async def _handle_control(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Socket de control: responde con el estado del pool en JSON y cierra."""
+        writer.write(json.dumps(self.status()).encode() + b"\n")
+        await writer.drain()
+        writer.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started_at,
+            "pools": {name: pool.status() for name, pool in self.pools.items()},
+        }
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            while True:
+                await asyncio.sleep(HEALTH_INTERVAL)
+                for pool in self.pools.values():
+                    await pool.health_check()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+        for name in list(self.pools) + [CONTROL_SOCKET]:
+            path = socket_path(name) if name != CONTROL_SOCKET else os.path.join(POOL_DIR, CONTROL_SOCKET)
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+async def _start_unix_server(handler, path: str) -> asyncio.AbstractServer:
+    if os.path.exists(path):
+        os.unlink(path)
+    return await asyncio.start_unix_server(handler, path=path)
+
+
+# --- Puente stdio <-> socket ---
+
+def bridge(name: str) -> int:
+    """Copia stdin -> socket y socket -> stdout hasta que alguno cierre."""
+    if not _trusted_socket(socket_path(name)):
+        print(f"!!! ERROR: MCP pool socket for '{name}' is missing or not owned by this user !!!", file=sys.stderr)
+        return 1
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path(name))
+    except OSError as e:
+        print(f"!!! ERROR: MCP pool for '{name}' not reachable: {e} !!!", file=sys.stderr)
+        return 1
+
+    done = threading.Event()
+
+    def stdin_to_socket():
+        try:
+            while True:
+                data = sys.stdin.buffer.read1(65536)
+                if not data:
+                    break
+                sock.sendall(data)
+            # Fin de stdin: avisar al pool pero seguir leyendo las respuestas pendientes
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            done.set()
+
+    def socket_to_stdout():
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                sys.stdout.buffer.write(data)
+                sys.stdout.buffer.flush()
+        except OSError:
+            pass
+        finally:
+            done.set()
+
+    threading.Thread(target=stdin_to_socket, daemon=True).start()
+    threading.Thread(target=socket_to_stdout, daemon=True).start()
+    done.wait()
+    sock.close()
+    return 0
+
+
+def read_status() -> Optional[Dict[str, Any]]:
+    """Consulta el estado del supervisor por el socket de control."""
+    if not _trusted_socket(os.path.join(POOL_DIR, CONTROL_SOCKET)):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2.0)
+            sock.connect(os.path.join(POOL_DIR, CONTROL_SOCKET))
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pool of warm MCP servers shared by Auto workers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run the supervisor")
+    serve_parser.add_argument("--size", type=int, default=POOL_SIZE, help="warm processes per server")
+    serve_parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    connect_parser = subparsers.add_parser("connect", help="stdio bridge to a pooled server")
+    connect_parser.add_argument("name", choices=list(SERVERS))
+    connect_parser.add_argument("--dir", help="pool directory (defaults to AUTO_MCP_POOL_DIR or the per-user one)")
+    subparsers.add_parser("status", help="print the supervisor status")
+    args = parser.parse_args(argv)
+
+    if args.command == "connect":
+        if args.dir:
+            global POOL_DIR
+            POOL_DIR = args.dir
+        return bridge(args.name)
+    if args.command == "status":
+        status = read_status()
+        if status is None:
+            print("MCP pool supervisor is not running")
+            return 1
+        print(json.dumps(status, indent=2))
+        return 0
+
+    print(f"🚀 Starting MCP pool supervisor in {POOL_DIR} ...")
+    try:
+        asyncio.run(Supervisor(args.servers, args.size).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
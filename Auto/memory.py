@@ -0,0 +1,284 @@
+"""
+Memoria de conversación acotada para sesiones largas.
+
+Antes de cada llamada al modelo (before_model_callback) el historial de la sesión se reduce a:
+- un resumen acumulado de los turnos antiguos (en la instrucción de sistema)
+- los últimos AUTO_MEMORY_KEEP_TURNS turnos literales
+y se recorta al presupuesto de tokens del agente (AUTO_MEMORY_TOKEN_BUDGET, o por agente
+con AUTO_MEMORY_BUDGETS="Auto=4000,conversational_agent=8000").
+
+El resumen se calcula en segundo plano (una tarea por sesión y agente) y nunca bloquea el
+turno: mientras no está listo, los turnos que aún no cubre se envían literales, dentro del
+presupuesto. Un turno empieza en cada mensaje de texto del usuario e incluye todas las
+llamadas a herramientas que provocó, de forma que nunca se separan una llamada y su respuesta.
+"""
+import os
+import re
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+from google.genai import types
+
+from .callbacks import add_callbacks, attach_including_lazy
+from .scheduler import scheduler
+
+MEMORY_ENABLED = os.getenv("AUTO_MEMORY", "1").lower() not in ("0", "false", "no", "off")
+KEEP_TURNS = int(os.getenv("AUTO_MEMORY_KEEP_TURNS", "6"))
+TOKEN_BUDGET = int(os.getenv("AUTO_MEMORY_TOKEN_BUDGET", "12000"))
+AGENT_BUDGETS = os.getenv("AUTO_MEMORY_BUDGETS", "")
+# "llm" (modelo de AUTO_MEMORY_MODEL) o "extractive" (sin llamadas al modelo)
+SUMMARIZER = os.getenv("AUTO_MEMORY_SUMMARIZER", "llm").lower()
+SUMMARY_MODEL = os.getenv("AUTO_MEMORY_MODEL", "gemini/gemini-1.5-flash")
+SUMMARY_MAX_CHARS = int(os.getenv("AUTO_MEMORY_SUMMARY_CHARS", "2000"))
+MAX_SESSIONS = 1000
+
+Summarizer = Callable[[str, str], Awaitable[str]]
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación barata de tokens (~4 caracteres por token)."""
+    return (len(text) + 3) // 4
+
+
+def content_text(content: types.Content) -> str:
+    chunks = []
+    for part in content.parts or []:
+        if part.text:
+            chunks.append(part.text)
+        elif part.function_call:
+            chunks.append(f"[call {part.function_call.name}({part.function_call.args})]")
+        elif part.function_response:
+            chunks.append(f"[{part.function_response.name} -> {part.function_response.response}]")
+    return "\n".join(chunks)
+
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """Agrupa el historial en turnos: cada mensaje de texto del usuario abre un turno nuevo."""
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_message(content):
+            turns.append([content])
+        else:
+            turns[-1].append(content)
+    return turns
+
+
+def _turn_text(turn: List[types.Content]) -> str:
+    return "\n".join(f"{content.role}: {content_text(content)}" for content in turn)
+
+
+def _turn_tokens(turn: List[types.Content]) -> int:
+    return estimate_tokens(_turn_text(turn))
+
+
+async def extractive_summarizer(text: str, previous: str) -> str:
+    """Resumen sin modelo: la primera frase de cada mensaje, acotado a SUMMARY_MAX_CHARS."""
+    lines = [previous] if previous else []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            lines.append(_SENTENCE_RE.split(line, 1)[0][:200])
+    summary = "\n".join(lines)
+    return summary[-SUMMARY_MAX_CHARS:]
+
+
+def llm_summarizer(model_name: str = SUMMARY_MODEL, api_key_env: Optional[str] = "GOOGLE_API_KEY") -> Summarizer:
+    """Resumen con un modelo del ModelRegistry (comparte cliente, límites y métricas)."""
+
+    async def summarize(text: str, previous: str) -> str:
+        from google.adk.models.llm_request import LlmRequest
+        from .models import get_model
+
+        prompt = (
+            "Update the running summary of this conversation. Keep names, facts, decisions, "
+            "open questions and user preferences; drop small talk. "
+            f"Answer with the summary only, at most {SUMMARY_MAX_CHARS // 5} words.\n\n"
+            f"CURRENT SUMMARY:\n{previous or '(empty)'}\n\nNEW MESSAGES:\n{text}"
+        )
+        llm_request = LlmRequest(
+            model=model_name,
+            contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+        )
+        summary = ""
+        async for llm_response in get_model(model_name, api_key_env).generate_content_async(llm_request):
+            if llm_response.content and not llm_response.partial:
+                summary = "".join(part.text or "" for part in llm_response.content.parts or [])
+        return summary.strip()[:SUMMARY_MAX_CHARS] or previous
+
+    return summarize
+
+
+class _SessionSummary:
+    __slots__ = ("text", "covered_turns", "task")
+
+    def __init__(self):
+        self.text = ""
+        self.covered_turns = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class ConversationMemory:
+    """Mantiene los últimos K turnos literales y un resumen de los anteriores, dentro de un presupuesto."""
+
+    def __init__(
+        self,
+        keep_turns: int = KEEP_TURNS,
+        token_budget: int = TOKEN_BUDGET,
+        agent_budgets: Optional[Dict[str, int]] = None,
+        summarizer: Optional[Summarizer] = None,
+        max_sessions: int = MAX_SESSIONS,
+    ):
+        self.keep_turns = max(1, keep_turns)
+        self.token_budget = token_budget
+        self.agent_budgets = agent_budgets or {}
+        self.summarizer = summarizer or extractive_summarizer
+        self.max_sessions = max_sessions
+        self._summaries: "OrderedDict[tuple, _SessionSummary]" = OrderedDict()
+        self.stats = {
+            "requests": 0,
+            "trimmed": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "summaries": 0,
+            "summary_errors": 0,
+            "dropped_turns": 0,
+        }
+
+    def budget_for(self, agent_name: str) -> int:
+        return self.agent_budgets.get(agent_name, self.token_budget)
+
+    def _summary_state(self, key: tuple) -> _SessionSummary:
+        state = self._summaries.get(key)
+        if state is None:
+            state = self._summaries[key] = _SessionSummary()
+            while len(self._summaries) > self.max_sessions:
+                _, old = self._summaries.popitem(last=False)
+                if old.task is not None:
+                    old.task.cancel()
+        else:
+            self._summaries.move_to_end(key)
+        return state
+
+    def _schedule_summary(self, state: _SessionSummary, older: List[List[types.Content]]) -> None:
+        """Resume en segundo plano los turnos antiguos que el resumen todavía no cubre."""
+        if state.task is not None and not state.task.done():
+            return
+        pending = older[state.covered_turns:]
+        if not pending:
+            return
+        target = len(older)
+        text = "\n".join(_turn_text(turn) for turn in pending)
+
+        async def run() -> None:
+            try:
+                state.text = await self.summarizer(text, state.text)
+                state.covered_turns = target
+                self.stats["summaries"] += 1
+            except Exception as e:
+                self.stats["summary_errors"] += 1
+                print(f"⚠️ Conversation summary failed: {e}")
+
+        try:
+            # Las llamadas del resumidor ceden el turno de la API key a las interactivas
+            with scheduler.background():
+                state.task = asyncio.get_running_loop().create_task(run())
+        except RuntimeError:
+            # Sin event loop (llamada síncrona): se resumirá en el próximo turno con loop
+            state.task = None
+
+    def trim(self, key: tuple, contents: List[types.Content], budget: int, fixed_tokens: int = 0) -> Dict[str, Any]:
+        """Devuelve {contents, summary} para un historial, sin esperar al resumen."""
+        turns = split_turns(contents)
+        if len(turns) <= self.keep_turns and sum(map(_turn_tokens, turns)) + fixed_tokens <= budget:
+            return {"contents": contents, "summary": ""}
+
+        older, recent = turns[:-self.keep_turns], turns[-self.keep_turns:]
+        state = self._summary_state(key)
+        self._schedule_summary(state, older)
+
+        # Turnos antiguos que el resumen aún no cubre: se mantienen literales mientras quepan
+        uncovered = older[min(state.covered_turns, len(older)):]
+        kept = uncovered + recent
+        summary = state.text
+        used = fixed_tokens + estimate_tokens(summary) + sum(map(_turn_tokens, kept))
+        # El último turno (la petición actual) se mantiene siempre
+        while used > budget and len(kept) > 1:
+            used -= _turn_tokens(kept.pop(0))
+            self.stats["dropped_turns"] += 1
+        if used > budget and summary:
+            allowed_chars = max(0, (budget - (used - estimate_tokens(summary))) * 4)
+            summary = summary[-allowed_chars:] if allowed_chars else ""
+
+        return {"contents": [content for turn in kept for content in turn], "summary": summary}
+
+    # --- Callbacks ---
+
+    def before_model_callback(self, callback_context, llm_request) -> None:
+        self.stats["requests"] += 1
+        instruction = ""
+        if llm_request.config is not None and isinstance(llm_request.config.system_instruction, str):
+            instruction = llm_request.config.system_instruction
+        fixed_tokens = estimate_tokens(instruction)
+        before = fixed_tokens + sum(estimate_tokens(content_text(content)) for content in llm_request.contents)
+        self.stats["tokens_before"] += before
+
+        key = (callback_context.session.id, callback_context.agent_name)
+        trimmed = self.trim(key, llm_request.contents, self.budget_for(callback_context.agent_name), fixed_tokens)
+        if trimmed["contents"] is not llm_request.contents:
+            self.stats["trimmed"] += 1
+            llm_request.contents = trimmed["contents"]
+        if trimmed["summary"]:
+            llm_request.append_instructions([
+                "SUMMARY OF THE EARLIER CONVERSATION (older turns are not shown):\n" + trimmed["summary"]
+            ])
+
+        after = fixed_tokens + estimate_tokens(trimmed["summary"]) + sum(
+            estimate_tokens(content_text(content)) for content in llm_request.contents
+        )
+        self.stats["tokens_after"] += after
+        return None
+
+    def attach(self, root_agent) -> None:
+        """Aplica la memoria al agente raíz y a todos sus sub-agentes."""
+        attach_including_lazy(root_agent, self._attach_agent)
+
+    def _attach_agent(self, agent) -> None:
+        add_callbacks(agent, before_model_callback=self.before_model_callback)
+
+    async def wait_idle(self) -> None:
+        """Espera a que terminen los resúmenes en curso (para pruebas y benchmarks)."""
+        tasks = [state.task for state in self._summaries.values() if state.task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        before, after = self.stats["tokens_before"], self.stats["tokens_after"]
+        return {
+            **self.stats,
+            "sessions": len(self._summaries),
+            "token_reduction": (1 - after / before) if before else 0.0,
+        }
+
+
+def _parse_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for item in value.split(","):
+        name, _, budget = item.partition("=")
+        if name.strip() and budget.strip():
+            budgets[name.strip()] = int(budget)
+    return budgets
+
+
+def create_conversation_memory_from_env() -> Optional[ConversationMemory]:
+    """Crea la memoria según AUTO_MEMORY* (None si está desactivada)."""
+    if not MEMORY_ENABLED:
+        return None
+    summarizer = extractive_summarizer if SUMMARIZER == "extractive" else llm_summarizer()
+    return ConversationMemory(agent_budgets=_parse_budgets(AGENT_BUDGETS), summarizer=summarizer)
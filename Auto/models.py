@@ -0,0 +1,263 @@
+"""
+Registro compartido de clientes de modelo.
+
+Todos los agentes piden su modelo con get_model("proveedor/modelo", "API_KEY_ENV") y reciben
+la misma instancia por par (proveedor, modelo), de forma que reutilizan conexiones HTTP.
+El registro además:
+- limita las llamadas LLM en vuelo por proceso (AUTO_LLM_MAX_CONCURRENCY)
+- pide turno al planificador por API key (Auto/scheduler.py) en cada intento
+- reintenta con backoff exponencial ante rate limits / 429 (AUTO_LLM_MAX_RETRIES, AUTO_LLM_BACKOFF_BASE)
+- acumula contadores de tokens y latencia por modelo
+
+Para pruebas, set_model_factory() reemplaza la construcción de modelos (p.ej. por un FakeLlm).
+"""
+import os
+import time
+import random
+import asyncio
+import weakref
+import contextvars
+from contextlib import AsyncExitStack, contextmanager
+from typing import TYPE_CHECKING, Dict, Any, Optional, Callable, AsyncGenerator, Tuple
+
+from .scheduler import scheduler
+
+if TYPE_CHECKING:
+    # Solo para anotaciones: google.adk tarda ~1 s en importarse y `import Auto.agent` no lo necesita
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.models.llm_response import LlmResponse
+
+MAX_CONCURRENCY = int(os.getenv("AUTO_LLM_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("AUTO_LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("AUTO_LLM_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX = float(os.getenv("AUTO_LLM_BACKOFF_MAX", "30"))
+
+ModelFactory = Callable[[str, Optional[str]], "BaseLlm"]
+
+# Contador de tokens del bloque usage_scope() activo (lo heredan las tareas y AgentTools anidados)
+_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("auto_llm_usage", default=None)
+
+# Variable de entorno con la API key de cada proveedor
+PROVIDER_API_KEYS = {
+    "gemini": "GOOGLE_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+
+def split_model_name(model: str) -> Tuple[str, str]:
+    """'gemini/gemini-1.5-flash' -> ('gemini', 'gemini-1.5-flash')."""
+    provider, _, name = model.partition("/")
+    return (provider, name) if name else ("", provider)
+
+
+def api_key_env_for(model: str) -> Optional[str]:
+    """'groq/llama-3.1-8b-instant' -> 'GROQ_API_KEY' (PROVEEDOR_API_KEY si no es conocido)."""
+    provider = split_model_name(model)[0]
+    if not provider:
+        return None
+    return PROVIDER_API_KEYS.get(provider, f"{provider.upper()}_API_KEY")
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Lee la cabecera Retry-After de la respuesta de error, si existe."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _lite_llm_factory(model: str, api_key_env: Optional[str]) -> "BaseLlm":
+    # litellm tarda segundos en importarse: solo se carga al crear el primer modelo real
+    from .lite_llm import PooledLiteLlm
+    from .prompts import cache_control_kwargs
+
+    return PooledLiteLlm(
+        model=model,
+        api_key=os.getenv(api_key_env) if api_key_env else None,
+        # Instrucción de sistema como prefijo cacheable en el proveedor (AUTO_PROMPT_CACHE)
+        **cache_control_kwargs(model),
+    )
+
+
+class ModelRegistry:
+    """Entrega una instancia compartida por modelo y gestiona concurrencia, reintentos y métricas."""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        factory: Optional[ModelFactory] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._factory: ModelFactory = factory or _lite_llm_factory
+        self._models: Dict[Tuple[str, str], "BaseLlm"] = {}
+        self._api_key_envs: Dict[Tuple[str, str], Optional[str]] = {}
+        # asyncio.Semaphore está ligado a un event loop: uno por loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self.in_flight = 0
+
+    def get(self, model: str, api_key_env: Optional[str] = None) -> "BaseLlm":
+        """Devuelve el cliente compartido para `model`, creándolo la primera vez."""
+        key = split_model_name(model)
+        instance = self._models.get(key)
+        if instance is None:
+            instance = self._factory(model, api_key_env)
+            self._models[key] = instance
+            self._api_key_envs[key] = api_key_env
+        return instance
+
+    def set_factory(self, factory: Optional[ModelFactory]) -> None:
+        """Cambia cómo se construyen los modelos (None = LiteLlm real) y vacía el registro."""
+        self._factory = factory or _lite_llm_factory
+        self._models.clear()
+        self._api_key_envs.clear()
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _model_stats(self, model: str) -> Dict[str, Any]:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = {
+                "calls": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "retries": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "latency_total": 0.0,
+                "latency_max": 0.0,
+            }
+            self._stats[model] = stats
+        return stats
+
+    def record_usage(self, model: str, llm_response: "LlmResponse") -> None:
+        usage = llm_response.usage_metadata
+        if usage is None or llm_response.partial:
+            return
+        stats = self._model_stats(model)
+        stats["input_tokens"] += usage.prompt_token_count or 0
+        stats["output_tokens"] += usage.candidates_token_count or 0
+        scope = _usage.get()
+        if scope is not None:
+            scope["input_tokens"] += usage.prompt_token_count or 0
+            scope["output_tokens"] += usage.candidates_token_count or 0
+
+    async def run(
+        self,
+        model: str,
+        make_stream: Callable[[], AsyncGenerator["LlmResponse", None]],
+    ) -> AsyncGenerator["LlmResponse", None]:
+        """Ejecuta una llamada al modelo bajo el límite de concurrencia, con reintentos y métricas."""
+        stats = self._model_stats(model)
+        api_key_env = self._api_key_envs.get(split_model_name(model)) or api_key_env_for(model)
+        self.in_flight += 1
+        stats["calls"] += 1
+        scope = _usage.get()
+        if scope is not None:
+            scope["llm_calls"] += 1
+        start = time.perf_counter()
+        try:
+            attempt = 0
+            while True:
+                yielded = False
+                try:
+                    # El turno se pide por intento: durante el backoff no se ocupa cupo de la key
+                    async with AsyncExitStack() as admission:
+                        await admission.enter_async_context(scheduler.slot(api_key_env))
+                        await admission.enter_async_context(self._semaphore())
+                        async for llm_response in make_stream():
+                            yielded = True
+                            self.record_usage(model, llm_response)
+                            if not llm_response.partial:
+                                # ADK ejecuta las herramientas antes de pedir la siguiente respuesta:
+                                # liberar el cupo para que un sub-agente con la misma key no espere por él
+                                await admission.aclose()
+                            yield llm_response
+                    return
+                except Exception as e:
+                    # Solo se reintenta si aún no se entregó nada al llamador
+                    if yielded or not _is_rate_limit(e) or attempt >= self.max_retries:
+                        stats["errors"] += 1
+                        raise
+                    stats["rate_limited"] += 1
+                    stats["retries"] += 1
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.0)
+                    attempt += 1
+                    # Un 429 afecta a todos los que comparten la key, no solo a este llamador
+                    if scheduler.enabled and api_key_env:
+                        scheduler.limiter(api_key_env).throttle(delay)
+                    print(f"⚠️ Rate limited by {model}, retrying in {delay:.1f}s ({attempt}/{self.max_retries})")
+                    await asyncio.sleep(min(delay, BACKOFF_MAX))
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["latency_total"] += elapsed
+            stats["latency_max"] = max(stats["latency_max"], elapsed)
+            self.in_flight -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        models = {}
+        for model, stats in self._stats.items():
+            calls = stats["calls"]
+            models[model] = {
+                **stats,
+                "latency_avg": (stats["latency_total"] / calls) if calls else 0.0,
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "models": models,
+        }
+
+
+model_registry = ModelRegistry()
+
+
+def get_model(model: str, api_key_env: Optional[str] = None) -> "BaseLlm":
+    """Atajo para model_registry.get()."""
+    return model_registry.get(model, api_key_env)
+
+
+@contextmanager
+def usage_scope():
+    """Acumula los tokens de todas las llamadas LLM hechas dentro del bloque (incluidos sub-agentes).
+
+        with usage_scope() as usage:
+            ...
+        usage -> {"llm_calls": 3, "input_tokens": 1200, "output_tokens": 85}
+    """
+    usage = {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def set_model_factory(factory: Optional[ModelFactory]) -> None:
+    """Atajo para model_registry.set_factory(); llamar antes de construir los agentes."""
+    model_registry.set_factory(factory)
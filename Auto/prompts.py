@@ -0,0 +1,378 @@
+"""
+Ensamblado de prompts: tamaño por agente, variante compacta y cache de contexto del proveedor.
+
+Cada llamada a un modelo reenvía la instrucción de sistema del agente y las declaraciones de sus
+herramientas (también las descubiertas por MCP) aunque no cambien entre turnos; en turnos cortos
+son la mayor parte de los tokens de entrada. PromptAssembler (before_model_callback en todos los
+agentes, después de memoria y caches):
+- mide por agente los tokens de la instrucción, de las herramientas y del historial de cada
+  llamada, y qué parte del prefijo (instrucción + herramientas) se repite idéntica de una llamada
+  a la siguiente, que es lo que un cache de contexto puede reutilizar (metrics());
+  static_footprint() calcula el tamaño estático de un árbol de agentes sin llamar a nada
+- AUTO_PROMPT_MODE=compact: la instrucción pierde sangrías, adornos y ejemplos; los ejemplos pasan
+  a un banco del que, en cada turno, se eligen los AUTO_PROMPT_EXAMPLES más parecidos al mensaje
+  del usuario. Van al final del mensaje y no en la instrucción, para que el prefijo no cambie.
+  Las descripciones de las herramientas se recortan a su primera frase
+- AUTO_PROMPT_CACHE=1: LiteLLM marca la instrucción de sistema (y con ella las herramientas, que
+  van delante) como prefijo cacheable en los proveedores de AUTO_PROMPT_CACHE_PROVIDERS
+
+AUTO_PROMPTS=0 desactiva la medición y la compactación.
+"""
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from typing import Dict, Any, Optional, List, Tuple
+
+from google.genai import types
+
+from .callbacks import add_callbacks, attach_including_lazy, walk_agents
+from .memory import estimate_tokens
+from .models import split_model_name
+from .semantic_cache import content_words, normalize
+
+PROMPTS_ENABLED = os.getenv("AUTO_PROMPTS", "1").lower() not in ("0", "false", "no", "off")
+PROMPT_MODES = ("full", "compact")
+PROMPT_MODE = os.getenv("AUTO_PROMPT_MODE", "full").lower()
+if PROMPT_MODE not in PROMPT_MODES:
+    print(f"⚠️ Unknown AUTO_PROMPT_MODE '{PROMPT_MODE}', using 'full'")
+    PROMPT_MODE = "full"
+MAX_EXAMPLES = int(os.getenv("AUTO_PROMPT_EXAMPLES", "3"))
+PROMPT_CACHE = os.getenv("AUTO_PROMPT_CACHE", "0").lower() not in ("0", "false", "no", "off")
+# Proveedores de LiteLLM que cachean un prefijo marcado con cache_control
+CACHE_PROVIDERS = frozenset(
+    provider.strip()
+    for provider in os.getenv("AUTO_PROMPT_CACHE_PROVIDERS", "anthropic,gemini,vertex_ai,bedrock").split(",")
+    if provider.strip()
+)
+# Longitud máxima de una descripción de herramienta o parámetro en modo compacto
+DESCRIPTION_CHARS = 160
+
+_HEADING_RE = re.compile(r"^[A-Z][A-Z0-9 /&()'-]*:$")
+_NUMBERED_TARGET_RE = re.compile(r"^\d+\.\s.*→\s*(\w+)")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s|\n")
+_SPACES_RE = re.compile(r"[ \t]{2,}")
+
+
+def cache_control_kwargs(model: str) -> Dict[str, Any]:
+    """Argumentos de LiteLlm que marcan la instrucción de sistema como cacheable (AUTO_PROMPT_CACHE)."""
+    if not PROMPT_CACHE or split_model_name(model)[0] not in CACHE_PROVIDERS:
+        return {}
+    return {"cache_control_injection_points": [{"location": "message", "role": "system"}]}
+
+
+# --- Instrucción compacta ---
+
+def _clean(line: str) -> str:
+    """Sin negritas de markdown, emojis ni espacios repetidos."""
+    line = line.replace("**", "")
+    line = "".join(char for char in line if unicodedata.category(char) not in ("So", "Mn") or char == "→")
+    return _SPACES_RE.sub(" ", line).strip()
+
+
+class CompactInstruction:
+    """Instrucción sin ejemplos (`core`) y banco de ejemplos para elegir por turno."""
+
+    def __init__(self, core: str, examples: List[str]):
+        self.core = core
+        self.examples = examples
+        self._words = [content_words(normalize(example)) for example in examples]
+
+    def select(self, text: str, limit: int = MAX_EXAMPLES) -> List[str]:
+        """Los `limit` ejemplos que más palabras comparten con `text` (ninguno si no hay coincidencias)."""
+        if not text or limit <= 0:
+            return []
+        words = content_words(normalize(text))
+        scored = [(len(words & example_words), index) for index, example_words in enumerate(self._words)]
+        best = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))[:limit]
+        return [self.examples[index] for _, index in sorted(best, key=lambda item: item[1])]
+
+
+def compact_instruction(text: str) -> CompactInstruction:
+    """Separa una instrucción en núcleo compacto y ejemplos.
+
+    Son ejemplos las viñetas de las secciones cuyo título contiene EXAMPLE (con sus líneas de
+    continuación) y las viñetas que solo enumeran frases entre comillas; estas últimas heredan
+    el destino ("→ agente") del punto numerado bajo el que estaban.
+    """
+    core: List[str] = []
+    examples: List[str] = []
+    in_examples = False
+    target: Optional[str] = None
+    for raw in text.splitlines():
+        line = _clean(raw)
+        if not line:
+            in_examples = False
+            core.append("")
+            continue
+        if _HEADING_RE.match(line):
+            in_examples = "EXAMPLE" in line
+            target = None
+            if not in_examples:
+                core.append(line)
+            continue
+        if in_examples:
+            if line.startswith("- ") or not examples:
+                examples.append(line[2:] if line.startswith("- ") else line)
+            else:
+                examples[-1] += " " + line
+            continue
+        numbered = _NUMBERED_TARGET_RE.match(line)
+        if numbered:
+            target = numbered.group(1)
+        if line.startswith('- "'):
+            example = line[2:]
+            if "→" not in example and target:
+                example += f" → {target}"
+            examples.append(example)
+            continue
+        core.append(line)
+
+    # Títulos que se quedaron sin contenido y líneas en blanco repetidas
+    compacted: List[str] = []
+    for index, line in enumerate(core):
+        if not line and (not compacted or not compacted[-1]):
+            continue
+        if _HEADING_RE.match(line):
+            following = next((other for other in core[index + 1:] if other), None)
+            if following is None or _HEADING_RE.match(following) or not core[index + 1]:
+                continue
+        compacted.append(line)
+    return CompactInstruction("\n".join(compacted).strip(), examples)
+
+
+# --- Declaraciones de herramientas ---
+
+def first_sentence(text: Optional[str], limit: int = DESCRIPTION_CHARS) -> Optional[str]:
+    if not text:
+        return text
+    text = " ".join(_SENTENCE_END_RE.split(text.strip(), maxsplit=1)[0].split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _compact_schema(schema: Optional[types.Schema]) -> Optional[types.Schema]:
+    if schema is None:
+        return None
+    update: Dict[str, Any] = {"description": first_sentence(schema.description)}
+    if schema.properties:
+        update["properties"] = {name: _compact_schema(value) for name, value in schema.properties.items()}
+    if schema.items is not None:
+        update["items"] = _compact_schema(schema.items)
+    if schema.any_of:
+        update["any_of"] = [_compact_schema(value) for value in schema.any_of]
+    return schema.model_copy(update=update)
+
+
+def _compact_json_schema(schema: Any) -> Any:
+    if isinstance(schema, dict):
+        return {
+            key: first_sentence(value) if key == "description" and isinstance(value, str) else _compact_json_schema(value)
+            for key, value in schema.items()
+        }
+    if isinstance(schema, list):
+        return [_compact_json_schema(value) for value in schema]
+    return schema
+
+
+def compact_declaration(declaration: types.FunctionDeclaration) -> types.FunctionDeclaration:
+    """Copia de la declaración con las descripciones recortadas a su primera frase."""
+    return declaration.model_copy(update={
+        "description": first_sentence(declaration.description),
+        "parameters": _compact_schema(declaration.parameters),
+        "parameters_json_schema": _compact_json_schema(declaration.parameters_json_schema),
+    })
+
+
+def declarations_text(declarations: List[types.FunctionDeclaration]) -> str:
+    """Lo que ocupan las declaraciones al enviarse (JSON sin campos vacíos)."""
+    return json.dumps(
+        [declaration.model_dump(mode="json", exclude_none=True) for declaration in declarations],
+        separators=(",", ":"),
+    )
+
+
+def _request_declarations(llm_request) -> List[types.FunctionDeclaration]:
+    config = llm_request.config
+    declarations: List[types.FunctionDeclaration] = []
+    for tool in (config.tools or []) if config is not None else []:
+        declarations.extend(getattr(tool, "function_declarations", None) or [])
+    return declarations
+
+
+def _instruction_text(llm_request) -> str:
+    config = llm_request.config
+    instruction = config.system_instruction if config is not None else None
+    if instruction is None:
+        return ""
+    return instruction if isinstance(instruction, str) else str(instruction)
+
+
+def _contents_text(contents: List[types.Content]) -> str:
+    from .memory import content_text
+
+    return "\n".join(content_text(content) for content in contents)
+
+
+def _last_user_message(contents: List[types.Content]) -> Tuple[Optional[int], str]:
+    """Índice y texto del último mensaje de texto del usuario."""
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == "user":
+            for part in content.parts or []:
+                if part.text:
+                    return index, part.text
+    return None, ""
+
+
+class PromptAssembler:
+    """Mide el prompt de cada llamada por agente y, en modo compacto, lo reduce."""
+
+    def __init__(self, mode: str = PROMPT_MODE, max_examples: int = MAX_EXAMPLES):
+        self.mode = mode
+        self.max_examples = max_examples
+        # nombre del agente -> instrucción original y su versión compacta
+        self._full: Dict[str, str] = {}
+        self._compact: Dict[str, CompactInstruction] = {}
+        self._last_prefix: Dict[str, str] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def compact(self) -> bool:
+        return self.mode == "compact"
+
+    def _agent_stats(self, agent: str) -> Dict[str, int]:
+        stats = self.stats.get(agent)
+        if stats is None:
+            stats = {
+                "calls": 0,
+                "instruction_tokens": 0,
+                "tool_tokens": 0,
+                "content_tokens": 0,
+                "example_tokens": 0,
+                "stable_prefix_calls": 0,
+                "cacheable_tokens": 0,
+            }
+            self.stats[agent] = stats
+        return stats
+
+    def _add_examples(self, agent: str, llm_request) -> int:
+        compact = self._compact.get(agent)
+        if compact is None or not compact.examples:
+            return 0
+        index, text = _last_user_message(llm_request.contents)
+        examples = compact.select(text, self.max_examples)
+        if index is None or not examples:
+            return 0
+        block = "(Examples of similar requests:\n" + "\n".join(f"- {example}" for example in examples) + ")"
+        content = llm_request.contents[index]
+        # Contenido nuevo: el de la petición puede ser el mismo objeto que el evento de la sesión
+        llm_request.contents[index] = types.Content(role=content.role, parts=list(content.parts or []) + [types.Part(text=block)])
+        return estimate_tokens(block)
+
+    def _compact_tools(self, llm_request) -> None:
+        config = llm_request.config
+        if config is None or not config.tools:
+            return
+        config.tools = [
+            tool.model_copy(update={"function_declarations": [compact_declaration(d) for d in tool.function_declarations]})
+            if getattr(tool, "function_declarations", None) else tool
+            for tool in config.tools
+        ]
+
+    def before_model_callback(self, callback_context, llm_request):
+        agent = callback_context.agent_name
+        example_tokens = 0
+        if self.compact:
+            example_tokens = self._add_examples(agent, llm_request)
+            self._compact_tools(llm_request)
+
+        instruction = _instruction_text(llm_request)
+        tools = declarations_text(_request_declarations(llm_request))
+        stats = self._agent_stats(agent)
+        stats["calls"] += 1
+        instruction_tokens = estimate_tokens(instruction)
+        tool_tokens = estimate_tokens(tools) if tools != "[]" else 0
+        stats["instruction_tokens"] += instruction_tokens
+        stats["tool_tokens"] += tool_tokens
+        stats["content_tokens"] += estimate_tokens(_contents_text(llm_request.contents))
+        stats["example_tokens"] += example_tokens
+        # Prefijo idéntico al de la llamada anterior del agente: reutilizable por un cache de contexto
+        prefix = hashlib.blake2b((instruction + "\0" + tools).encode(), digest_size=16).hexdigest()
+        if self._last_prefix.get(agent) == prefix:
+            stats["stable_prefix_calls"] += 1
+            stats["cacheable_tokens"] += instruction_tokens + tool_tokens
+        self._last_prefix[agent] = prefix
+        return None
+
+    def _compact_agent(self, agent) -> None:
+        if not isinstance(agent.instruction, str) or agent.name in self._compact:
+            return
+        compact = compact_instruction(agent.instruction)
+        self._full[agent.name] = agent.instruction
+        self._compact[agent.name] = compact
+        agent.instruction = compact.core
+
+    def attach(self, root_agent) -> None:
+        """Aplica la medición (y la compactación) al agente raíz y a todos sus sub-agentes."""
+        attach_including_lazy(root_agent, self._attach_agent)
+
+    def _attach_agent(self, agent) -> None:
+        if self.compact:
+            self._compact_agent(agent)
+        # Al final: mide lo que de verdad se envía, después de memoria y caches
+        add_callbacks(agent, before_model_callback=self.before_model_callback)
+
+    def static_footprint(self, root_agent) -> Dict[str, Any]:
+        """Tokens estáticos por agente (instrucción y herramientas), en la variante completa y la compacta."""
+        agents = {}
+        for agent in walk_agents(root_agent):
+            instruction = self._full.get(agent.name, agent.instruction)
+            if not isinstance(instruction, str):
+                continue
+            compact = self._compact.get(agent.name) or compact_instruction(instruction)
+            declarations = []
+            for tool in getattr(agent, "tools", []):
+                get_declaration = getattr(tool, "_get_declaration", None)
+                declaration = get_declaration() if get_declaration is not None else None
+                if declaration is not None:
+                    declarations.append(declaration)
+            full_tools = estimate_tokens(declarations_text(declarations)) if declarations else 0
+            compact_tools = estimate_tokens(declarations_text([compact_declaration(d) for d in declarations])) if declarations else 0
+            agents[agent.name] = {
+                "tools": len(declarations),
+                "full": {
+                    "instruction_tokens": estimate_tokens(instruction),
+                    "tool_tokens": full_tools,
+                    "static_tokens": estimate_tokens(instruction) + full_tools,
+                },
+                "compact": {
+                    "instruction_tokens": estimate_tokens(compact.core),
+                    "tool_tokens": compact_tools,
+                    "static_tokens": estimate_tokens(compact.core) + compact_tools,
+                    "example_bank": len(compact.examples),
+                },
+            }
+        return agents
+
+    def metrics(self) -> Dict[str, Any]:
+        agents = {}
+        for agent, stats in self.stats.items():
+            calls = stats["calls"] or 1
+            static = stats["instruction_tokens"] + stats["tool_tokens"]
+            total = static + stats["content_tokens"]
+            agents[agent] = {
+                **stats,
+                "static_tokens_per_call": static / calls,
+                "input_tokens_per_call": total / calls,
+                "static_share": static / total if total else 0.0,
+                "stable_prefix_rate": stats["stable_prefix_calls"] / calls,
+            }
+        return {"mode": self.mode, "prompt_cache": PROMPT_CACHE, "agents": agents}
+
+
+def create_prompt_assembler_from_env() -> Optional[PromptAssembler]:
+    """Crea el ensamblador según AUTO_PROMPTS / AUTO_PROMPT_MODE (None si está desactivado)."""
+    if not PROMPTS_ENABLED:
+        return None
+    return PromptAssembler()
@@ -0,0 +1,364 @@
+"""
+Resiliencia entre proveedores de modelos: timeouts por agente, failover, peticiones
+cubiertas (hedged) y circuit breakers por proveedor.
+
+Cada agente recibe un ResilientLlm que envuelve su modelo (el compartido del ModelRegistry):
+- Timeout por llamada según el agente (AUTO_LLM_TIMEOUT, AUTO_LLM_TIMEOUTS="Auto=30,conversational_agent=20")
+- Circuit breaker por proveedor (groq, gemini...): tras AUTO_BREAKER_FAILURES fallos seguidos
+  (errores o timeouts) el proveedor queda abierto AUTO_BREAKER_RESET segundos; después deja pasar
+  una única llamada de prueba (half-open) y se cierra si sale bien
+- Failover: si el primario falla o su proveedor está abierto, se usa el modelo alternativo
+  (AUTO_LLM_ALTERNATES="groq/qwen-qwq-32b=gemini/gemini-1.5-flash,..."), siempre que su API key exista
+- Hedging (AUTO_HEDGE=1): si el primario no ha respondido tras su p95 de latencia, se lanza la misma
+  petición al alternativo y se usa la que termine primero (la otra se cancela)
+
+Se desactiva con AUTO_RESILIENCE=0.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, List, AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from .callbacks import attach_including_lazy
+from .models import PROVIDER_API_KEYS, get_model, split_model_name
+
+RESILIENCE_ENABLED = os.getenv("AUTO_RESILIENCE", "1").lower() not in ("0", "false", "no", "off")
+HEDGE_ENABLED = os.getenv("AUTO_HEDGE", "0").lower() in ("1", "true", "yes", "on")
+DEFAULT_TIMEOUT = float(os.getenv("AUTO_LLM_TIMEOUT", "60"))
+AGENT_TIMEOUTS = os.getenv("AUTO_LLM_TIMEOUTS", "")
+ALTERNATES = os.getenv(
+    "AUTO_LLM_ALTERNATES",
+    "groq/qwen-qwq-32b=gemini/gemini-1.5-flash,gemini/gemini-1.5-flash=groq/llama-3.1-8b-instant",
+)
+BREAKER_FAILURES = int(os.getenv("AUTO_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("AUTO_BREAKER_RESET", "30"))
+# Retraso del hedge mientras no hay suficientes muestras para calcular el p95
+HEDGE_DELAY = float(os.getenv("AUTO_HEDGE_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.getenv("AUTO_HEDGE_MIN_DELAY", "0.2"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+class CircuitOpenError(RuntimeError):
+    """Todos los proveedores candidatos tienen el circuito abierto."""
+
+
+class CircuitBreaker:
+    """Circuit breaker closed -> open -> half_open -> closed, por proveedor."""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def available(self) -> bool:
+        """Como allow() pero sin reservar la llamada de prueba: para elegir candidatos."""
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not (self.state == "half_open" and self._probe_in_flight)
+
+    def allow(self) -> bool:
+        """True si se puede llamar al proveedor ahora (en half_open, solo una prueba a la vez)."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.stats["rejected"] += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self.stats["rejected"] += 1
+                return False
+            self._probe_in_flight = True
+            self.stats["probes"] += 1
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probe_in_flight = False
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """La llamada se canceló (p.ej. perdió un hedge o se cerró el stream): no cuenta como éxito ni como fallo."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+
+class ProviderHealth:
+    """Circuit breakers por proveedor y latencias recientes por modelo, compartidos por todos los agentes."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, deque] = {}
+        self.stats = {"calls": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        provider = split_model_name(model)[0] or model
+        breaker = self.breakers.get(provider)
+        if breaker is None:
+            breaker = self.breakers[provider] = CircuitBreaker(provider, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def p95(self, model: str) -> Optional[float]:
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def hedge_delay(self, model: str) -> float:
+        p95 = self.p95(model)
+        return max(HEDGE_MIN_DELAY, p95 if p95 is not None else HEDGE_DELAY)
+
+    def reset(self) -> None:
+        self.breakers.clear()
+        self._latencies.clear()
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "breakers": {name: breaker.snapshot() for name, breaker in self.breakers.items()},
+            "p95_seconds": {model: self.p95(model) for model in self._latencies},
+        }
+
+
+provider_health = ProviderHealth()
+
+
+class ResilientLlm(BaseLlm):
+    """Envuelve un modelo con timeout, failover, hedging y circuit breakers por proveedor."""
+
+    primary: BaseLlm
+    alternates: List[BaseLlm] = []
+    timeout: Optional[float] = DEFAULT_TIMEOUT
+    hedge: bool = HEDGE_ENABLED
+
+    def _request_for(self, llm: BaseLlm, llm_request: LlmRequest) -> LlmRequest:
+        if llm is self.primary:
+            return llm_request
+        # LiteLlm usa llm_request.model antes que el suyo: copiar con el modelo alternativo
+        return llm_request.model_copy(update={"model": llm.model})
+
+    async def _collect(self, llm: BaseLlm, llm_request: LlmRequest) -> List[LlmResponse]:
+        """Llama a `llm` hasta el final (con timeout) y actualiza su breaker y latencias."""
+        breaker = provider_health.breaker(llm.model)
+        # La prueba half-open se reserva solo al llamar de verdad
+        if not breaker.allow():
+            raise CircuitOpenError(f"{llm.model} is unavailable (circuit open)")
+        probe = breaker.state == "half_open"
+        start = time.perf_counter()
+        try:
+            responses = await asyncio.wait_for(
+                self._drain(llm, self._request_for(llm, llm_request)),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            provider_health.stats["timeouts"] += 1
+            breaker.record_failure()
+            raise asyncio.TimeoutError(f"{llm.model} did not answer within {self.timeout:.0f}s")
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException as error:
+            # Cancelada (p.ej. perdió un hedge): libera la prueba half-open si la tenía
+            if probe:
+                breaker.release()
+            if isinstance(error, asyncio.CancelledError):
+                # Su latencia real es al menos la transcurrida; sin esta muestra las llamadas
+                # lentas desaparecerían del p95 y cada vez se cubrirían más
+                provider_health.record_latency(llm.model, time.perf_counter() - start)
+            raise
+        breaker.record_success()
+        provider_health.record_latency(llm.model, time.perf_counter() - start)
+        return responses
+
+    @staticmethod
+    async def _drain(llm: BaseLlm, llm_request: LlmRequest) -> List[LlmResponse]:
+        return [llm_response async for llm_response in llm.generate_content_async(llm_request, stream=False)]
+
+    def _candidates(self) -> List[BaseLlm]:
+        """Modelos cuyo proveedor acepta llamadas ahora, en orden de preferencia."""
+        return [llm for llm in [self.primary, *self.alternates] if provider_health.breaker(llm.model).available()]
+
+    async def _run_hedged(self, first: BaseLlm, second: BaseLlm, llm_request: LlmRequest) -> List[LlmResponse]:
+        """Lanza `first`; si no responde en su p95, lanza también `second` y usa el primero que termine."""
+        primary_task = asyncio.ensure_future(self._collect(first, llm_request))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=provider_health.hedge_delay(first.model))
+        except BaseException:
+            primary_task.cancel()
+            raise
+        if primary_task in done and primary_task.exception() is None:
+            return primary_task.result()
+
+        if primary_task in done:
+            # El primario falló antes del hedge: failover directo
+            provider_health.stats["failovers"] += 1
+            return await self._collect(second, llm_request)
+
+        provider_health.stats["hedges"] += 1
+        hedge_task = asyncio.ensure_future(self._collect(second, llm_request))
+        pending = {primary_task, hedge_task}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            provider_health.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        provider_health.stats["calls"] += 1
+        candidates = self._candidates()
+        if not candidates:
+            raise CircuitOpenError(
+                f"All providers for {self.model} are unavailable (circuit open): "
+                + ", ".join(sorted({split_model_name(llm.model)[0] for llm in [self.primary, *self.alternates]}))
+            )
+        if candidates[0] is not self.primary:
+            provider_health.stats["failovers"] += 1
+
+        if stream:
+            # En streaming no se cubre la petición: failover solo si falla antes del primer fragmento
+            async for llm_response in self._stream_with_failover(candidates[0], llm_request):
+                yield llm_response
+            return
+
+        if self.hedge and len(candidates) > 1:
+            responses = await self._run_hedged(candidates[0], candidates[1], llm_request)
+        else:
+            responses = None
+            for index, llm in enumerate(candidates):
+                try:
+                    responses = await self._collect(llm, llm_request)
+                except Exception:
+                    if index == len(candidates) - 1:
+                        raise
+                    provider_health.stats["failovers"] += 1
+                    continue
+                break
+        for llm_response in responses:
+            yield llm_response
+
+    async def _stream_with_failover(self, llm: BaseLlm, llm_request: LlmRequest) -> AsyncGenerator[LlmResponse, None]:
+        breaker = provider_health.breaker(llm.model)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{llm.model} is unavailable (circuit open)")
+        probe = breaker.state == "half_open"
+        yielded = False
+        try:
+            async for llm_response in llm.generate_content_async(self._request_for(llm, llm_request), stream=True):
+                yielded = True
+                yield llm_response
+        except Exception as error:
+            breaker.record_failure()
+            failure = error
+        except BaseException:
+            # Stream cancelado o cerrado por el consumidor: libera la prueba half-open
+            if probe:
+                breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return
+        fallback = next((alt for alt in self.alternates if alt is not llm and provider_health.breaker(alt.model).available()), None)
+        if yielded or fallback is None:
+            raise failure
+        provider_health.stats["failovers"] += 1
+        async for llm_response in self._stream_with_failover(fallback, llm_request):
+            yield llm_response
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for item in value.split(","):
+        name, _, target = item.partition("=")
+        if name.strip() and target.strip():
+            pairs[name.strip()] = target.strip()
+    return pairs
+
+
+def alternate_for(model: str, alternates: Dict[str, str]) -> Optional[BaseLlm]:
+    """Modelo alternativo de `model`, si está configurado y su proveedor tiene API key."""
+    target = alternates.get(model)
+    if not target or target == model:
+        return None
+    api_key_env = PROVIDER_API_KEYS.get(split_model_name(target)[0])
+    if api_key_env and not os.getenv(api_key_env):
+        return None
+    return get_model(target, api_key_env)
+
+
+class Resilience:
+    """Aplica ResilientLlm a los agentes con el timeout de cada uno y los alternativos configurados."""
+
+    def __init__(
+        self,
+        timeouts: Optional[Dict[str, float]] = None,
+        alternates: Optional[Dict[str, str]] = None,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        hedge: bool = HEDGE_ENABLED,
+    ):
+        self.timeouts = timeouts or {}
+        self.alternates = alternates or {}
+        self.default_timeout = default_timeout
+        self.hedge = hedge
+
+    def wrap(self, agent) -> None:
+        model = getattr(agent, "model", None)
+        if not isinstance(model, BaseLlm) or isinstance(model, ResilientLlm):
+            return
+        alternate = alternate_for(model.model, self.alternates)
+        agent.model = ResilientLlm(
+            model=model.model,
+            primary=model,
+            alternates=[alternate] if alternate is not None else [],
+            timeout=self.timeouts.get(agent.name, self.default_timeout),
+            hedge=self.hedge,
+        )
+
+    def attach(self, root_agent) -> None:
+        attach_including_lazy(root_agent, self.wrap)
+
+
+def create_resilience_from_env() -> Optional[Resilience]:
+    """Crea la capa de resiliencia según AUTO_RESILIENCE*/AUTO_HEDGE*/AUTO_BREAKER* (None si está desactivada)."""
+    if not RESILIENCE_ENABLED:
+        return None
+    timeouts = {name: float(value) for name, value in _parse_pairs(AGENT_TIMEOUTS).items()}
+    return Resilience(timeouts=timeouts, alternates=_parse_pairs(ALTERNATES))
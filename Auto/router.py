@@ -0,0 +1,253 @@
+"""
+Router local de intenciones para el agente raíz.
+
+Clasifica peticiones claramente inequívocas ("read file...", "search for...", "read this aloud")
+con reglas de palabras clave/regex, sembradas a partir de los ejemplos de delegación de la
+instrucción raíz, y opcionalmente con un pequeño clasificador local (naive Bayes).
+Si la confianza supera el umbral, el router responde en lugar del LLM raíz con la llamada
+a la herramienta del sub-agente, ahorrando un round-trip al modelo.
+Las peticiones ambiguas siguen yendo al LLM.
+
+Se activa con AUTO_FAST_ROUTER=1; umbral con AUTO_ROUTER_THRESHOLD (0.8 por defecto)
+y clasificador con AUTO_ROUTER_CLASSIFIER=1.
+"""
+import os
+import re
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+from google.genai import types
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+ROUTER_ENABLED = os.getenv("AUTO_FAST_ROUTER", "0").lower() in ("1", "true", "yes", "on")
+ROUTER_THRESHOLD = float(os.getenv("AUTO_ROUTER_THRESHOLD", "0.8"))
+ROUTER_CLASSIFIER = os.getenv("AUTO_ROUTER_CLASSIFIER", "0").lower() in ("1", "true", "yes", "on")
+
+# Reglas (regex, peso) por agente. El peso es la confianza que aporta la regla por sí sola.
+ROUTE_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "speaker_agent": [
+        (r"\b(read|say|speak)\b.*\baloud\b", 0.95),
+        (r"\b(convert|turn)\b.*\b(to|into)\s+(speech|audio|voice)\b", 0.95),
+        (r"^\s*(speak|say)\s+(this|the following)\b", 0.9),
+        (r"\bmake\s+(an\s+)?audio\s+(of|from)\b", 0.9),
+        (r"\bgenerate\s+(a\s+)?voice\s+from\b", 0.9),
+        (r"\btext[\s-]to[\s-]speech\b", 0.85),
+        (r"\b(lee|leer|di)\b.*\ben voz alta\b", 0.95),
+        (r"\bconvierte\b.*\b(a|en)\s+(audio|voz)\b", 0.95),
+    ],
+    "web_searcher_agent": [
+        (r"^\s*(search|google|look\s*up)\s+(the\s+web\s+|online\s+)?(for\s+)?\S", 0.9),
+        (r"^\s*find\s+(information|info|news|articles)\s+(about|on)\b", 0.9),
+        (r"^\s*what'?s\s+happening\s+with\b", 0.85),
+        (r"\b(latest|current|recent)\s+news\b", 0.8),
+        (r"^\s*(busca|buscar|investiga)\s+(en\s+(la\s+)?(web|internet)\s+)?\S", 0.9),
+    ],
+    "file_system_agent": [
+        (r"^\s*(read|open|cat|show)\s+(me\s+)?(the\s+)?(content(s)?\s+of\s+)?(the\s+)?(file\b|[~./]\S*)", 0.9),
+        (r"^\s*(create|delete|remove|move|rename|copy|write|edit)\s+(a\s+|an\s+|the\s+|this\s+)?(new\s+|temporary\s+)?(file|files|directory|directories|folder)\b", 0.9),
+        (r"^\s*(move|copy|rename|delete|remove)\s+[~./]\S*", 0.9),
+        (r"^\s*(list|show)\b.*\b(files|directory|folder|folder's)\b", 0.85),
+        (r"^\s*show\s+me\s+what'?s\s+in\s+(this|the|that)\s+(folder|directory)\b", 0.9),
+        (r"^\s*write\s+to\s+(the\s+)?file\b", 0.9),
+        (r"^\s*grep\b|\b(which|what)\s+files\s+(mention|contain|reference|use)\b", 0.9),
+        (r"^\s*search\s+(in\s+)?(my|the|these|those)\s+(files|folder|directory|project|code)\b", 0.9),
+        (r"^\s*(lee|muestra|crea|mueve|elimina|borra)\s+(el|un|la|los)\s+(contenido|archivo|directorio|carpeta|fichero)\b", 0.9),
+    ],
+    "conversational_agent": [
+        (r"^\s*(hi|hello|hey|hola|good\s+(morning|afternoon|evening)|thanks|thank\s+you|gracias)\s*[!.,]*\s*$", 0.9),
+    ],
+}
+
+# Ejemplos semilla para el clasificador local (tomados de la instrucción del agente raíz)
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "conversational_agent": [
+        "I need some advice", "how are you doing today", "let's chat about movies",
+        "I feel stressed about work", "tell me what you think about this idea",
+    ],
+    "web_searcher_agent": [
+        "Search for the latest AI news", "Find information about the Eiffel tower",
+        "What's happening with the stock market", "research current events in Spain",
+        "look up facts about jupiter",
+    ],
+    "file_system_agent": [
+        "Read the content of /home/user/document.txt", "Create a new file with my notes",
+        "List all files in the Downloads folder", "Delete the temporary files",
+        "Move this file to another directory", "Show me what's in this folder",
+        "Copy file to backup", "Write to file", "Create directory projects",
+    ],
+    "speaker_agent": [
+        "Read this aloud", "Convert to speech", "Make audio of this paragraph",
+        "Speak this text", "Generate voice from this text",
+    ],
+}
+
+_TOKEN_RE = re.compile(r"[\w']+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.casefold())
+
+
+class KeywordClassifier:
+    """Naive Bayes multinomial sobre palabras, entrenado con pocos ejemplos por agente."""
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self._word_counts: Dict[str, Counter] = {}
+        self._totals: Dict[str, int] = {}
+        self._vocab = set()
+        for label, texts in examples.items():
+            counts = Counter(token for text in texts for token in _tokenize(text))
+            self._word_counts[label] = counts
+            self._totals[label] = sum(counts.values())
+            self._vocab.update(counts)
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Devuelve (agente, probabilidad) o (None, 0.0) si el texto no tiene palabras conocidas."""
+        tokens = [token for token in _tokenize(text) if token in self._vocab]
+        if not tokens:
+            return None, 0.0
+
+        vocab_size = len(self._vocab)
+        log_probs = {}
+        for label, counts in self._word_counts.items():
+            total = self._totals[label] + vocab_size
+            log_probs[label] = sum(math.log((counts[token] + 1) / total) for token in tokens)
+
+        top = max(log_probs.values())
+        norm = sum(math.exp(value - top) for value in log_probs.values())
+        label = max(log_probs, key=log_probs.get)
+        return label, 1.0 / norm
+
+
+class IntentRouter:
+    """Router de fast-path: reglas + clasificador opcional, con métricas de uso."""
+
+    def __init__(
+        self,
+        available: Iterable[str],
+        threshold: float = ROUTER_THRESHOLD,
+        use_classifier: bool = ROUTER_CLASSIFIER,
+        rules: Optional[Dict[str, List[Tuple[str, float]]]] = None,
+        transfer_targets: Iterable[str] = (),
+    ):
+        self.available = set(available)
+        # Agentes a los que se pasa la conversación con transfer_to_agent (delegación en streaming)
+        self.transfer_targets = set(transfer_targets)
+        self.threshold = threshold
+        self._rules = {
+            agent: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in agent_rules]
+            for agent, agent_rules in (rules or ROUTE_RULES).items()
+            if agent in self.available
+        }
+        self._classifier = KeywordClassifier(SEED_EXAMPLES) if use_classifier else None
+
+        self.stats = {
+            "decisions": 0,
+            "fast_path": 0,
+            "llm_fallback": 0,
+            "routes": defaultdict(int),
+            "classify_seconds": 0.0,
+        }
+        # Latencia media de la decisión del LLM raíz (EMA), para estimar el ahorro del fast-path
+        self._llm_decision_latency: Optional[float] = None
+        self._llm_started: Dict[str, float] = {}
+
+    def classify(self, text: str) -> Tuple[Optional[str], float, str]:
+        """Devuelve (agente, confianza, origen) para un texto de usuario."""
+        scores: Dict[str, float] = {}
+        for agent, agent_rules in self._rules.items():
+            weights = [weight for pattern, weight in agent_rules if pattern.search(text)]
+            if weights:
+                # Cada regla adicional que coincide refuerza un poco la confianza
+                scores[agent] = min(1.0, max(weights) + 0.05 * (len(weights) - 1))
+
+        if scores:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            agent, score = ranked[0]
+            if len(ranked) > 1:
+                # Reglas de varios agentes coinciden: la petición es ambigua
+                score -= ranked[1][1]
+            return agent, score, "rules"
+
+        if self._classifier is not None:
+            agent, probability = self._classifier.predict(text)
+            if agent in self.available:
+                return agent, probability, "classifier"
+
+        return None, 0.0, "none"
+
+    def route(self, text: str) -> Optional[str]:
+        """Devuelve el agente al que delegar directamente, o None si debe decidir el LLM."""
+        start = time.perf_counter()
+        agent, confidence, _ = self.classify(text)
+        self.stats["classify_seconds"] += time.perf_counter() - start
+        self.stats["decisions"] += 1
+
+        if agent is not None and confidence >= self.threshold:
+            self.stats["fast_path"] += 1
+            self.stats["routes"][agent] += 1
+            return agent
+        self.stats["llm_fallback"] += 1
+        return None
+
+    # --- Callbacks del agente raíz ---
+
+    def before_model_callback(self, callback_context, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Si la petición del usuario es inequívoca, responde con la llamada al sub-agente."""
+        text = _pending_user_text(llm_request)
+        if text is None:
+            return None
+
+        agent = self.route(text)
+        if agent is None:
+            self._llm_started[callback_context.invocation_id] = time.perf_counter()
+            return None
+
+        if agent in self.transfer_targets:
+            call = types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent})
+        else:
+            call = types.FunctionCall(name=agent, args={"request": text})
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+    def after_model_callback(self, callback_context, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """Mide cuánto tarda el LLM raíz en decidir, para estimar la latencia ahorrada."""
+        started = self._llm_started.pop(callback_context.invocation_id, None)
+        if started is not None and not llm_response.partial:
+            elapsed = time.perf_counter() - started
+            if self._llm_decision_latency is None:
+                self._llm_decision_latency = elapsed
+            else:
+                self._llm_decision_latency = 0.9 * self._llm_decision_latency + 0.1 * elapsed
+        return None
+
+    def metrics(self) -> Dict[str, Any]:
+        decisions = self.stats["decisions"]
+        fast_path = self.stats["fast_path"]
+        avg_llm = self._llm_decision_latency
+        return {
+            "threshold": self.threshold,
+            "decisions": decisions,
+            "fast_path": fast_path,
+            "llm_fallback": self.stats["llm_fallback"],
+            "hit_rate": (fast_path / decisions) if decisions else 0.0,
+            "routes": dict(self.stats["routes"]),
+            "avg_classify_ms": (self.stats["classify_seconds"] / decisions * 1000) if decisions else 0.0,
+            "avg_llm_decision_ms": (avg_llm * 1000) if avg_llm is not None else None,
+            "estimated_latency_saved_s": (fast_path * avg_llm) if avg_llm is not None else None,
+        }
+
+
+def _pending_user_text(llm_request: LlmRequest) -> Optional[str]:
+    """Texto del último mensaje si es del usuario (primera llamada al modelo del turno)."""
+    if not llm_request.contents:
+        return None
+    last = llm_request.contents[-1]
+    if last.role != "user" or not last.parts:
+        return None
+    if any(part.function_response for part in last.parts):
+        return None
+    text = "".join(part.text for part in last.parts if part.text)
+    return text.strip() or None
@@ -0,0 +1,28 @@
+"""
+Herramientas que piden turno al planificador (Auto/scheduler.py) antes de cada ejecución.
+
+Aparte de scheduler.py porque hereda de BaseTool: importar el planificador (lo hacen models.py
+y `import Auto.agent`) no debe cargar google.adk.
+"""
+from typing import Dict, Any, Optional
+
+from google.adk.tools.base_tool import BaseTool
+
+from .scheduler import Scheduler, scheduler
+
+
+class ScheduledTool(BaseTool):
+    """Envuelve una herramienta (p.ej. MCP de ElevenLabs) para que cada ejecución pida turno de `api_key_env`."""
+
+    def __init__(self, tool: BaseTool, api_key_env: str, owner: Optional[Scheduler] = None):
+        super().__init__(name=tool.name, description=tool.description, is_long_running=tool.is_long_running)
+        self.tool = tool
+        self.api_key_env = api_key_env
+        self._scheduler = owner
+
+    def _get_declaration(self):
+        return self.tool._get_declaration()
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context) -> Any:
+        async with (self._scheduler or scheduler).slot(self.api_key_env):
+            return await self.tool.run_async(args=args, tool_context=tool_context)
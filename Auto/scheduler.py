@@ -0,0 +1,372 @@
+"""
+Planificador central de llamadas salientes por API key.
+
+Todas las llamadas a modelos (ModelRegistry.run), web_search_tool (Firecrawl) y TTS (MCP de
+ElevenLabs) piden un turno al planificador con la variable de entorno de su API key:
+
+    async with scheduler.slot("FIRECRAWL_API_KEY"):
+        ...
+
+Las herramientas síncronas usan `with scheduler.slot_sync(...)`, que bloquea el hilo que la llama.
+
+Por cada key:
+- límite de llamadas en vuelo: AUTO_SCHED_CONCURRENCY="GOOGLE_API_KEY=8,..."
+- token bucket, solo si se configura: AUTO_SCHED_RATES="GOOGLE_API_KEY=60/min,..." (ráfaga = 1/4 del
+  minuto). Las cuotas dependen del plan de cada key y los buckets son por proceso, así que por
+  defecto no se limita el ritmo: un límite inventado frenaría a las keys de pago
+- cola con prioridad: los turnos interactivos pasan antes que el trabajo de fondo (resúmenes de
+  memoria, precalentamiento de audio), marcado con `with scheduler.background():`
+- backpressure: si la cola supera AUTO_SCHED_MAX_QUEUE (la mitad para trabajo de fondo) o la espera
+  supera AUTO_SCHED_MAX_WAIT segundos, el llamador recibe SchedulerBusy en lugar de acumular reintentos
+
+Se desactiva con AUTO_SCHEDULER=0. Métricas (profundidad de cola, esperas, rechazos) con scheduler.metrics().
+"""
+import os
+import time
+import heapq
+import asyncio
+import threading
+import itertools
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional, List, Tuple
+
+from .lifecycle import lifecycle
+
+SCHEDULER_ENABLED = os.getenv("AUTO_SCHEDULER", "1").lower() not in ("0", "false", "no", "off")
+RATES = os.getenv("AUTO_SCHED_RATES", "")
+CONCURRENCY = os.getenv(
+    "AUTO_SCHED_CONCURRENCY",
+    "GOOGLE_API_KEY=8,GROQ_API_KEY=4,FIRECRAWL_API_KEY=5,ELEVENLABS_API_KEY=3",
+)
+DEFAULT_CONCURRENCY = int(os.getenv("AUTO_SCHED_DEFAULT_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.getenv("AUTO_SCHED_MAX_QUEUE", "100"))
+MAX_WAIT = float(os.getenv("AUTO_SCHED_MAX_WAIT", "30"))
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("auto_sched_priority", default=INTERACTIVE)
+
+
+class SchedulerBusy(RuntimeError):
+    """La cola de una API key está llena o la espera superó el máximo (backpressure)."""
+
+
+class KeyLimiter:
+    """Token bucket + límite de concurrencia + cola con prioridad para una API key."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        max_queue: int = MAX_QUEUE,
+        max_wait: float = MAX_WAIT,
+    ):
+        self.name = name
+        # rate en llamadas/segundo; None = sin límite de ritmo
+        self.rate = rate
+        self.burst = burst if burst is not None else (max(1.0, rate * 15) if rate else 0.0)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.tokens = self.burst
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._timer_pending = False
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waits: deque = deque(maxlen=1000)
+        self.stats = {"granted": 0, "queued": 0, "rejected": 0, "timeouts": 0, "throttled": 0, "max_queue_depth": 0, "max_in_flight": 0}
+
+    # --- Estado (con self._lock) ---
+
+    def _refill(self) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_start(self) -> bool:
+        return self.in_flight < self.max_concurrency and (not self.rate or self.tokens >= 1)
+
+    def _start(self) -> None:
+        if self.rate:
+            self.tokens -= 1
+        self.in_flight += 1
+        self.stats["granted"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._heap if not waiter.done())
+
+    def _dispatch(self) -> None:
+        """Da turno a los primeros de la cola mientras haya concurrencia y tokens."""
+        self._refill()
+        while self._heap:
+            waiter = self._heap[0][2]
+            if waiter.done():
+                # Cancelado o expirado mientras esperaba
+                heapq.heappop(self._heap)
+                continue
+            if not self._can_start():
+                # Un timer en un loop ya cerrado (p.ej. el de una llamada síncrona) no va a sonar
+                timer_lost = self._timer_loop is not None and self._timer_loop.is_closed()
+                if self.in_flight < self.max_concurrency and self.rate and (not self._timer_pending or timer_lost):
+                    # Sin tokens: despertar cuando se genere el siguiente
+                    self._timer_pending = True
+                    self._timer_loop = waiter.get_loop()
+                    delay = (1 - self.tokens) / self.rate
+                    waiter.get_loop().call_soon_threadsafe(
+                        lambda loop=waiter.get_loop(): loop.call_later(delay, self._on_timer)
+                    )
+                return
+            heapq.heappop(self._heap)
+            self._start()
+            waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # El llamador se fue entre el turno y este callback: devolver el hueco
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer_pending = False
+            self._dispatch()
+
+    # --- API ---
+
+    async def acquire(self, priority: int = INTERACTIVE) -> float:
+        """Espera turno; devuelve los segundos de espera. Lanza SchedulerBusy si hay backpressure."""
+        start = time.monotonic()
+        with self._lock:
+            self._refill()
+            if not self._heap and self._can_start():
+                self._start()
+                self._waits.append(0.0)
+                return 0.0
+            depth = self.queue_depth()
+            limit = self.max_queue if priority <= INTERACTIVE else self.max_queue // 2
+            if depth >= limit:
+                self.stats["rejected"] += 1
+                raise SchedulerBusy(f"{self.name}: {depth} calls already queued")
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._heap, (priority, next(self._counter), waiter))
+            self.stats["queued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], depth + 1)
+            self._dispatch()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.stats["timeouts"] += 1
+            raise SchedulerBusy(f"{self.name}: waited more than {self.max_wait:.0f}s for a slot")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        waited = time.monotonic() - start
+        self._waits.append(waited)
+        return waited
+
+    def try_acquire(self) -> bool:
+        """Toma un turno solo si está libre ahora mismo, sin esperar ni encolarse."""
+        with self._lock:
+            self._refill()
+            if self._heap or not self._can_start():
+                return False
+            self._start()
+            self._waits.append(0.0)
+            return True
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        # Si el turno llegó justo a la vez que el timeout/cancelación, devolverlo
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+        else:
+            waiter.cancel()
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def throttle(self, seconds: float) -> None:
+        """El proveedor devolvió 429: vaciar el bucket para que nadie más llame durante `seconds`."""
+        if not self.rate:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+            self.stats["throttled"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            waits = sorted(self._waits)
+            depth = self.queue_depth()
+
+        def at(fraction: float) -> float:
+            return waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000 if waits else 0.0
+
+        return {
+            **self.stats,
+            "rate_per_second": self.rate,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": depth,
+            "tokens": round(self.tokens, 2) if self.rate else None,
+            "wait_ms": {"p50": at(0.5), "p95": at(0.95), "max": waits[-1] * 1000 if waits else 0.0},
+        }
+
+
+class Scheduler:
+    """Un KeyLimiter por API key, creado con la configuración de AUTO_SCHED_* la primera vez."""
+
+    INTERACTIVE = INTERACTIVE
+    BACKGROUND = BACKGROUND
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        max_queue: int = MAX_QUEUE,
+        max_wait: float = MAX_WAIT,
+        enabled: bool = SCHEDULER_ENABLED,
+    ):
+        self.rates = rates or {}
+        self.concurrency = concurrency or {}
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self.limiters: Dict[str, KeyLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, key: str) -> KeyLimiter:
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self.limiters.get(key)
+                if limiter is None:
+                    limiter = self.limiters[key] = KeyLimiter(
+                        key,
+                        rate=self.rates.get(key),
+                        max_concurrency=self.concurrency.get(key, DEFAULT_CONCURRENCY),
+                        max_queue=self.max_queue,
+                        max_wait=self.max_wait,
+                    )
+        return limiter
+
+    def configure(self, key: str, **options) -> KeyLimiter:
+        """Reemplaza el limitador de `key` (p.ej. en pruebas y benchmarks)."""
+        options.setdefault("max_queue", self.max_queue)
+        options.setdefault("max_wait", self.max_wait)
+        with self._lock:
+            limiter = self.limiters[key] = KeyLimiter(key, **options)
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str], priority: Optional[int] = None):
+        """Ocupa un turno de `key` mientras dura el bloque."""
+        if not self.enabled or not key:
+            yield
+            return
+        limiter = self.limiter(key)
+        await limiter.acquire(_priority.get() if priority is None else priority)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    @contextmanager
+    def slot_sync(self, key: Optional[str], priority: Optional[int] = None):
+        """Versión bloqueante de slot() para herramientas síncronas.
+
+        Desde un hilo de trabajo espera turno en el loop de servicio (o en uno propio si no lo hay).
+        En el hilo de un event loop no se puede bloquear: toma el turno si está libre y, si no,
+        lanza SchedulerBusy.
+        """
+        if not self.enabled or not key:
+            yield
+            return
+        limiter = self.limiter(key)
+        priority = _priority.get() if priority is None else priority
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            if not limiter.try_acquire():
+                limiter.stats["rejected"] += 1
+                raise SchedulerBusy(f"{key}: no free slot for a synchronous call on the event loop")
+        else:
+            serving = lifecycle.loop
+            if serving is not None and serving.is_running():
+                asyncio.run_coroutine_threadsafe(limiter.acquire(priority), serving).result()
+            else:
+                asyncio.run(limiter.acquire(priority))
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    @staticmethod
+    @contextmanager
+    def background():
+        """Marca las llamadas del bloque (y de las tareas que cree) como trabajo de fondo."""
+        token = _priority.set(BACKGROUND)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "keys": {key: limiter.metrics() for key, limiter in sorted(self.limiters.items())},
+        }
+
+
+def scheduled_tools(tools: List[Any], api_key_env: str) -> List[Any]:
+    """Envuelve cada herramienta de la lista con ScheduledTool (sin envolver dos veces)."""
+    # ScheduledTool hereda de BaseTool: google.adk (~1 s) solo se importa al envolver herramientas
+    from .scheduled_tool import ScheduledTool
+
+    return [tool if isinstance(tool, ScheduledTool) else ScheduledTool(tool, api_key_env) for tool in tools]
+
+
+def _parse_rate(value: str) -> float:
+    """'60/min' -> 1.0; '2/s' o '2' -> 2.0 llamadas por segundo."""
+    count, _, unit = value.strip().partition("/")
+    seconds = {"": 1, "s": 1, "sec": 1, "min": 60, "m": 60, "h": 3600, "hour": 3600}[unit.strip().lower()]
+    return float(count) / seconds
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for item in value.split(","):
+        name, _, setting = item.partition("=")
+        if name.strip() and setting.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def create_scheduler_from_env() -> Scheduler:
+    """Crea el planificador según AUTO_SCHEDULER/AUTO_SCHED_*."""
+    return Scheduler(
+        rates={key: _parse_rate(rate) for key, rate in _parse_pairs(RATES).items()},
+        concurrency={key: int(limit) for key, limit in _parse_pairs(CONCURRENCY).items()},
+    )
+
+
+scheduler = create_scheduler_from_env()
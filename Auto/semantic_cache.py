@@ -0,0 +1,392 @@
+"""
+Cache semántico de respuestas para sub-agentes (opt-in).
+
+Delante de las llamadas al modelo de los sub-agentes (conversational_agent, web_searcher_agent):
+- before_model_callback: si la petición es independiente (un único mensaje del usuario, como en
+  las delegaciones vía AgentTool), normaliza el texto, lo convierte en un embedding local
+  (n-gramas de caracteres y palabras con hashing, en NumPy, solo CPU) y busca el vecino más
+  cercano en un índice en memoria. Si la similitud coseno supera el umbral y las palabras de
+  contenido y los números coinciden lo suficiente, responde con la respuesta cacheada sin llamar
+  al modelo.
+- after_model_callback: guarda la respuesta final del turno (la que no llama a herramientas)
+  asociada a la petición original.
+
+Cada agente tiene su índice, con TTL y desalojo LRU. Una fracción de los aciertos se audita
+(AUTO_SEMANTIC_CACHE_AUDIT): se llama igualmente al modelo y, si su respuesta se parece poco a la
+cacheada, se registra como posible falso acierto.
+
+Configuración:
+- AUTO_SEMANTIC_CACHE=1 para activarlo
+- AUTO_SEMANTIC_CACHE_AGENTS="conversational_agent,web_searcher_agent" (agentes con cache)
+- AUTO_SEMANTIC_CACHE_THRESHOLD (0.9), AUTO_SEMANTIC_CACHE_TTL (3600 s),
+  AUTO_SEMANTIC_CACHE_TTLS="web_searcher_agent=600" (TTL por agente), AUTO_SEMANTIC_CACHE_SIZE (1000)
+"""
+import os
+import re
+import time
+import random
+import hashlib
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .callbacks import add_callbacks, attach_including_lazy
+
+SEMANTIC_CACHE_ENABLED = os.getenv("AUTO_SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes", "on")
+CACHED_AGENTS = os.getenv("AUTO_SEMANTIC_CACHE_AGENTS", "conversational_agent,web_searcher_agent")
+THRESHOLD = float(os.getenv("AUTO_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+# Fracción mínima de palabras de contenido compartidas (evita "tiempo en París" ≈ "tiempo en Roma")
+MIN_WORD_OVERLAP = float(os.getenv("AUTO_SEMANTIC_CACHE_MIN_OVERLAP", "0.5"))
+DEFAULT_TTL = float(os.getenv("AUTO_SEMANTIC_CACHE_TTL", "3600"))
+AGENT_TTLS = os.getenv("AUTO_SEMANTIC_CACHE_TTLS", "web_searcher_agent=600")
+MAX_ENTRIES = int(os.getenv("AUTO_SEMANTIC_CACHE_SIZE", "1000"))
+AUDIT_RATE = float(os.getenv("AUTO_SEMANTIC_CACHE_AUDIT", "0.05"))
+# Similitud mínima entre la respuesta auditada y la cacheada para no marcar un falso acierto
+AUDIT_THRESHOLD = float(os.getenv("AUTO_SEMANTIC_CACHE_AUDIT_THRESHOLD", "0.5"))
+
+DIMENSIONS = 2048
+CHAR_NGRAMS = (3, 4, 5)
+WORD_WEIGHT = 2.0
+MAX_AUDITS = 200
+MAX_PENDING = 1000
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+STOPWORDS = frozenset("""
+a an the is are was were be been am do does did of in on at to for from with by about as and or but
+if then so than that this these those it its i me my we our you your he she they them their what
+whats which who whom how when where why can could would should will shall may might must please tell
+give show let us some any there here just like
+el la los las un una unos unas de del en con por para al y o que es son fue ser como cual cuales quien
+qué cómo cuál dónde cuándo mi mis tu tus su sus me te se lo le les nos muy más por favor dime
+""".split())
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin acentos ni puntuación y con espacios colapsados."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    # Contracciones: "what's" -> "whats", "don't" -> "dont"
+    text = re.sub(r"(\w)['’](\w)", r"\1\2", text)
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", text)).strip()
+
+
+def content_words(normalized: str) -> frozenset:
+    # Sufijos de plural simples para que "files" y "file" cuenten como la misma palabra
+    return frozenset(
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in normalized.split() if word not in STOPWORDS
+    )
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "big")
+    return value % DIMENSIONS, (1.0 if value >> 63 else -1.0)
+
+
+def embed(normalized: str) -> "np.ndarray":
+    """Embedding local: palabras de contenido y sus n-gramas de caracteres con hashing, normalizado L2.
+
+    Las palabras vacías no cuentan ("how do I..." ≈ "how can I...") y el orden de las palabras
+    tampoco ("a cat joke" ≈ "a joke about cats").
+    """
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    words = content_words(normalized) or frozenset(normalized.split())
+    for word in words:
+        index, sign = _bucket("w:" + word)
+        vector[index] += sign * WORD_WEIGHT
+        padded = f" {word} "
+        for size in CHAR_NGRAMS:
+            for start in range(len(padded) - size + 1):
+                index, sign = _bucket(padded[start:start + size])
+                vector[index] += sign
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """Índice de vecinos más cercanos en memoria (producto escalar sobre una matriz), con TTL y LRU."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._matrix = np.zeros((max_entries, DIMENSIONS), dtype=np.float32)
+        self._valid = np.zeros(max_entries, dtype=bool)
+        # clave normalizada -> (fila, instante de inserción, palabras de contenido, respuesta)
+        self._entries: "OrderedDict[str, Tuple[int, float, frozenset, str]]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._keys_by_row: Dict[int, str] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        row = self._entries.pop(key)[0]
+        self._valid[row] = False
+        del self._keys_by_row[row]
+        self._free.append(row)
+
+    def put(self, key: str, vector: "np.ndarray", answer: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if not self._free:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        row = self._free.pop()
+        self._matrix[row] = vector
+        self._valid[row] = True
+        self._keys_by_row[row] = key
+        self._entries[key] = (row, time.time(), content_words(key), answer)
+
+    def search(self, key: str, vector: "np.ndarray") -> Optional[Tuple[str, float, str]]:
+        """Devuelve (clave, similitud, respuesta) del vecino más cercano vigente, o None."""
+        now = time.time()
+        exact = self._entries.get(key)
+        if exact is not None and now - exact[1] <= self.ttl:
+            self._entries.move_to_end(key)
+            return key, 1.0, exact[3]
+        if not self._entries:
+            return None
+
+        scores = self._matrix @ vector
+        scores[~self._valid] = -1.0
+        while True:
+            row = int(np.argmax(scores))
+            if scores[row] < 0:
+                return None
+            match = self._keys_by_row[row]
+            _, stored_at, _, answer = self._entries[match]
+            if now - stored_at > self.ttl:
+                self._remove(match)
+                self.expirations += 1
+                scores[row] = -1.0
+                continue
+            self._entries.move_to_end(match)
+            return match, float(scores[row]), answer
+
+    def words(self, key: str) -> frozenset:
+        return self._entries[key][2]
+
+
+def _word_overlap(first: frozenset, second: frozenset) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _numbers(text: str) -> frozenset:
+    return frozenset(_NUMBER_RE.findall(text))
+
+
+def _standalone_prompt(llm_request) -> Optional[str]:
+    """Texto del usuario si la petición es independiente: un único mensaje, sin herramientas."""
+    texts = []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.function_call or part.function_response:
+                return None
+            if part.text and content.role == "user":
+                texts.append(part.text)
+        if content.role != "user" and any(part.text for part in content.parts or []):
+            return None
+    if len(texts) != 1:
+        return None
+    return texts[0].strip() or None
+
+
+def _response_text(llm_response) -> Optional[str]:
+    """Texto de una respuesta final (sin llamadas a herramientas)."""
+    content = llm_response.content
+    if content is None or not content.parts:
+        return None
+    if any(part.function_call for part in content.parts):
+        return None
+    text = "".join(part.text or "" for part in content.parts if not part.thought)
+    return text.strip() or None
+
+
+class SemanticCache:
+    """Cache semántico de respuestas finales por agente."""
+
+    def __init__(
+        self,
+        agents: List[str],
+        threshold: float = THRESHOLD,
+        min_word_overlap: float = MIN_WORD_OVERLAP,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        max_entries: int = MAX_ENTRIES,
+        audit_rate: float = AUDIT_RATE,
+    ):
+        self.agents = set(agents)
+        self.threshold = threshold
+        self.min_word_overlap = min_word_overlap
+        self.audit_rate = audit_rate
+        ttls = ttls or {}
+        self._indexes = {agent: VectorIndex(ttls.get(agent, default_ttl), max_entries) for agent in self.agents}
+        # invocation_id -> (agente, clave, vector, respuesta cacheada si es una auditoría)
+        self._pending: Dict[str, Tuple[str, str, Any, Optional[str]]] = {}
+        self._lookup_seconds: deque = deque(maxlen=1000)
+        self.audits: deque = deque(maxlen=MAX_AUDITS)
+        self.stats = {agent: {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "near_misses": 0} for agent in self.agents}
+        self.audit_stats = {"audited": 0, "false_hits": 0}
+
+    def _remember(self, invocation_id: str, pending: Tuple[str, str, Any, Optional[str]]) -> None:
+        # Invocaciones que fallan antes de la respuesta final nunca se resuelven: acotar el dict
+        while len(self._pending) >= MAX_PENDING:
+            self._pending.pop(next(iter(self._pending)))
+        self._pending[invocation_id] = pending
+
+    def _lookup(self, agent: str, prompt: str) -> Tuple[str, Any, Optional[Tuple[str, float, str]]]:
+        start = time.perf_counter()
+        key = normalize(prompt)
+        vector = embed(key)
+        match = self._indexes[agent].search(key, vector)
+        if match is not None and match[0] != key:
+            matched_key, similarity, _ = match
+            words = content_words(key)
+            if (
+                similarity < self.threshold
+                or _word_overlap(words, self._indexes[agent].words(matched_key)) < self.min_word_overlap
+                or _numbers(key) != _numbers(matched_key)
+            ):
+                if similarity >= self.threshold:
+                    self.stats[agent]["near_misses"] += 1
+                match = None
+        self._lookup_seconds.append(time.perf_counter() - start)
+        return key, vector, match
+
+    # --- Callbacks ---
+
+    def before_model_callback(self, callback_context, llm_request):
+        agent = callback_context.agent_name
+        if agent not in self.agents:
+            return None
+        prompt = _standalone_prompt(llm_request)
+        if prompt is None:
+            return None
+
+        stats = self.stats[agent]
+        stats["lookups"] += 1
+        key, vector, match = self._lookup(agent, prompt)
+        if match is None:
+            stats["misses"] += 1
+            self._remember(callback_context.invocation_id, (agent, key, vector, None))
+            return None
+
+        stats["hits"] += 1
+        if self.audit_rate and random.random() < self.audit_rate:
+            # Auditoría: se llama igualmente al modelo y se compara en after_model_callback
+            self._remember(callback_context.invocation_id, (agent, key, vector, match[2]))
+            return None
+
+        from google.genai import types
+        from google.adk.models.llm_response import LlmResponse
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=match[2])]),
+            custom_metadata={"semantic_cache": {"matched": match[0], "similarity": round(match[1], 4)}},
+        )
+
+    def after_model_callback(self, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        pending = self._pending.get(callback_context.invocation_id)
+        if pending is None:
+            return None
+        answer = _response_text(llm_response)
+        if answer is None:
+            # Llamada intermedia (p.ej. a web_search_tool): la respuesta final llega después
+            return None
+        del self._pending[callback_context.invocation_id]
+
+        agent, key, vector, cached_answer = pending
+        if cached_answer is not None:
+            similarity = float(embed(normalize(answer)) @ embed(normalize(cached_answer)))
+            self.audit_stats["audited"] += 1
+            false_hit = similarity < AUDIT_THRESHOLD
+            if false_hit:
+                self.audit_stats["false_hits"] += 1
+            self.audits.append({
+                "agent": agent,
+                "prompt": key,
+                "answer_similarity": round(similarity, 4),
+                "false_hit": false_hit,
+                "timestamp": time.time(),
+            })
+            return None
+
+        if not llm_response.error_code:
+            self._indexes[agent].put(key, vector, answer)
+            self.stats[agent]["stores"] += 1
+        return None
+
+    def attach(self, root_agent) -> None:
+        """Aplica el cache a los agentes de `agents` dentro del árbol del agente raíz."""
+        attach_including_lazy(root_agent, self._attach_agent)
+
+    def _attach_agent(self, agent) -> None:
+        if agent.name in self.agents:
+            add_callbacks(
+                agent,
+                before_model_callback=self.before_model_callback,
+                after_model_callback=self.after_model_callback,
+            )
+
+    def metrics(self) -> Dict[str, Any]:
+        samples = sorted(self._lookup_seconds)
+
+        def at(fraction: float) -> float:
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000 if samples else 0.0
+
+        agents = {}
+        for agent, stats in self.stats.items():
+            index = self._indexes[agent]
+            agents[agent] = {
+                **stats,
+                "hit_rate": (stats["hits"] / stats["lookups"]) if stats["lookups"] else 0.0,
+                "entries": len(index),
+                "evictions": index.evictions,
+                "expirations": index.expirations,
+            }
+        audited = self.audit_stats["audited"]
+        return {
+            "agents": agents,
+            "lookup_ms": {"p50": at(0.5), "p95": at(0.95), "max": samples[-1] * 1000 if samples else 0.0},
+            "audits": {
+                **self.audit_stats,
+                "false_hit_rate": (self.audit_stats["false_hits"] / audited) if audited else None,
+                "recent_false_hits": [audit for audit in self.audits if audit["false_hit"]][-10:],
+            },
+        }
+
+
+def _parse_ttls(value: str) -> Dict[str, float]:
+    ttls = {}
+    for item in value.split(","):
+        name, _, ttl = item.partition("=")
+        if name.strip() and ttl.strip():
+            ttls[name.strip()] = float(ttl)
+    return ttls
+
+
+def create_semantic_cache_from_env() -> Optional[SemanticCache]:
+    """Crea el cache según AUTO_SEMANTIC_CACHE* (None si está desactivado o falta NumPy)."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if not NUMPY_AVAILABLE:
+        print("⚠️ AUTO_SEMANTIC_CACHE requires numpy: pip install numpy")
+        return None
+    agents = [agent.strip() for agent in CACHED_AGENTS.split(",") if agent.strip()]
+    return SemanticCache(agents, ttls=_parse_ttls(AGENT_TTLS))
@@ -0,0 +1,129 @@
+"""
+Delegación en streaming y tiempo hasta el primer token (TTFT) por ruta.
+
+Con AgentTool el sub-agente corre en un Runner anidado sin streaming: su respuesta completa
+vuelve al agente raíz como resultado de herramienta y el raíz la regenera antes de que el
+usuario vea nada. Con AUTO_STREAM_DELEGATION=1 el agente raíz pasa las peticiones que un solo
+especialista resuelve con transfer_to_agent: el sub-agente corre en la misma invocación, sus
+tokens llegan al cliente según se generan (RunConfig con StreamingMode.SSE, p.ej. ADK web con
+streaming) y su respuesta es la final, sin la llamada extra del raíz. AgentTool se mantiene
+para las peticiones que combinan varios especialistas y para los agentes MCP en modo lazy.
+
+Los sub-agentes no pueden transferir de vuelta ni entre ellos: cada turno nuevo vuelve a empezar
+en el agente raíz, igual que con AgentTool.
+
+FirstTokenTracker (AUTO_TTFT_METRICS, activo por defecto) mide el tiempo desde el inicio del
+turno hasta la primera respuesta con texto, por ruta (sub-agente que respondió o al que se delegó).
+"""
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Iterable
+
+from .callbacks import add_callbacks, attach_including_lazy
+
+STREAM_DELEGATION = os.getenv("AUTO_STREAM_DELEGATION", "0").lower() in ("1", "true", "yes", "on")
+TTFT_METRICS = os.getenv("AUTO_TTFT_METRICS", "1").lower() not in ("0", "false", "no", "off")
+MAX_TURNS = 1000
+SAMPLES_PER_ROUTE = 1000
+
+STREAM_INSTRUCTION = """
+
+STREAMING HAND-OFF:
+When a single specialist can fully answer the request (a chat reply, one web search, one file
+operation, one text-to-speech conversion), hand the conversation over with
+transfer_to_agent(agent_name=...) instead of calling its tool: the specialist answers the user
+directly and its reply is streamed as it is written. Keep using the agent tools (or
+delegate_in_parallel) when you need to combine or post-process the results of several specialists.
+"""
+
+
+def enable_streaming_delegation(sub_agents: Iterable[Any]) -> List[str]:
+    """Prepara los sub-agentes para recibir transferencias del raíz; devuelve sus nombres."""
+    names = []
+    for agent in sub_agents:
+        # Responden y devuelven el control: el siguiente turno lo decide otra vez el raíz
+        agent.disallow_transfer_to_parent = True
+        agent.disallow_transfer_to_peers = True
+        names.append(agent.name)
+    return names
+
+
+def _response_text(llm_response) -> str:
+    if llm_response.content is None or not llm_response.content.parts:
+        return ""
+    return "".join(part.text for part in llm_response.content.parts if part.text and not part.thought)
+
+
+class _Turn:
+    __slots__ = ("started", "route")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.route: Optional[str] = None
+
+
+class FirstTokenTracker:
+    """Callbacks que miden el TTFT de cada turno del agente raíz, agrupado por ruta."""
+
+    def __init__(self, max_turns: int = MAX_TURNS):
+        self.max_turns = max_turns
+        self.root_name: Optional[str] = None
+        # invocation_id -> turno en curso (las invocaciones de AgentTool anidados no están aquí)
+        self._turns: "OrderedDict[str, _Turn]" = OrderedDict()
+        self._samples: Dict[str, deque] = {}
+
+    def before_agent_callback(self, callback_context):
+        if callback_context.agent_name == self.root_name:
+            self._turns[callback_context.invocation_id] = _Turn(time.perf_counter())
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+        return None
+
+    def before_tool_callback(self, tool, args, tool_context):
+        turn = self._turns.get(tool_context.invocation_id)
+        if turn is not None and turn.route is None:
+            # Ruta del turno: agente transferido o herramienta a la que delegó el raíz (LLM o router)
+            turn.route = args.get("agent_name") if tool.name == "transfer_to_agent" else tool.name
+        return None
+
+    def after_model_callback(self, callback_context, llm_response):
+        turn = self._turns.get(callback_context.invocation_id)
+        if turn is None or not _response_text(llm_response):
+            return None
+        del self._turns[callback_context.invocation_id]
+        route = turn.route or callback_context.agent_name
+        samples = self._samples.setdefault(route, deque(maxlen=SAMPLES_PER_ROUTE))
+        samples.append(time.perf_counter() - turn.started)
+        return None
+
+    def attach(self, root_agent) -> None:
+        self.root_name = root_agent.name
+        add_callbacks(
+            root_agent,
+            first=True,
+            before_agent_callback=self.before_agent_callback,
+            before_tool_callback=self.before_tool_callback,
+        )
+        attach_including_lazy(root_agent, self._attach_agent)
+
+    def _attach_agent(self, agent) -> None:
+        add_callbacks(agent, first=True, after_model_callback=self.after_model_callback)
+
+    def metrics(self) -> Dict[str, Any]:
+        routes = {}
+        for route, samples in self._samples.items():
+            ordered = sorted(samples)
+            routes[route] = {
+                "count": len(ordered),
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+            }
+        return {"streaming_delegation": STREAM_DELEGATION, "ttft": routes}
+
+
+def create_first_token_tracker_from_env() -> Optional[FirstTokenTracker]:
+    """Crea el medidor de TTFT según AUTO_TTFT_METRICS (None si está desactivado)."""
+    if not TTFT_METRICS:
+        return None
+    return FirstTokenTracker()
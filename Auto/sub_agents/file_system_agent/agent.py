@@ -1,36 +1,93 @@
 import os
 import asyncio
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
-model = LiteLlm(
-    model="gemini/gemini-1.5-flash",
-    api_key=os.getenv("GOOGLE_API_KEY"),
+from ...models import get_model
+from ...lifecycle import lifecycle
+from ...mcp_pool import pool_available, pooled_tools, bridge_command, server_command, connect_server
+from .native_tools import FS_ROOT, NATIVE_TOOLS
+from .pagination import continuations, read_continuation
+from .read_cache import create_read_cache_from_env
+from .search_index import get_search_index, search_files
+
+MODEL = "gemini/gemini-1.5-flash"
+
+# "mcp" (servidor file-system-mcp) o "native" (herramientas en proceso)
+FS_BACKEND = os.getenv("AUTO_FS_BACKEND", "mcp").lower()
+# Si el servidor MCP no arranca, usar las herramientas nativas en lugar de un agente sin herramientas.
+# Solo con una raíz explícita (AUTO_FS_ROOT): si no, un fallo del servidor daría al modelo escritura
+# y borrado sobre el directorio de trabajo del proceso sin que nadie lo haya pedido
+NATIVE_FALLBACK = (
+    os.getenv("AUTO_FS_NATIVE_FALLBACK", "1").lower() not in ("0", "false", "no", "off")
+    and bool(os.getenv("AUTO_FS_ROOT"))
 )
 
+# Cache de lecturas compartido por el proceso; se crea con el agente (None si AUTO_FS_CACHE=0)
+_read_cache = None
+_read_cache_ready = False
+
+def get_read_cache():
+    global _read_cache, _read_cache_ready
+    if not _read_cache_ready:
+        _read_cache = create_read_cache_from_env()
+        _read_cache_ready = True
+        if _read_cache is not None:
+            lifecycle.register("fs_read_cache", _read_cache.close)
+    return _read_cache
+
+def _search_tools():
+    """search_files si el índice de contenido está activo (AUTO_FS_INDEX)."""
+    return [search_files] if get_search_index() is not None else []
+
+def _search_capability(indent: str) -> str:
+    """Línea de CORE CAPABILITIES sobre search_files, vacía si el índice está desactivado."""
+    if get_search_index() is None:
+        return ""
+    return f"\n{indent}- Find which files contain some text (search_files: a local index of the files\n{indent}  under the root), instead of reading files one by one"
+
+def _tool_callbacks(*after_tool_callbacks):
+    """Callbacks de cache de lecturas e índice de contenido, seguidos de `after_tool_callbacks`."""
+    read_cache = get_read_cache()
+    search_index = get_search_index()
+    # El cache guarda la respuesta original: su after_tool_callback va antes que el recorte de resultados
+    after = [read_cache.after_tool_callback] if read_cache else []
+    if search_index is not None:
+        after.append(search_index.after_tool_callback)
+    after.extend(after_tool_callbacks)
+    return {
+        "before_tool_callback": read_cache.before_tool_callback if read_cache else None,
+        "after_tool_callback": after or None,
+    }
+
 async def get_tools_async():
     """Conecta al servidor MCP de File System via uvx y retorna las herramientas."""
     print("--- Attempting to start and connect to file-system-mcp MCP server via uvx ---")
     
     try:
-        # Importar correctamente MCPToolset
-        from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-        
-        # Verificar si uvx está disponible
-        await asyncio.create_subprocess_shell(
-            'uvx --version', 
-            stdout=asyncio.subprocess.PIPE, 
-            stderr=asyncio.subprocess.PIPE
-        )
+        pooled = None
+        if pool_available('file-system'):
+            # Usar un proceso caliente del pool compartido (python Auto/mcp_pool.py serve)
+            print("--- Using pooled file-system-mcp server ---")
+            # Con las herramientas en cache no hace falta conectarse hasta la primera llamada
+            pooled = pooled_tools('file-system')
+            command, args = bridge_command('file-system')
+            env = None
+        else:
+            command, args, env = server_command('file-system')
+            if command == 'uvx':
+                # Verificar si uvx está disponible
+                probe = await asyncio.create_subprocess_shell(
+                    'uvx --version', 
+                    stdout=asyncio.subprocess.PIPE, 
+                    stderr=asyncio.subprocess.PIPE
+                )
+                # Esperarlo para que no quede como zombi
+                await probe.communicate()
 
-        # Crear conexión usando el método correcto
-        toolset = MCPToolset()
-        tools, exit_stack = await toolset.connect_to_server(
-            connection_params=StdioServerParameters(
-                command='uvx',
-                args=['file-system-mcp'],
-            )
-        )
+        if pooled is not None:
+            tools, exit_stack = pooled
+        else:
+            tools, exit_stack = await connect_server(command, args, env=env or None)
         
         print(f"--- Successfully connected to file-system-mcp server. Discovered {len(tools)} tool(s). ---")
         for tool in tools:
@@ -53,18 +110,74 @@ async def get_tools_async():
         print(f"--- ERROR connecting to file-system-mcp server: {e} ---")
         return [], None
 
+def create_native_agent() -> Agent:
+    """Crea el agente con las herramientas nativas en proceso (sin servidor MCP)."""
+    return Agent(
+        name="file_system_agent",
+        description="File System agent that provides complete file system access using MCP File System tools",
+        model=get_model(MODEL, "GOOGLE_API_KEY"),
+        instruction=f"""
+        You are a File System Agent specialized in interacting with the file system through your file tools.
+        All paths are confined to the root directory {FS_ROOT}; relative paths are resolved from it.
+        
+        CORE CAPABILITIES:
+        - Read file contents (read_file): head, tail (tail_lines), line or byte ranges
+        - Write and create new files with specified content (write_file)
+        - Move and rename files and directories (move_file)
+        - Delete files and empty directories (delete_file, with caution)
+        - Create directories and directory structures (create_directory)
+        - List directory contents and file information, page by page and filtered by glob pattern (list_directory){_search_capability("        ")}
+        
+        WORKFLOW:
+        1. **Receive Request:** Get file system operation request from Auto coordinator
+        2. **Execute Operation:** Use the appropriate tool for the requested operation
+        3. **Handle Results:** Process and format the results appropriately
+        4. **Error Management:** Provide clear error messages and suggest solutions
+        
+        LARGE FILES AND DIRECTORIES:
+        - Every result is size-limited. read_file returns at most one chunk ("truncated": true);
+          continue with the returned next_cursor, or jump with tail_lines, start_line/end_line or byte_offset/byte_length
+        - For logs and other big files, prefer tail_lines or a line range over reading from the start
+        - list_directory is paginated; pass next_cursor while "has_more" is true, and use pattern (e.g. "*.py") to narrow it
+        - Only read further chunks when the user's request needs them
+        
+        SAFETY GUIDELINES:
+        - **Warn users** about potentially dangerous operations (delete, overwrite)
+        - **Be cautious with destructive operations** and confirm with user when needed
+        - Paths outside the root directory are rejected; explain this if it happens
+        
+        RESPONSE FORMAT:
+        - Always acknowledge the requested operation
+        - Provide clear status (success/failure)
+        - Include relevant details (file size, modification date, etc.)
+        - Suggest next steps or related operations when helpful
+        """,
+        tools=NATIVE_TOOLS + _search_tools(),
+        **_tool_callbacks(),
+    )
+
 async def create_agent():
     """Crea la instancia del agente después de obtener herramientas del servidor MCP."""
+    if FS_BACKEND == "native":
+        print("--- Using native in-process file system tools ---")
+        return create_native_agent(), None
+    
     tools, exit_stack = await get_tools_async()
     
+    if not tools and NATIVE_FALLBACK:
+        print(f"--- WARNING: No tools discovered from MCP server. Falling back to native file system tools (root: {FS_ROOT}). ---")
+        return create_native_agent(), None
+    
     if not tools:
         print("--- WARNING: No tools discovered from MCP server. Creating agent without File System functionality. ---")
+        if not os.getenv("AUTO_FS_ROOT"):
+            print("--- Set AUTO_FS_ROOT to fall back to the native file system tools confined to that directory. ---")
         
         # Crear agente con funcionalidad simulada
         agent_instance = Agent(
             name="file_system_agent",
             description="File System agent (MCP server unavailable - limited functionality)",
-            model=model,
+            model=get_model(MODEL, "GOOGLE_API_KEY"),
             instruction="""
             You are a File System Agent, but unfortunately the File System MCP server is currently unavailable.
             
@@ -89,8 +202,8 @@ async def create_agent():
         agent_instance = Agent(
             name="file_system_agent",
             description="File System agent that provides complete file system access using MCP File System tools",
-            model=model,
-            instruction="""
+            model=get_model(MODEL, "GOOGLE_API_KEY"),
+            instruction=f"""
             You are a File System Agent specialized in interacting with the file system through MCP server tools.
             
             CORE CAPABILITIES:
@@ -100,7 +213,7 @@ async def create_agent():
             - Delete files and directories (with caution)
             - Create directories and directory structures
             - List directory contents and file information
-            - Check file permissions and properties
+            - Check file permissions and properties{_search_capability("            ")}
             
             WORKFLOW:
             1. **Receive Request:** Get file system operation request from Auto coordinator
@@ -127,6 +240,8 @@ async def create_agent():
             - **Check permissions** and provide clear error messages if access denied
             - **Never use native Python file operations** - always use MCP tools
             - **Provide file content previews** for large files (first few lines)
+            - Large tool results are truncated ("truncated": true); call read_continuation with the
+              continuation_token only when you need the rest
             
             ERROR HANDLING:
             - File not found → Suggest checking path and permissions
@@ -152,7 +267,8 @@ async def create_agent():
             Remember: You are the bridge between user requests and file system operations through MCP tools. 
             Always prioritize safety, clarity, and user guidance.
             """,
-            tools=tools,
+            tools=tools + [read_continuation] + _search_tools(),
+            **_tool_callbacks(continuations.truncate_tool_response),
         )
 
     return agent_instance, exit_stack
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Herramientas de file system nativas (en proceso) para file_system_agent.
+
+Alternativa rápida al servidor stdio `file-system-mcp`: mismos nombres de herramienta
+(read_file, write_file, list_directory, move_file, delete_file, create_directory), sin
+JSON-RPC ni IPC. Todas las rutas quedan confinadas a AUTO_FS_ROOT (por defecto el
+directorio de trabajo). Las lecturas usan mmap y permiten head/tail/rangos de líneas o
+de bytes; cada respuesta está limitada a AUTO_FS_MAX_READ_BYTES y se continúa con un
+cursor. Los listados usan os.scandir con filtro glob, como máximo AUTO_FS_MAX_LIST_ENTRIES
+entradas por página y cursor de continuación.
+"""
+import os
+import mmap
+import shutil
+import fnmatch
+from itertools import islice
+from typing import Dict, Any, Optional, Tuple
+
+from .pagination import MAX_READ_BYTES, MAX_LIST_ENTRIES, InvalidCursor, encode_cursor, decode_cursor
+
+FS_ROOT = os.path.realpath(os.getenv("AUTO_FS_ROOT", os.getcwd()))
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def path_inside(real: str, root: str) -> bool:
+    # commonpath y no startswith(root + os.sep): con la raíz "/" el prefijo sería "//"
+    return os.path.commonpath([root, real]) == root
+
+
+def resolve_path(path: str, root: Optional[str] = None, follow_symlinks: bool = True) -> str:
+    """Resuelve `path` dentro de la raíz sandbox; PermissionError si se sale de ella.
+
+    Con follow_symlinks=False solo se resuelve el directorio padre: si el último componente es
+    un enlace simbólico se devuelve el enlace, no su destino (borrar o mover actúa sobre el enlace).
+    """
+    root = root or FS_ROOT
+    candidate = path if os.path.isabs(path) else os.path.join(root, path)
+    parent, name = os.path.split(candidate.rstrip(os.sep) or os.sep)
+    if follow_symlinks or name in ("", ".", ".."):
+        real = os.path.realpath(candidate)
+    else:
+        real = os.path.join(os.path.realpath(parent), name)
+    if not path_inside(real, root):
+        raise PermissionError(f"Path is outside the allowed root {root}: {path}")
+    return real
+
+
+def _resolve_target(path: str) -> str:
+    """Ruta a crear o sobrescribir: un enlace existente solo se sigue si su destino está en la raíz."""
+    real = resolve_path(path, follow_symlinks=False)
+    if os.path.islink(real):
+        resolve_path(real)
+    return real
+
+
+def _error(path: str, error: Exception) -> Dict[str, Any]:
+    messages = {
+        FileNotFoundError: "File or directory not found",
+        PermissionError: "Permission denied",
+        IsADirectoryError: "Path is a directory",
+        NotADirectoryError: "Path is not a directory",
+        FileExistsError: "Path already exists",
+        InvalidCursor: "Invalid cursor; repeat the request without it",
+    }
+    return {
+        "success": False,
+        "path": path,
+        "error": str(error),
+        "message": messages.get(type(error), "File system operation failed"),
+    }
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def _line_span(mapped: mmap.mmap, start_line: int, end_line: int) -> Tuple[int, int]:
+    """Rango de bytes de las líneas [start_line, end_line] (base 1, end_line 0 = hasta el final)."""
+    size = len(mapped)
+    position = 0
+    for _ in range(start_line - 1):
+        newline = mapped.find(b"\n", position)
+        if newline == -1:
+            return size, size
+        position = newline + 1
+    start = position
+    if end_line <= 0:
+        return start, size
+    for _ in range(end_line - start_line + 1):
+        newline = mapped.find(b"\n", position)
+        if newline == -1:
+            return start, size
+        position = newline + 1
+    return start, position
+
+
+def _tail_start(mapped: mmap.mmap, lines: int) -> int:
+    """Offset donde empiezan las últimas `lines` líneas, buscando hacia atrás."""
+    end = len(mapped)
+    if end and mapped[end - 1:end] == b"\n":
+        end -= 1
+    for _ in range(lines):
+        newline = mapped.rfind(b"\n", 0, end)
+        if newline == -1:
+            return 0
+        end = newline
+    return end + 1
+
+
+def read_file(
+    path: str,
+    start_line: int = 0,
+    end_line: int = 0,
+    tail_lines: int = 0,
+    byte_offset: int = 0,
+    byte_length: int = 0,
+    cursor: str = "",
+) -> Dict[str, Any]:
+    """Reads a text file, at most a bounded number of bytes per call.
+
+    With no range, returns the head of the file. Larger results are cut at a line
+    boundary and include a next_cursor to continue reading.
+
+    Args:
+        path: File path, relative to the file system root or absolute inside it.
+        start_line: First line to read (1-based). 0 means from the beginning.
+        end_line: Last line to read (inclusive). 0 means up to the end.
+        tail_lines: Read only the last N lines of the file (like `tail -n N`).
+        byte_offset: Start reading at this byte offset.
+        byte_length: Number of bytes to read from byte_offset. 0 means up to the end.
+        cursor: The next_cursor from a previous truncated read_file result, to continue reading.
+
+    Returns:
+        The content read, its byte range, the file size, whether it is truncated and the next_cursor.
+    """
+    try:
+        real = resolve_path(path)
+        size = os.path.getsize(real)
+        if size == 0:
+            return {"success": True, "path": path, "size": 0, "content": "", "truncated": False}
+
+        with open(real, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start_line_number = None
+            if cursor:
+                state = decode_cursor(cursor, "read", path, offset=int, end=int)
+                start, end = state["offset"], min(state["end"], size)
+                if start > end:
+                    raise InvalidCursor("Cursor is past the end of the file")
+            elif tail_lines > 0:
+                start, end = _tail_start(mapped, tail_lines), size
+            elif start_line > 0 or end_line > 0:
+                start_line_number = max(start_line, 1)
+                start, end = _line_span(mapped, start_line_number, end_line)
+            elif byte_offset > 0 or byte_length > 0:
+                start = min(byte_offset, size)
+                end = min(size, start + byte_length) if byte_length > 0 else size
+            else:
+                start, end = 0, size
+
+            stop = end
+            if end - start > MAX_READ_BYTES:
+                # Cortar en el último salto de línea dentro del límite
+                newline = mapped.rfind(b"\n", start, start + MAX_READ_BYTES)
+                stop = newline + 1 if newline >= start else start + MAX_READ_BYTES
+
+            result = {
+                "success": True,
+                "path": path,
+                "size": size,
+                "byte_range": [start, stop],
+                "content": _decode(mapped[start:stop]),
+                "truncated": stop < end,
+            }
+            if start_line_number is not None:
+                result["start_line"] = start_line_number
+            if stop < end:
+                result["next_cursor"] = encode_cursor("read", path, offset=stop, end=end)
+                result["message"] = (
+                    f"Showing bytes {start}-{stop} of {end}. "
+                    "Pass next_cursor as cursor to continue, or use tail_lines/start_line/byte_offset."
+                )
+            return result
+    except (OSError, ValueError, KeyError) as e:
+        return _error(path, e)
+
+
+def write_file(path: str, content: str) -> Dict[str, Any]:
+    """Writes content to a file, creating it (and its parent directories) or overwriting it.
+
+    Args:
+        path: File path, relative to the file system root or absolute inside it.
+        content: Text content to write.
+
+    Returns:
+        Whether the write succeeded and the number of bytes written.
+    """
+    try:
+        real = _resolve_target(path)
+        existed = os.path.exists(real)
+        os.makedirs(os.path.dirname(real), exist_ok=True)
+        data = content.encode("utf-8")
+        with open(real, "wb") as f:
+            f.write(data)
+        return {"success": True, "path": path, "bytes_written": len(data), "overwritten": existed}
+    except OSError as e:
+        return _error(path, e)
+
+
+def _entry_info(entry: os.DirEntry) -> Dict[str, Any]:
+    try:
+        stat = entry.stat(follow_symlinks=False)
+        size, modified = stat.st_size, stat.st_mtime
+    except OSError:
+        size, modified = None, None
+    return {
+        "name": entry.name,
+        "type": "directory" if entry.is_dir(follow_symlinks=False) else "file",
+        "size": size,
+        "modified": modified,
+    }
+
+
+def list_directory(path: str = ".", pattern: str = "", page_size: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> Dict[str, Any]:
+    """Lists the entries of a directory, a bounded page at a time.
+
+    Args:
+        path: Directory path, relative to the file system root or absolute inside it.
+        pattern: Optional glob pattern to filter entry names (e.g. "*.log"). Empty lists everything.
+        page_size: Number of entries per page (capped by the server).
+        cursor: The next_cursor from a previous list_directory result, to get the next page.
+
+    Returns:
+        The entries on the page (name, type, size, modified), whether there are more and the next_cursor.
+    """
+    try:
+        real = resolve_path(path)
+        offset = 0
+        if cursor:
+            state = decode_cursor(cursor, "list", path, offset=int, pattern=str)
+            offset, pattern = state["offset"], state["pattern"]
+        page_size = max(1, min(page_size, MAX_LIST_ENTRIES))
+        with os.scandir(real) as entries:
+            if pattern:
+                entries = (entry for entry in entries if fnmatch.fnmatch(entry.name, pattern))
+            window = list(islice(entries, offset, offset + page_size + 1))
+        has_more = len(window) > page_size
+        result = {
+            "success": True,
+            "path": path,
+            "entries": [_entry_info(entry) for entry in window[:page_size]],
+            "has_more": has_more,
+        }
+        if pattern:
+            result["pattern"] = pattern
+        if has_more:
+            result["next_cursor"] = encode_cursor("list", path, offset=offset + page_size, pattern=pattern)
+        return result
+    except (OSError, ValueError, KeyError) as e:
+        return _error(path, e)
+
+
+def move_file(source: str, destination: str) -> Dict[str, Any]:
+    """Moves or renames a file or directory.
+
+    Args:
+        source: Path to move.
+        destination: New path, or an existing directory to move the source into.
+
+    Returns:
+        Whether the move succeeded and the final path.
+    """
+    try:
+        real_source = resolve_path(source, follow_symlinks=False)
+        real_destination = _resolve_target(destination)
+        if not os.path.lexists(real_source):
+            raise FileNotFoundError(real_source)
+        final = shutil.move(real_source, real_destination)
+        return {"success": True, "source": source, "destination": os.path.relpath(final, FS_ROOT)}
+    except (OSError, shutil.Error) as e:
+        return _error(source, e)
+
+
+def delete_file(path: str) -> Dict[str, Any]:
+    """Deletes a file or an empty directory.
+
+    Args:
+        path: Path to delete.
+
+    Returns:
+        Whether the deletion succeeded.
+    """
+    try:
+        real = resolve_path(path, follow_symlinks=False)
+        if real == FS_ROOT:
+            raise PermissionError("Refusing to delete the file system root")
+        # Un enlace se borra a sí mismo, nunca su destino
+        if os.path.isdir(real) and not os.path.islink(real):
+            os.rmdir(real)
+        else:
+            os.remove(real)
+        return {"success": True, "path": path, "deleted": True}
+    except OSError as e:
+        return _error(path, e)
+
+
+def create_directory(path: str) -> Dict[str, Any]:
+    """Creates a directory, including any missing parent directories.
+
+    Args:
+        path: Directory path to create.
+
+    Returns:
+        Whether the directory was created or already existed.
+    """
+    try:
+        real = resolve_path(path)
+        existed = os.path.isdir(real)
+        os.makedirs(real, exist_ok=True)
+        return {"success": True, "path": path, "created": not existed}
+    except OSError as e:
+        return _error(path, e)
+
+
+NATIVE_TOOLS = [read_file, write_file, list_directory, move_file, delete_file, create_directory]
@@ -0,0 +1,130 @@
+"""
+Paginación y límites duros para los resultados de file_system_agent.
+
+- Tokens de continuación opacos (cursor) para lecturas y listados de las herramientas nativas
+- Límite de bytes por respuesta para las herramientas MCP: el exceso se guarda en memoria
+  (LRU acotado) y se lee por partes con la herramienta read_continuation
+"""
+import os
+import json
+import uuid
+import base64
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+MAX_READ_BYTES = int(os.getenv("AUTO_FS_MAX_READ_BYTES", str(64 * 1024)))
+MAX_LIST_ENTRIES = int(os.getenv("AUTO_FS_MAX_LIST_ENTRIES", "200"))
+MAX_RESULT_BYTES = int(os.getenv("AUTO_FS_MAX_RESULT_BYTES", str(64 * 1024)))
+MAX_CONTINUATIONS = int(os.getenv("AUTO_FS_MAX_CONTINUATIONS", "64"))
+
+
+class InvalidCursor(ValueError):
+    """El cursor no es válido o no corresponde a la ruta pedida."""
+
+
+def encode_cursor(kind: str, path: str, **state: Any) -> str:
+    payload = json.dumps({"k": kind, "p": path, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, kind: str, path: str, **fields: type) -> Dict[str, Any]:
+    """Estado del cursor; `fields` (p.ej. offset=int) son los campos obligatorios y su tipo.
+
+    El cursor llega del modelo: un campo que falta o con otro tipo es InvalidCursor, no TypeError.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(state, dict) or state.get("k") != kind or state.get("p") != path:
+        raise InvalidCursor("Cursor does not belong to this path or operation")
+    for name, expected in fields.items():
+        value = state.get(name)
+        # bool es subclase de int: true/false no valen como posición
+        if not isinstance(value, expected) or isinstance(value, bool) or (expected is int and value < 0):
+            raise InvalidCursor(f"Invalid cursor field: {name}")
+    return state
+
+
+class ContinuationStore:
+    """Guarda el resto de resultados demasiado grandes para entregarlos por partes."""
+
+    def __init__(self, max_entries: int = MAX_CONTINUATIONS, chunk_bytes: int = MAX_RESULT_BYTES):
+        self.max_entries = max_entries
+        self.chunk_bytes = chunk_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def split(self, text: str) -> Tuple[str, Optional[str]]:
+        """Devuelve (primer trozo, token) — token None si el texto cabe entero."""
+        data = text.encode("utf-8")
+        if len(data) <= self.chunk_bytes:
+            return text, None
+        head, rest = _cut(data, self.chunk_bytes)
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._entries[token] = rest.decode("utf-8", errors="replace")
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return head.decode("utf-8", errors="replace"), token
+
+    def next_chunk(self, token: str) -> Optional[Tuple[str, Optional[str]]]:
+        with self._lock:
+            rest = self._entries.pop(token, None)
+        if rest is None:
+            return None
+        return self.split(rest)
+
+    def truncate_tool_response(self, tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+        """after_tool_callback: recorta respuestas MCP grandes y añade un continuation_token."""
+        if isinstance(tool_response, dict) and isinstance(tool_response.get("content"), list):
+            # En respuestas MCP el contenido útil está en content[].text
+            text = "\n".join(
+                item.get("text", "") for item in tool_response["content"] if isinstance(item, dict)
+            )
+        elif isinstance(tool_response, str):
+            text = tool_response
+        else:
+            text = json.dumps(tool_response, ensure_ascii=False, default=str)
+
+        head, token = self.split(text)
+        if token is None:
+            return None
+        return {
+            "content": [{"type": "text", "text": head}],
+            "isError": False,
+            "truncated": True,
+            "continuation_token": token,
+            "message": "Result truncated. Call read_continuation with the continuation_token to get the next part.",
+        }
+
+
+def _cut(data: bytes, limit: int) -> Tuple[bytes, bytes]:
+    """Corta en el último salto de línea antes de `limit` (o en `limit` si no hay ninguno)."""
+    newline = data.rfind(b"\n", 0, limit)
+    cut = newline + 1 if newline > 0 else limit
+    return data[:cut], data[cut:]
+
+
+continuations = ContinuationStore()
+
+
+def read_continuation(continuation_token: str) -> Dict[str, Any]:
+    """Returns the next part of a file system result that was too large to return at once.
+
+    Args:
+        continuation_token: The continuation_token from a truncated result.
+
+    Returns:
+        The next part of the content and a new continuation_token if more remains.
+    """
+    chunk = continuations.next_chunk(continuation_token)
+    if chunk is None:
+        return {
+            "success": False,
+            "error": "Unknown or expired continuation_token",
+            "message": "Repeat the original operation to get the content again",
+        }
+    text, token = chunk
+    return {"success": True, "content": text, "truncated": token is not None, "continuation_token": token}
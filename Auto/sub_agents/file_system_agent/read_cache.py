@@ -0,0 +1,359 @@
+"""
+Cache de lecturas de file_system_agent consciente de cambios en disco.
+
+Los agentes vuelven a leer los mismos archivos y a listar los mismos directorios dentro de una
+sesión; con el backend MCP cada vez es un ida y vuelta completo a `file-system-mcp`. ReadCache
+guarda en memoria el resultado de read_file y list_directory (LRU con un máximo de
+AUTO_FS_CACHE_MAX_MB) y lo reutiliza mientras el archivo no cambie:
+
+- Cada entrada lleva la huella (mtime_ns, size, inode) del archivo tomada antes y después de la
+  lectura; un acierto vuelve a hacer stat y descarta la entrada si la huella ya no coincide.
+- En Linux un hilo con inotify vigila los directorios de las entradas cacheadas y las desaloja en
+  cuanto algo cambia (también cambios hechos fuera del agente). Los listados de directorio solo se
+  cachean con inotify activo: incluyen tamaño y fecha de cada hijo, que el mtime del directorio no
+  refleja.
+- write_file, move_file, delete_file, create_directory (y edit_file del servidor MCP) invalidan sus
+  rutas y la del directorio padre en cuanto terminan.
+
+Se engancha al agente con before_tool_callback / after_tool_callback y funciona igual con las
+herramientas nativas y con las del servidor MCP (mismos nombres y argumentos de ruta).
+"""
+import os
+import json
+import ctypes
+import ctypes.util
+import struct
+import select
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Set, Callable
+
+from .native_tools import FS_ROOT
+
+CACHE_MAX_BYTES = int(float(os.getenv("AUTO_FS_CACHE_MAX_MB", "32")) * 1024 * 1024)
+# Directorios vigilados como máximo (cada uno ocupa un watch de fs.inotify.max_user_watches)
+MAX_WATCHES = int(os.getenv("AUTO_FS_CACHE_MAX_WATCHES", "1024"))
+USE_INOTIFY = os.getenv("AUTO_FS_CACHE_INOTIFY", "1").lower() not in ("0", "false", "no", "off")
+
+READ_TOOLS = ("read_file", "list_directory")
+LIST_TOOLS = ("list_directory",)
+WRITE_TOOLS = ("write_file", "edit_file", "move_file", "delete_file", "create_directory")
+PATH_ARGS = ("path", "source", "destination")
+MAX_PENDING = 1024
+
+# Fingerprint de un archivo: (mtime_ns, size, inode)
+Fingerprint = Tuple[int, int, int]
+
+
+def real_path(path: str) -> str:
+    """Ruta absoluta canónica, relativa a la raíz del file system (sin comprobar el sandbox)."""
+    candidate = path if os.path.isabs(path) else os.path.join(FS_ROOT, path)
+    return os.path.realpath(candidate)
+
+
+def tool_paths(args: Dict[str, Any]) -> List[str]:
+    """Rutas canónicas que menciona una llamada de herramienta."""
+    paths = [args[name] for name in PATH_ARGS if isinstance(args.get(name), str)]
+    if isinstance(args.get("paths"), list):
+        paths.extend(p for p in args["paths"] if isinstance(p, str))
+    return [real_path(p) for p in paths]
+
+
+def fingerprint(path: str) -> Optional[Fingerprint]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _is_error(tool_response: Any) -> bool:
+    if not isinstance(tool_response, dict):
+        return False
+    return tool_response.get("success") is False or bool(tool_response.get("isError"))
+
+
+class _Entry:
+    __slots__ = ("path", "fingerprint", "response", "size")
+
+    def __init__(self, path: str, fingerprint: Fingerprint, response: Any, size: int):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.response = response
+        self.size = size
+
+
+class InotifyWatcher:
+    """Vigila directorios con inotify (vía ctypes) y llama a `on_change(ruta, recursive)` por cada evento."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_ONLYDIR = 0x01000000
+    IN_CLOEXEC = 0o2000000
+    MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, on_change: Callable[[str, bool], None], on_overflow: Callable[[], None], max_watches: int = MAX_WATCHES):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.on_change = on_change
+        self.on_overflow = on_overflow
+        self.max_watches = max_watches
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, int] = {}
+        self._wds: Dict[int, str] = {}
+        # Pipe para despertar al hilo lector en close(): cerrar el fd no interrumpe un read bloqueado
+        self._wake_r, self._wake_w = os.pipe()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="fs-cache-inotify", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Detiene el hilo lector y libera el descriptor de inotify (y sus watches)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        os.write(self._wake_w, b"x")
+        self._thread.join(timeout=1.0)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        with self._lock:
+            self._dirs.clear()
+            self._wds.clear()
+
+    def watch(self, directory: str) -> bool:
+        """Añade un watch al directorio; False si no se puede (límite alcanzado o error)."""
+        with self._lock:
+            if self._closed:
+                return False
+            if directory in self._dirs:
+                return True
+            if len(self._dirs) >= self.max_watches:
+                return False
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                return False
+            self._dirs[directory] = wd
+            self._wds[wd] = directory
+            return True
+
+    @property
+    def watch_count(self) -> int:
+        with self._lock:
+            return len(self._dirs)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                select.select([self._fd, self._wake_r], [], [])
+                if self._closed:
+                    return
+                data = os.read(self._fd, 64 * 1024)
+            except (OSError, ValueError):
+                return
+            offset = 0
+            while offset + self._EVENT.size <= len(data):
+                wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Se han perdido eventos: no se sabe qué cambió
+                    self.on_overflow()
+                    continue
+                with self._lock:
+                    directory = self._wds.get(wd)
+                    if mask & self.IN_IGNORED and directory is not None:
+                        # El directorio se borró o se desmontó: el kernel ya quitó el watch
+                        del self._wds[wd]
+                        self._dirs.pop(directory, None)
+                if directory is None:
+                    continue
+                if name:
+                    # Un hijo cambió: su entrada y el listado del directorio
+                    self.on_change(os.path.join(directory, os.fsdecode(name)), bool(mask & self.IN_ISDIR))
+                    self.on_change(directory, False)
+                else:
+                    # El propio directorio se borró o se movió
+                    self.on_change(directory, True)
+
+
+class ReadCache:
+    """Resultados de read_file/list_directory en memoria, válidos mientras el archivo no cambie."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, use_inotify: bool = USE_INOTIFY):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # ruta canónica -> claves de las entradas que dependen de ella
+        self._by_path: Dict[str, Set[str]] = {}
+        # function_call_id -> huella tomada antes de ejecutar la herramienta
+        self._pending: "OrderedDict[str, Optional[Fingerprint]]" = OrderedDict()
+        self._total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "stale": 0, "invalidations": 0, "evictions": 0}
+        self.watcher: Optional[InotifyWatcher] = None
+        if use_inotify:
+            try:
+                self.watcher = InotifyWatcher(self.invalidate, self.clear)
+            except (OSError, AttributeError, TypeError):
+                # Sin inotify (otro sistema operativo o sin libc): solo validación por stat
+                self.watcher = None
+
+    @staticmethod
+    def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+        return tool_name + ":" + json.dumps(args, sort_keys=True, default=str)
+
+    def _cacheable(self, tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+        """Ruta canónica de una llamada cacheable, o None."""
+        if tool_name not in READ_TOOLS:
+            return None
+        raw = args.get("path", "." if tool_name in LIST_TOOLS else None)
+        if not isinstance(raw, str):
+            return None
+        path = real_path(raw)
+        if tool_name in LIST_TOOLS and (self.watcher is None or not self.watcher.watch(path)):
+            return None
+        return path
+
+    def lookup(self, key: str, path: str) -> Any:
+        current = fingerprint(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry.fingerprint != current:
+                self.stats["stale"] += 1
+                self.stats["misses"] += 1
+                self._remove_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.response
+
+    def store(self, key: str, path: str, current: Fingerprint, response: Any) -> None:
+        size = len(json.dumps(response, ensure_ascii=False, default=str))
+        if size > self.max_bytes // 4:
+            # Una sola respuesta enorme vaciaría el cache entero
+            return
+        if self.watcher is not None:
+            self.watcher.watch(path if os.path.isdir(path) else os.path.dirname(path))
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = _Entry(path, current, response, size)
+            self._by_path.setdefault(path, set()).add(key)
+            self._total_bytes += size
+            self.stats["stores"] += 1
+            while self._total_bytes > self.max_bytes and self._entries:
+                self._remove_locked(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        keys = self._by_path.get(entry.path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[entry.path]
+
+    def invalidate(self, path: str, recursive: bool = True) -> None:
+        """Descarta las entradas de `path` y, con `recursive`, las de todo lo que haya debajo."""
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            keys = set(self._by_path.get(path, ()))
+            if recursive:
+                for cached_path, cached_keys in self._by_path.items():
+                    if cached_path.startswith(prefix):
+                        keys.update(cached_keys)
+            for key in keys:
+                self._remove_locked(key)
+            self.stats["invalidations"] += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._by_path.clear()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        """Detiene el watcher de inotify y vacía el cache (sin watcher solo queda la validación por stat)."""
+        watcher, self.watcher = self.watcher, None
+        if watcher is not None:
+            watcher.close()
+        self.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.stats["hits"] / lookups) if lookups else 0.0,
+                "inotify": self.watcher is not None,
+                "watches": self.watcher.watch_count if self.watcher else 0,
+            }
+
+    # --- Callbacks del agente ---
+
+    def before_tool_callback(self, tool, args: Dict[str, Any], tool_context) -> Optional[Any]:
+        """Devuelve el resultado cacheado si el archivo no ha cambiado desde la última lectura."""
+        path = self._cacheable(tool.name, args)
+        if path is None:
+            return None
+        cached = self.lookup(self.make_key(tool.name, args), path)
+        if cached is not None:
+            return dict(cached) if isinstance(cached, dict) else cached
+        self._pending[tool_context.function_call_id] = fingerprint(path)
+        while len(self._pending) > MAX_PENDING:
+            # Llamadas que terminaron con excepción no pasan por after_tool_callback
+            self._pending.popitem(last=False)
+        return None
+
+    def after_tool_callback(self, tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+        """Guarda las lecturas nuevas e invalida las rutas que tocan las herramientas de escritura."""
+        if tool.name in WRITE_TOOLS:
+            for path in tool_paths(args):
+                self.invalidate(path)
+                self.invalidate(os.path.dirname(path), recursive=False)
+            return None
+        before = self._pending.pop(tool_context.function_call_id, None)
+        path = self._cacheable(tool.name, args)
+        if path is None or before is None or _is_error(tool_response):
+            return None
+        # Si el archivo cambió mientras se leía, el resultado no corresponde a ninguna huella
+        if fingerprint(path) == before:
+            self.store(self.make_key(tool.name, args), path, before, tool_response)
+        return None
+
+
+def create_read_cache_from_env() -> Optional[ReadCache]:
+    """Crea el cache según AUTO_FS_CACHE (None si está desactivado)."""
+    if os.getenv("AUTO_FS_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return ReadCache()
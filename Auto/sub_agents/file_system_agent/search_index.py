@@ -0,0 +1,364 @@
+"""
+Índice local de contenido para file_system_agent (SQLite FTS5).
+
+Sin índice, la única forma de buscar texto es que el LLM lea los archivos uno a uno. El índice
+cubre los archivos de texto bajo AUTO_FS_INDEX_ROOT (por defecto la raíz del file system) y la
+herramienta search_files lo consulta. Está desactivado salvo que se pida con AUTO_FS_INDEX=1 o
+con AUTO_FS_INDEX_ROOT: la raíz por defecto es el directorio de arranque (que puede ser $HOME) y
+la primera búsqueda copiaría todo su texto al índice.
+
+- Se guarda en AUTO_FS_INDEX_DIR (~/.cache/auto/fs-index/<hash de la raíz>.sqlite): tabla `files`
+  con (ruta, mtime_ns, size) y tabla FTS5 `content` con el texto. El tokenizador es `trigram`
+  (coincidencias por subcadena, útil en código y logs) o el de AUTO_FS_INDEX_TOKENIZER.
+- La actualización es incremental: un recorrido con stat compara (mtime_ns, size) con lo indexado
+  y solo vuelve a leer los archivos nuevos o modificados; los que desaparecen se borran. Se omiten
+  directorios como .git o node_modules, archivos de más de AUTO_FS_INDEX_MAX_FILE_KB y binarios.
+- Antes de cada búsqueda se actualiza si han pasado AUTO_FS_INDEX_REFRESH segundos o si alguna
+  herramienta de escritura tocó la raíz (after_tool_callback).
+- Con muchos archivos que leer (AUTO_FS_INDEX_POOL_THRESHOLD) la lectura y decodificación se
+  reparte en un pool de procesos (AUTO_FS_INDEX_WORKERS); la escritura en SQLite la hace un único
+  proceso en una transacción.
+
+Construir el índice por adelantado o buscar desde la terminal:
+    python -m Auto.sub_agents.file_system_agent.search_index build [--root DIR] [--workers 8]
+    python -m Auto.sub_agents.file_system_agent.search_index search "texto" [--root DIR]
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+
+from ...lifecycle import lifecycle
+from .native_tools import FS_ROOT, path_inside, resolve_path
+from .read_cache import WRITE_TOOLS, tool_paths
+
+INDEX_ROOT = os.path.realpath(os.getenv("AUTO_FS_INDEX_ROOT", FS_ROOT))
+INDEX_DIR = os.getenv("AUTO_FS_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "auto", "fs-index"))
+TOKENIZER = os.getenv("AUTO_FS_INDEX_TOKENIZER", "trigram")
+REFRESH_SECONDS = float(os.getenv("AUTO_FS_INDEX_REFRESH", "30"))
+MAX_FILE_BYTES = int(float(os.getenv("AUTO_FS_INDEX_MAX_FILE_KB", "1024")) * 1024)
+WORKERS = int(os.getenv("AUTO_FS_INDEX_WORKERS", str(min(8, os.cpu_count() or 1))))
+POOL_THRESHOLD = int(os.getenv("AUTO_FS_INDEX_POOL_THRESHOLD", "500"))
+SKIP_DIRS = frozenset(
+    name for name in os.getenv(
+        "AUTO_FS_INDEX_SKIP_DIRS", ".git,.hg,.svn,node_modules,__pycache__,.venv,venv,.tox,.mypy_cache,.pytest_cache"
+    ).split(",") if name
+)
+MAX_RESULTS = 50
+MATCHING_LINES = 3
+BATCH_FILES = 64
+
+_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _load_file(path: str) -> Optional[str]:
+    """Texto del archivo, o None si parece binario o no se puede leer."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data[:MAX_FILE_BYTES].decode("utf-8", errors="replace")
+
+
+def _load_batch(paths: List[str]) -> List[Optional[str]]:
+    """Trabajo de cada proceso del pool: leer y decodificar un lote de archivos."""
+    return [_load_file(path) for path in paths]
+
+
+def walk_files(root: str) -> Iterator[Tuple[str, int, int]]:
+    """(ruta relativa, mtime_ns, size) de los archivos indexables bajo `root`."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.st_size <= MAX_FILE_BYTES:
+                yield os.path.relpath(entry.path, root), stat.st_mtime_ns, stat.st_size
+
+
+def fts_query(query: str) -> str:
+    """Convierte la consulta del usuario en una consulta FTS5: todos los términos (o "frases") deben aparecer."""
+    terms = [phrase or word for phrase, word in _TERM_RE.findall(query)]
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class SearchIndex:
+    """Índice FTS5 de los archivos de texto bajo `root`, actualizado de forma incremental."""
+
+    def __init__(
+        self,
+        root: str = INDEX_ROOT,
+        db_path: Optional[str] = None,
+        tokenizer: str = TOKENIZER,
+        refresh_seconds: float = REFRESH_SECONDS,
+        workers: int = WORKERS,
+        pool_threshold: int = POOL_THRESHOLD,
+    ):
+        self.root = os.path.realpath(root)
+        if db_path is None:
+            digest = hashlib.sha256(self.root.encode("utf-8")).hexdigest()[:16]
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            db_path = os.path.join(INDEX_DIR, f"{digest}.sqlite")
+        self.db_path = db_path
+        self.refresh_seconds = refresh_seconds
+        self.workers = max(1, workers)
+        self.pool_threshold = pool_threshold
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._dirty = True
+        self.stats = {"refreshes": 0, "files_indexed": 0, "files_removed": 0, "searches": 0, "last_refresh_seconds": 0.0}
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime_ns INTEGER, size INTEGER, indexed INTEGER)")
+        try:
+            self._db.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='{tokenizer}')")
+        except sqlite3.OperationalError:
+            # SQLite sin el tokenizador pedido (trigram necesita 3.34+)
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body)")
+        self._db.commit()
+
+    # --- Actualización ---
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def ensure_fresh(self) -> None:
+        if self._dirty or time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self.refresh()
+
+    def refresh(self, workers: Optional[int] = None) -> Dict[str, Any]:
+        """Sincroniza el índice con el disco; devuelve cuántos archivos se indexaron y borraron."""
+        with self._lock:
+            started = time.perf_counter()
+            self._dirty = False
+            known = {path: (mtime_ns, size) for path, mtime_ns, size in self._db.execute("SELECT path, mtime_ns, size FROM files")}
+            changed: List[Tuple[str, int, int]] = []
+            for path, mtime_ns, size in walk_files(self.root):
+                if known.pop(path, None) != (mtime_ns, size):
+                    changed.append((path, mtime_ns, size))
+            removed = list(known)
+
+            workers = self.workers if workers is None else max(1, workers)
+            pool = None
+            if workers > 1 and len(changed) >= self.pool_threshold:
+                # spawn: los workers no heredan los hilos del servidor (inotify, bucle de eventos)
+                pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                with self._db:
+                    for path in removed:
+                        self._delete(path)
+                    step = BATCH_FILES * workers
+                    for start in range(0, len(changed), step):
+                        # Escribir por tandas: la memoria no depende del tamaño del árbol
+                        batch = changed[start:start + step]
+                        for (path, mtime_ns, size), text in zip(batch, self._load(batch, pool)):
+                            self._store(path, mtime_ns, size, text)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+            self._refreshed_at = time.monotonic()
+            seconds = time.perf_counter() - started
+            self.stats["refreshes"] += 1
+            self.stats["files_indexed"] += len(changed)
+            self.stats["files_removed"] += len(removed)
+            self.stats["last_refresh_seconds"] = seconds
+            return {"indexed": len(changed), "removed": len(removed), "seconds": seconds}
+
+    def _load(self, batch: List[Tuple[str, int, int]], pool: Optional[ProcessPoolExecutor]) -> List[Optional[str]]:
+        paths = [os.path.join(self.root, path) for path, _, _ in batch]
+        if pool is None:
+            return _load_batch(paths)
+        chunks = [paths[i:i + BATCH_FILES] for i in range(0, len(paths), BATCH_FILES)]
+        results: List[Optional[str]] = []
+        for chunk in pool.map(_load_batch, chunks):
+            results.extend(chunk)
+        return results
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _delete(self, path: str) -> None:
+        row = self._db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM content WHERE rowid = ?", row)
+            self._db.execute("DELETE FROM files WHERE id = ?", row)
+
+    def _store(self, path: str, mtime_ns: int, size: int, text: Optional[str]) -> None:
+        self._delete(path)
+        # Los binarios quedan registrados (sin texto) para no volver a leerlos en cada actualización
+        cursor = self._db.execute(
+            "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+            (path, mtime_ns, size, text is not None),
+        )
+        if text is not None:
+            self._db.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (cursor.lastrowid, text))
+
+    # --- Búsqueda ---
+
+    def search(self, query: str, path: str = "", pattern: str = "", max_results: int = 20) -> Dict[str, Any]:
+        """Archivos que contienen todos los términos de `query`, ordenados por relevancia (bm25)."""
+        match = fts_query(query)
+        if not match:
+            return {"success": False, "error": "Empty query", "message": "Pass one or more words to search for"}
+        self.ensure_fresh()
+        subdir = os.path.relpath(resolve_path(path or ".", self.root), self.root)
+        sql = "SELECT files.path, content.body FROM content JOIN files ON files.id = content.rowid WHERE content MATCH ?"
+        params: List[Any] = [match]
+        if subdir != ".":
+            sql += " AND (files.path = ? OR files.path LIKE ? ESCAPE '\\')"
+            escaped = subdir.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params += [subdir, escaped + os.sep + "%"]
+        if pattern:
+            # GLOB de SQLite: `*` también cruza directorios, así "*.py" vale para cualquier profundidad
+            sql += " AND (files.path GLOB ? OR files.path GLOB ?)"
+            params += [pattern, "*" + os.sep + pattern]
+        sql += " ORDER BY bm25(content) LIMIT ?"
+        limit = max(1, min(max_results, MAX_RESULTS))
+        params.append(limit + 1)
+
+        with self._lock:
+            try:
+                rows = self._db.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                return {"success": False, "error": str(e), "message": "Invalid search query"}
+            self.stats["searches"] += 1
+
+        terms = [phrase or word for phrase, word in _TERM_RE.findall(query)]
+        results = [
+            {"path": file_path, "matches": _matching_lines(body, terms)}
+            for file_path, body in rows[:limit]
+        ]
+        return {"success": True, "query": query, "results": results, "has_more": len(rows) > limit}
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            files, indexed = self._db.execute("SELECT COUNT(*), COALESCE(SUM(indexed), 0) FROM files").fetchone()
+        return {**self.stats, "root": self.root, "files": files, "text_files": indexed}
+
+    # --- Callbacks del agente ---
+
+    def after_tool_callback(self, tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+        """Marca el índice para actualizar en la próxima búsqueda si una escritura tocó la raíz."""
+        if tool.name in WRITE_TOOLS:
+            if any(path_inside(path, self.root) for path in tool_paths(args)):
+                self.mark_dirty()
+        return None
+
+
+def _matching_lines(body: str, terms: List[str]) -> List[Dict[str, Any]]:
+    """Primeras líneas (número y texto) donde aparece alguno de los términos."""
+    lowered = [term.lower() for term in terms]
+    matches = []
+    for number, line in enumerate(body.splitlines(), 1):
+        text = line.lower()
+        if any(term in text for term in lowered):
+            matches.append({"line": number, "text": line.strip()[:200]})
+            if len(matches) >= MATCHING_LINES:
+                break
+    return matches
+
+
+def create_search_index_from_env() -> Optional[SearchIndex]:
+    """Crea el índice si se pidió con AUTO_FS_INDEX=1 o AUTO_FS_INDEX_ROOT (None si no)."""
+    setting = os.getenv("AUTO_FS_INDEX", "").lower()
+    if setting in ("0", "false", "no", "off"):
+        return None
+    if setting not in ("1", "true", "yes", "on") and not os.getenv("AUTO_FS_INDEX_ROOT"):
+        return None
+    return SearchIndex()
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_ready = False
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    global _search_index, _search_index_ready
+    if not _search_index_ready:
+        _search_index = create_search_index_from_env()
+        _search_index_ready = True
+        if _search_index is not None:
+            lifecycle.register("fs_search_index", _search_index.close)
+    return _search_index
+
+
+async def search_files(query: str, path: str = "", pattern: str = "", max_results: int = 20) -> Dict[str, Any]:
+    """Searches the contents of the files under the file system root using a local full-text index.
+
+    All words must appear in a file for it to match (substring match, at least 3 characters per
+    word); wrap words in double quotes to search for an exact phrase. Much faster than reading
+    files one by one to find where something is mentioned.
+
+    Args:
+        query: Words or "quoted phrases" to search for.
+        path: Optional directory to restrict the search to, relative to the root.
+        pattern: Optional glob pattern for file names (e.g. "*.py").
+        max_results: Maximum number of files to return.
+
+    Returns:
+        Matching files ordered by relevance, each with the first matching line numbers and text.
+    """
+    index = get_search_index()
+    if index is None:
+        return {"success": False, "error": "Search index disabled", "message": "Set AUTO_FS_INDEX=1 or AUTO_FS_INDEX_ROOT to enable search_files"}
+    try:
+        return await asyncio.to_thread(index.search, query, path, pattern, max_results)
+    except (OSError, sqlite3.Error) as e:
+        return {"success": False, "path": path, "error": str(e), "message": "Search failed"}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or query the file system content index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index (or update) every text file under the root")
+    build.add_argument("--root", default=INDEX_ROOT)
+    build.add_argument("--workers", type=int, default=WORKERS)
+    search = sub.add_parser("search", help="search the index")
+    search.add_argument("query")
+    search.add_argument("--root", default=INDEX_ROOT)
+    search.add_argument("--pattern", default="")
+    search.add_argument("--max-results", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.root)
+    try:
+        if args.command == "build":
+            result = index.refresh(workers=args.workers)
+            print(json.dumps({**result, **index.metrics()}, indent=2))
+        else:
+            print(json.dumps(index.search(args.query, pattern=args.pattern, max_results=args.max_results), indent=2, ensure_ascii=False))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
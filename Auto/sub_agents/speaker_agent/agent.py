@@ -2,45 +2,74 @@ import os
 import asyncio
 
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
-model = LiteLlm(
-    model="gemini/gemini-1.5-flash",
-    api_key=os.getenv("GOOGLE_API_KEY"),
-)
+from ...models import get_model
+from ...scheduler import scheduled_tools
+from ...mcp_pool import pool_available, pooled_tools, bridge_command, server_command, connect_server
+from .audio_cache import create_audio_cache_from_env
+from .pipeline import create_long_text_tools, find_tts_tool
+
+MODEL = "gemini/gemini-1.5-flash"
+
+# Cache de audio compartido por el proceso; se crea con el agente (None si AUTO_TTS_CACHE=0)
+_audio_cache = None
+_audio_cache_ready = False
+
+def get_audio_cache():
+    global _audio_cache, _audio_cache_ready
+    if not _audio_cache_ready:
+        _audio_cache = create_audio_cache_from_env()
+        _audio_cache_ready = True
+    return _audio_cache
+
+async def get_tools_async():
+    """Conecta al servidor MCP de Elevenlabs via uvx y retorna (herramientas, exit_stack)."""
+    # Verificar que la API key esté disponible
+    api_key = os.getenv('ELEVENLABS_API_KEY')
+    if not api_key:
+        print("!!! WARNING: ELEVENLABS_API_KEY not found in environment !!!")
+        raise ValueError("Missing ELEVENLABS_API_KEY")
+    
+    env = {'ELEVENLABS_API_KEY': api_key}
+    pooled = None
+    if pool_available('elevenlabs'):
+        # Usar un proceso caliente del pool compartido (python Auto/mcp_pool.py serve)
+        print("--- Using pooled elevenlabs-mcp server ---")
+        # Con las herramientas en cache no hace falta conectarse hasta la primera llamada
+        pooled = pooled_tools('elevenlabs', env=env)
+        command, args = bridge_command('elevenlabs')
+    else:
+        command, args, _ = server_command('elevenlabs')
+    
+    if pooled is not None:
+        tools, exit_stack = pooled
+    else:
+        tools, exit_stack = await connect_server(command, args, env=env)
+
+    print(f"--- Connected to elevenlabs-mcp, Discovered {len(tools)} tool(s). ---")
+    for tool in tools:
+        print(f" -- Discovered tool: {tool.name}")
+    return tools, exit_stack
 
 async def create_speaker_agent():
     """Crea el agente TTS Speaker conectándose al servidor MCP de Elevenlabs via uvx."""
     print("--- Attempting to start and connect to elevenlabs-mcp via uvx ---")
 
     try:
-        # Importar correctamente MCPToolset
-        from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-        
-        # Verificar que la API key esté disponible
-        api_key = os.getenv('ELEVENLABS_API_KEY')
-        if not api_key:
-            print("!!! WARNING: ELEVENLABS_API_KEY not found in environment !!!")
-            raise ValueError("Missing ELEVENLABS_API_KEY")
+        tools, exit_stack = await get_tools_async()
+        # Cada llamada a Elevenlabs (agente y pipeline de textos largos) pasa por el planificador
+        tools = scheduled_tools(tools, "ELEVENLABS_API_KEY")
+        audio_cache = get_audio_cache()
         
-        # Crear conexión usando el método correcto
-        toolset = MCPToolset()
-        tools, exit_stack = await toolset.connect_to_server(
-            connection_params=StdioServerParameters(
-                command='uvx',
-                args=['elevenlabs-mcp'],
-                env={'ELEVENLABS_API_KEY': api_key}
-            )
-        )
-
-        print(f"--- Connected to elevenlabs-mcp, Discovered {len(tools)} tool(s). ---")
-        for tool in tools:
-            print(f" -- Discovered tool: {tool.name}")
+        # Textos largos: síntesis por fragmentos en paralelo sobre la misma herramienta TTS
+        tts_tool = find_tts_tool(tools)
+        if tts_tool is not None:
+            tools = list(tools) + create_long_text_tools(tts_tool, audio_cache)
             
         agent_instance = Agent(
             name="speaker_agent",
             description="Advanced Text-to-Speech agent using Elevenlabs API",
-            model=model,
+            model=get_model(MODEL, "GOOGLE_API_KEY"),
             instruction="""
             You are a Text-to-Speech specialist agent using Elevenlabs API.
             
@@ -61,9 +90,15 @@ async def create_speaker_agent():
             - Always set voice_name parameter to 'Will' unless specified otherwise
             - If the tool fails, explain the issue clearly
             - For long texts, warn users about processing time
+            - For long texts (more than a few sentences), use speak_long_text instead:
+              it returns the first audio chunk as soon as it is ready. Share that path,
+              then call get_long_text_audio with the job_id to get the complete file
             - Provide the audio URL/path in a clear format
             """,
             tools=tools,
+            # Reutilizar audio ya generado para el mismo texto, voz y ajustes
+            before_tool_callback=audio_cache.before_tool_callback if audio_cache else None,
+            after_tool_callback=audio_cache.after_tool_callback if audio_cache else None,
         )
         
         return agent_instance, exit_stack
@@ -89,7 +124,7 @@ def create_fallback_speaker_agent():
     return Agent(
         name="speaker_agent",
         description="Text-to-Speech agent (service unavailable - limited functionality)",
-        model=model,
+        model=get_model(MODEL, "GOOGLE_API_KEY"),
         instruction="""
         You are a Text-to-Speech agent, but unfortunately the Elevenlabs TTS service is currently unavailable.
         
@@ -0,0 +1,250 @@
+"""
+Cache de audio TTS direccionado por contenido para speaker_agent.
+
+La clave es (texto normalizado, voz, ajustes del modelo). Los archivos se guardan en disco
+(AUTO_TTS_CACHE_DIR) con un tamaño máximo (AUTO_TTS_CACHE_MAX_MB) y desalojo LRU según
+la fecha de último uso. Un acierto devuelve la ruta del archivo existente sin llamar a
+Elevenlabs.
+
+Se engancha al agente con before_tool_callback / after_tool_callback sobre la herramienta
+MCP `text_to_speech`.
+
+Precalentar el cache con una lista de frases (una por línea):
+    python -m Auto.sub_agents.speaker_agent.audio_cache prewarm frases.txt --voice Will
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+TTS_TOOL_NAME = "text_to_speech"
+DEFAULT_VOICE = "Will"
+
+CACHE_DIR = os.getenv("AUTO_TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "auto", "tts"))
+CACHE_MAX_BYTES = int(float(os.getenv("AUTO_TTS_CACHE_MAX_MB", "500")) * 1024 * 1024)
+
+# Argumentos que no cambian el audio generado
+_IGNORED_ARGS = ("text", "output_directory", "voice_name", "voice_id")
+
+_SAVED_PATH_RE = re.compile(r"File saved as:\s*(.+?\.(?:mp3|wav|pcm|ulaw|opus))", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def extract_audio_path(tool_response: Any) -> Optional[str]:
+    """Busca la ruta del archivo generado en la respuesta de la herramienta MCP."""
+    text = tool_response if isinstance(tool_response, str) else json.dumps(tool_response, default=str)
+    match = _SAVED_PATH_RE.search(text)
+    return match.group(1).strip() if match else None
+
+
+def _tool_result(text: str) -> Dict[str, Any]:
+    """Respuesta con la misma forma que un resultado de herramienta MCP."""
+    return {"content": [{"type": "text", "text": text}], "isError": False}
+
+
+class AudioCache:
+    """Archivos de audio en disco indexados por hash de (texto, voz, ajustes)."""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, str] = {}
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                digest = entry.name.split(".", 1)[0]
+                self._index[digest] = entry.path
+                self._sizes[digest] = entry.stat().st_size
+                self._total_bytes += self._sizes[digest]
+
+    @staticmethod
+    def make_key(text: str, voice: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {
+                "text": normalize_text(text),
+                "voice": voice or DEFAULT_VOICE,
+                "settings": {k: v for k, v in (settings or {}).items() if k not in _IGNORED_ARGS},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def key_for_args(args: Dict[str, Any]) -> str:
+        """Clave a partir de los argumentos de text_to_speech."""
+        return AudioCache.make_key(
+            args.get("text", ""),
+            args.get("voice_name") or args.get("voice_id"),
+            args,
+        )
+
+    def lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            path = self._index.get(key)
+            if path is not None and not os.path.exists(path):
+                del self._index[key]
+                self._total_bytes -= self._sizes.pop(key, 0)
+                path = None
+            if path is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        # Marcar como usado recientemente (el LRU se basa en mtime)
+        os.utime(path)
+        return path
+
+    def store(self, key: str, source_path: str) -> Optional[str]:
+        """Copia el audio generado al cache y devuelve su ruta en el cache."""
+        if not os.path.isfile(source_path):
+            return None
+        extension = os.path.splitext(source_path)[1] or ".mp3"
+        target = os.path.join(self.directory, key + extension)
+        tmp_target = target + ".tmp"
+        shutil.copyfile(source_path, tmp_target)
+        os.replace(tmp_target, target)
+        size = os.path.getsize(target)
+
+        with self._lock:
+            previous = self._index.get(key)
+            if previous is not None:
+                if previous != target and os.path.exists(previous):
+                    os.remove(previous)
+                self._total_bytes -= self._sizes.pop(key, 0)
+            self._index[key] = target
+            self._sizes[key] = size
+            self._total_bytes += size
+            self.stats["stores"] += 1
+            self._evict_locked()
+        return target
+
+    def _evict_locked(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        by_age: List[Tuple[float, str, str]] = []
+        for key, path in self._index.items():
+            try:
+                by_age.append((os.path.getmtime(path), key, path))
+            except OSError:
+                continue
+        by_age.sort()
+        for _, key, path in by_age:
+            if self._total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            del self._index[key]
+            self._total_bytes -= self._sizes.pop(key, 0)
+            self.stats["evictions"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.stats["hits"] / lookups) if lookups else 0.0,
+            }
+
+    # --- Callbacks del agente ---
+
+    def before_tool_callback(self, tool, args: Dict[str, Any], tool_context) -> Optional[Dict[str, Any]]:
+        """Si el audio ya existe, devuelve la ruta cacheada sin llamar a Elevenlabs."""
+        if tool.name != TTS_TOOL_NAME or not args.get("text"):
+            return None
+        path = self.lookup(self.key_for_args(args))
+        if path is None:
+            return None
+        voice = args.get("voice_name") or args.get("voice_id") or DEFAULT_VOICE
+        return _tool_result(f"Success. File saved as: {path}. Voice used: {voice} (cached)")
+
+    def after_tool_callback(self, tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+        """Guarda en el cache el audio recién generado."""
+        if tool.name != TTS_TOOL_NAME or not args.get("text"):
+            return None
+        if isinstance(tool_response, dict) and tool_response.get("isError"):
+            return None
+        path = extract_audio_path(tool_response)
+        if path and os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            self.store(self.key_for_args(args), path)
+        return None
+
+
+def create_audio_cache_from_env() -> Optional[AudioCache]:
+    """Crea el cache según AUTO_TTS_CACHE (None si está desactivado)."""
+    if os.getenv("AUTO_TTS_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return AudioCache()
+
+
+async def prewarm(phrases: List[str], voice: str = DEFAULT_VOICE, cache: Optional[AudioCache] = None) -> Dict[str, Any]:
+    """Genera (vía elevenlabs-mcp) y cachea el audio de cada frase que aún no esté en el cache."""
+    from .agent import get_tools_async
+    from ...scheduler import scheduler
+
+    cache = cache or AudioCache()
+    tools, exit_stack = await get_tools_async()
+    try:
+        tts_tool = next((tool for tool in tools if tool.name == TTS_TOOL_NAME), None)
+        if tts_tool is None:
+            raise RuntimeError(f"elevenlabs-mcp did not expose '{TTS_TOOL_NAME}'")
+
+        generated = 0
+        for phrase in phrases:
+            args = {"text": phrase, "voice_name": voice}
+            if cache.lookup(cache.key_for_args(args)) is not None:
+                continue
+            # Trabajo de fondo: cede el turno a las síntesis interactivas del agente
+            async with scheduler.slot("ELEVENLABS_API_KEY", priority=scheduler.BACKGROUND):
+                response = await tts_tool.run_async(args=args, tool_context=None)
+            path = extract_audio_path(response)
+            if path and cache.store(cache.key_for_args(args), path):
+                generated += 1
+                print(f"✅ Cached: {phrase[:60]}")
+            else:
+                print(f"⚠️ No audio for: {phrase[:60]}")
+    finally:
+        if exit_stack is not None:
+            await exit_stack.aclose()
+
+    return {"phrases": len(phrases), "generated": generated, **cache.metrics()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Speaker agent audio cache administration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prewarm_parser = subparsers.add_parser("prewarm", help="synthesize and cache a phrase list")
+    prewarm_parser.add_argument("phrases_file", help="text file with one phrase per line")
+    prewarm_parser.add_argument("--voice", default=DEFAULT_VOICE)
+    subparsers.add_parser("stats", help="print cache metrics")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        print(json.dumps(AudioCache().metrics(), indent=2))
+        return 0
+
+    with open(args.phrases_file, encoding="utf-8") as f:
+        phrases = [line.strip() for line in f if line.strip()]
+    print(json.dumps(asyncio.run(prewarm(phrases, voice=args.voice)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
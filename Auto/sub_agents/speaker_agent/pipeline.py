@@ -0,0 +1,295 @@
+"""
+Pipeline TTS por fragmentos para textos largos.
+
+El texto se divide en frases, se agrupan en fragmentos de hasta `max_chars` caracteres y
+se sintetizan en paralelo con un pool acotado. Los fragmentos se entregan en orden en
+cuanto están listos (el primero llega sin esperar al resto) y al final se unen en un solo
+archivo. Se miden el tiempo hasta el primer audio y la duración de cada fragmento.
+
+El backend de síntesis es cualquier `async (texto) -> ruta de audio`, de forma que se puede
+medir con un backend falso (Auto.testing.fakes.FakeTtsBackend, ver Auto/benchmarks/tts.py).
+
+Los archivos unidos se escriben en AUTO_TTS_OUTPUT_DIR, por defecto $XDG_RUNTIME_DIR/auto-tts
+(o /tmp/auto-tts-<uid>): un directorio 0700 del usuario, no uno compartido y predecible en /tmp.
+"""
+import os
+import re
+import stat
+import time
+import uuid
+import wave
+import asyncio
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable, AsyncGenerator
+
+from .audio_cache import TTS_TOOL_NAME, DEFAULT_VOICE, AudioCache, extract_audio_path
+
+MAX_CHUNK_CHARS = int(os.getenv("AUTO_TTS_CHUNK_CHARS", "400"))
+MAX_CONCURRENCY = int(os.getenv("AUTO_TTS_CONCURRENCY", "3"))
+
+
+def _default_output_dir() -> str:
+    """$XDG_RUNTIME_DIR (privado del usuario) o, si no existe, un directorio por uid en /tmp."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "auto-tts")
+    return os.path.join(tempfile.gettempdir(), f"auto-tts-{os.getuid()}")
+
+
+OUTPUT_DIR = os.getenv("AUTO_TTS_OUTPUT_DIR") or _default_output_dir()
+MAX_JOBS = 100
+
+Synthesize = Callable[[str], Awaitable[str]]
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+_CLAUSE_END_RE = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Divide el texto en fragmentos de frases completas de hasta `max_chars` caracteres."""
+    pieces: List[str] = []
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        # Frase demasiado larga: cortar por comas y, si hace falta, por palabras
+        for clause in _CLAUSE_END_RE.split(sentence):
+            while len(clause) > max_chars:
+                cut = clause.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(clause[:cut].strip())
+                clause = clause[cut:].strip()
+            if clause:
+                pieces.append(clause)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def ensure_output_dir(path: str) -> None:
+    """Crea `path` con modo 0700; PermissionError si existe y es un enlace o de otro usuario.
+
+    Si otro usuario pudiera escribir en él, podría dejar enlaces con los nombres de los archivos
+    que se van a escribir: se le quita el permiso de escritura a grupo y otros.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"TTS output directory {path} is not a directory owned by this user")
+    if info.st_mode & 0o022:
+        os.chmod(path, stat.S_IMODE(info.st_mode) & ~0o022)
+
+
+def stitch(paths: List[str], output_path: str) -> str:
+    """Une los fragmentos de audio en un solo archivo (WAV por cabecera, el resto por concatenación)."""
+    if output_path.lower().endswith(".wav"):
+        with wave.open(output_path, "wb") as output:
+            for index, path in enumerate(paths):
+                with wave.open(path, "rb") as chunk:
+                    if index == 0:
+                        output.setparams(chunk.getparams())
+                    output.writeframes(chunk.readframes(chunk.getnframes()))
+        return output_path
+
+    # MP3 y similares son secuencias de frames: se pueden concatenar directamente
+    with open(output_path, "wb") as output:
+        for path in paths:
+            with open(path, "rb") as chunk:
+                while True:
+                    data = chunk.read(1024 * 1024)
+                    if not data:
+                        break
+                    output.write(data)
+    return output_path
+
+
+class TtsPipeline:
+    """Sintetiza un texto largo por fragmentos concurrentes, en orden y con tiempos medidos."""
+
+    def __init__(
+        self,
+        synthesize: Synthesize,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_chars: int = MAX_CHUNK_CHARS,
+        output_dir: str = OUTPUT_DIR,
+    ):
+        self.synthesize = synthesize
+        self.max_concurrency = max_concurrency
+        self.max_chars = max_chars
+        self.output_dir = output_dir
+
+    async def stream(self, text: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Entrega cada fragmento ({index, text, path, seconds, ready_at}) en orden, en cuanto está listo."""
+        chunks = split_sentences(text, self.max_chars)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+
+        async def synthesize_chunk(index: int, chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                chunk_start = time.perf_counter()
+                path = await self.synthesize(chunk)
+                finished = time.perf_counter()
+            return {
+                "index": index,
+                "text": chunk,
+                "path": path,
+                "seconds": finished - chunk_start,
+                "ready_at": finished - started,
+            }
+
+        tasks = [asyncio.create_task(synthesize_chunk(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(
+        self,
+        text: str,
+        output_path: Optional[str] = None,
+        on_first_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Sintetiza todo el texto y devuelve el archivo final con los tiempos de cada fragmento."""
+        started = time.perf_counter()
+        results: List[Dict[str, Any]] = []
+        time_to_first_audio = None
+
+        async for chunk in self.stream(text):
+            if time_to_first_audio is None:
+                time_to_first_audio = time.perf_counter() - started
+                if on_first_chunk is not None:
+                    on_first_chunk(chunk)
+            results.append(chunk)
+
+        if not results:
+            raise ValueError("No text to synthesize")
+
+        if output_path is None:
+            await asyncio.to_thread(ensure_output_dir, self.output_dir)
+            extension = os.path.splitext(results[0]["path"])[1] or ".mp3"
+            output_path = os.path.join(self.output_dir, f"tts_{uuid.uuid4().hex}{extension}")
+        if len(results) == 1 and results[0]["path"] == output_path:
+            file_path = output_path
+        else:
+            file_path = await asyncio.to_thread(stitch, [chunk["path"] for chunk in results], output_path)
+
+        return {
+            "file_path": file_path,
+            "first_chunk_path": results[0]["path"],
+            "chunks": len(results),
+            "time_to_first_audio": time_to_first_audio,
+            "total_time": time.perf_counter() - started,
+            "chunk_seconds": [chunk["seconds"] for chunk in results],
+        }
+
+
+def mcp_tts_backend(tts_tool, voice_name: str = DEFAULT_VOICE, cache: Optional[AudioCache] = None) -> Synthesize:
+    """Backend que sintetiza con la herramienta MCP text_to_speech, pasando por el cache de audio."""
+
+    async def synthesize(text: str) -> str:
+        args = {"text": text, "voice_name": voice_name}
+        key = AudioCache.key_for_args(args)
+        if cache is not None:
+            cached = cache.lookup(key)
+            if cached is not None:
+                return cached
+        response = await tts_tool.run_async(args=args, tool_context=None)
+        path = extract_audio_path(response)
+        if not path:
+            raise RuntimeError(f"TTS tool returned no audio file: {response}")
+        if cache is not None:
+            path = cache.store(key, path) or path
+        return path
+
+    return synthesize
+
+
+class LongTextJobs:
+    """Trabajos de síntesis en segundo plano para las herramientas speak_long_text / get_long_text_audio."""
+
+    def __init__(self, backend_factory: Callable[[str], Synthesize]):
+        self._backend_factory = backend_factory
+        self._jobs: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+
+    async def speak_long_text(self, text: str, voice_name: str = DEFAULT_VOICE) -> Dict[str, Any]:
+        """Starts speech synthesis of a long text in chunks and returns the first audio chunk as soon as it is ready.
+
+        Args:
+            text: The full text to convert to speech.
+            voice_name: The voice to use. Defaults to 'Will'.
+
+        Returns:
+            The first chunk's audio path and a job_id to get the complete file with get_long_text_audio.
+        """
+        pipeline = TtsPipeline(self._backend_factory(voice_name))
+        first_chunk: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        def on_first_chunk(chunk: Dict[str, Any]) -> None:
+            if not first_chunk.done():
+                first_chunk.set_result(chunk)
+
+        job_id = uuid.uuid4().hex[:12]
+        job = asyncio.create_task(pipeline.run(text, on_first_chunk=on_first_chunk))
+        self._jobs[job_id] = job
+        while len(self._jobs) > MAX_JOBS:
+            _, old_job = self._jobs.popitem(last=False)
+            old_job.cancel()
+
+        await asyncio.wait([first_chunk, job], return_when=asyncio.FIRST_COMPLETED)
+        if job.done():
+            if job.exception() is not None:
+                return {"status": "error", "job_id": job_id, "error": str(job.exception())}
+            return {"status": "done", "job_id": job_id, **job.result()}
+
+        chunk = first_chunk.result()
+        return {
+            "status": "in_progress",
+            "job_id": job_id,
+            "first_chunk_path": chunk["path"],
+            "time_to_first_audio": chunk["ready_at"],
+            "chunks_total": len(split_sentences(text, pipeline.max_chars)),
+        }
+
+    async def get_long_text_audio(self, job_id: str) -> Dict[str, Any]:
+        """Waits for a speak_long_text job and returns the complete stitched audio file.
+
+        Args:
+            job_id: The job_id returned by speak_long_text.
+
+        Returns:
+            The final audio file path and the synthesis timings.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return {"status": "error", "job_id": job_id, "error": "Unknown job_id"}
+        try:
+            result = await asyncio.shield(job)
+        except Exception as e:
+            return {"status": "error", "job_id": job_id, "error": str(e)}
+        return {"status": "done", "job_id": job_id, **result}
+
+
+def create_long_text_tools(tts_tool, cache: Optional[AudioCache] = None) -> List[Callable]:
+    """Herramientas de texto largo para el agente, usando la herramienta MCP text_to_speech."""
+    jobs = LongTextJobs(lambda voice_name: mcp_tts_backend(tts_tool, voice_name, cache))
+    return [jobs.speak_long_text, jobs.get_long_text_audio]
+
+
+def find_tts_tool(tools: List[Any]) -> Optional[Any]:
+    return next((tool for tool in tools if getattr(tool, "name", None) == TTS_TOOL_NAME), None)
@@ -1,38 +1,54 @@
 import os
 import asyncio
-from typing import Dict, Any
+import importlib.util
+from typing import Dict, Any, Optional
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
+from google.adk.tools import FunctionTool
 
-try:
+from ...models import get_model
+from ...scheduler import SchedulerBusy, scheduler
+
+# firecrawl solo se importa en la primera búsqueda síncrona
+FIRECRAWL_AVAILABLE = importlib.util.find_spec("firecrawl") is not None
+
+from .cache import create_search_cache_from_env
+from .client import HTTPX_AVAILABLE, get_async_client
+from .research_store import RESEARCH_INSTRUCTION, get_research_store
+
+SEARCH_LIMIT = 5
+
+# Usar la versión async (cliente httpx compartido) salvo que se desactive explícitamente
+USE_ASYNC_SEARCH = HTTPX_AVAILABLE and os.getenv("AUTO_WEB_SEARCH_ASYNC", "1").lower() not in ("0", "false", "no", "off")
+
+# Solo se registra deep_web_search_tool (y se menciona en la instrucción) con la búsqueda async
+DEEP_SEARCH_INSTRUCTION = """
+        DEEP SEARCH:
+        - If the snippets from web_search_tool are not enough to answer (detailed questions, comparisons,
+          research), call 'deep_web_search_tool': it reads the top pages and returns the most relevant passages
+        """
+
+# Cache de resultados compartido por todas las sesiones del proceso (None si está desactivado)
+search_cache = create_search_cache_from_env()
+
+# Cliente de búsqueda inyectado (p.ej. un FakeFirecrawlApp en pruebas); None = Firecrawl real
+_search_client = None
+
+def set_search_client(client) -> None:
+    """Reemplaza el cliente Firecrawl (cualquier objeto con .search(query, limit=...))."""
+    global _search_client
+    _search_client = client
+
+def _get_search_client():
+    if _search_client is not None:
+        return _search_client
     from firecrawl import FirecrawlApp
-    FIRECRAWL_AVAILABLE = True
-except ImportError:
-    print("⚠️ Firecrawl not available. Web search will be limited.")
-    FIRECRAWL_AVAILABLE = False
+    return FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
-def web_search_tool(query: str) -> Dict[str, Any]:
-    """
-    Enhanced web search function with error handling and fallback.
-    """
-    if not FIRECRAWL_AVAILABLE:
-        return {
-            "error": "Firecrawl library not available",
-            "message": "Please install firecrawl: pip install firecrawl-py",
-            "query": query
-        }
-    
-    api_key = os.getenv("FIRECRAWL_API_KEY")
-    if not api_key:
-        return {
-            "error": "Missing FIRECRAWL_API_KEY",
-            "message": "Please set FIRECRAWL_API_KEY environment variable",
-            "query": query
-        }
-    
+def _search_upstream(query: str, limit: int) -> Dict[str, Any]:
+    """Hace la búsqueda real contra Firecrawl y formatea el resultado."""
     try:
-        app = FirecrawlApp(api_key=api_key)
-        search_result = app.search(query, limit=5)
+        app = _get_search_client()
+        search_result = app.search(query, limit=limit)
         
         if hasattr(search_result, 'data') and search_result.data:
             return {
@@ -56,19 +72,234 @@ def web_search_tool(query: str) -> Dict[str, Any]:
             "message": "Failed to perform web search"
         }
 
+def _remember_search(query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Guarda los resultados de una búsqueda upstream exitosa en el almacén de investigación."""
+    store = get_research_store()
+    if store is not None and result.get("success"):
+        try:
+            store.add_search(query, result["results"])
+        except Exception as e:
+            # El almacén es una optimización: un fallo no debe romper la búsqueda
+            print(f"--- WARNING: could not store search results: {e} ---")
+    return result
+
+async def _remember_search_async(query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    if get_research_store() is None or not result.get("success"):
+        return result
+    # Embeddings y escritura en SQLite: fuera del event loop
+    return await asyncio.to_thread(_remember_search, query, result)
+
+async def _remember_pages(pages) -> None:
+    store = get_research_store()
+    if store is None or not pages:
+        return
+    try:
+        await asyncio.to_thread(store.add_pages, pages)
+    except Exception as e:
+        print(f"--- WARNING: could not store fetched pages: {e} ---")
+
+def _lookup_research(query: str) -> Optional[Dict[str, Any]]:
+    """Resultados frescos del almacén de investigación para `query` (None si no hay o está desactivado)."""
+    store = get_research_store()
+    if store is None:
+        return None
+    try:
+        found = store.lookup(query, SEARCH_LIMIT)
+    except Exception as e:
+        # El almacén es una optimización: si falla se busca en la web
+        print(f"--- WARNING: research store lookup failed: {e} ---")
+        return None
+    if not found["fresh"]:
+        return None
+    return {
+        "success": True,
+        "query": query,
+        "source": "research_store",
+        "results": found["results"],
+        "count": found["count"],
+    }
+
+async def _lookup_research_async(query: str) -> Optional[Dict[str, Any]]:
+    if get_research_store() is None:
+        return None
+    # Embeddings y lectura de SQLite: fuera del event loop
+    return await asyncio.to_thread(_lookup_research, query)
+
+def _search_upstream_sync(query: str, limit: int) -> Dict[str, Any]:
+    """_search_upstream con turno del planificador (bloquea el hilo hasta tenerlo)."""
+    try:
+        with scheduler.slot_sync("FIRECRAWL_API_KEY"):
+            return _search_upstream(query, limit)
+    except SchedulerBusy as e:
+        return {
+            "error": str(e),
+            "query": query,
+            "message": "Search service is busy, try again later"
+        }
+
+def web_search_tool(query: str) -> Dict[str, Any]:
+    """
+    Enhanced web search function with error handling and fallback.
+    """
+    if _search_client is None:
+        if not FIRECRAWL_AVAILABLE:
+            return {
+                "error": "Firecrawl library not available",
+                "message": "Please install firecrawl: pip install firecrawl-py",
+                "query": query
+            }
+        
+        if not os.getenv("FIRECRAWL_API_KEY"):
+            return {
+                "error": "Missing FIRECRAWL_API_KEY",
+                "message": "Please set FIRECRAWL_API_KEY environment variable",
+                "query": query
+            }
+    
+    # El almacén de investigación se consulta aquí mismo: un acierto no cuesta otra llamada al modelo
+    def compute() -> Dict[str, Any]:
+        return _lookup_research(query) or _remember_search(query, _search_upstream_sync(query, SEARCH_LIMIT))
+
+    if search_cache is None:
+        return compute()
+    
+    # Solo se cachean búsquedas exitosas; los errores se reintentan en la próxima llamada
+    return search_cache.get_or_compute(
+        query,
+        SEARCH_LIMIT,
+        compute,
+        should_cache=lambda result: bool(result.get("success")),
+    )
+
+async def _search_upstream_async(query: str, limit: int) -> Dict[str, Any]:
+    """Igual que _search_upstream pero con el cliente async compartido, con turno del planificador."""
+    try:
+        async with scheduler.slot("FIRECRAWL_API_KEY"):
+            return await _search_firecrawl_async(query, limit)
+    except SchedulerBusy as e:
+        return {
+            "error": str(e),
+            "query": query,
+            "message": "Search service is busy, try again later"
+        }
+
+async def _search_firecrawl_async(query: str, limit: int) -> Dict[str, Any]:
+    if _search_client is not None:
+        # Cliente inyectado síncrono: ejecutarlo fuera del event loop
+        return await asyncio.to_thread(_search_upstream, query, limit)
+    
+    try:
+        data = await get_async_client().search(query, limit=limit)
+    except asyncio.TimeoutError:
+        return {
+            "error": "Search timed out",
+            "query": query,
+            "message": "Failed to perform web search"
+        }
+    except Exception as e:
+        return {
+            "error": str(e),
+            "query": query,
+            "message": "Failed to perform web search"
+        }
+    
+    if data:
+        return {
+            "success": True,
+            "query": query,
+            "results": data,
+            "count": len(data)
+        }
+    return {
+        "success": False,
+        "query": query,
+        "message": "No results found",
+        "results": []
+    }
+
+async def _search_and_remember_async(query: str, limit: int) -> Dict[str, Any]:
+    return await _remember_search_async(query, await _search_upstream_async(query, limit))
+
+async def _search_research_first_async(query: str) -> Dict[str, Any]:
+    # El almacén de investigación se consulta aquí mismo: un acierto no cuesta otra llamada al modelo
+    stored = await _lookup_research_async(query)
+    if stored is not None:
+        return stored
+    return await _search_and_remember_async(query, SEARCH_LIMIT)
+
+async def web_search_tool_async(query: str) -> Dict[str, Any]:
+    """
+    Enhanced web search function with error handling and fallback.
+    Non-blocking version that shares one pooled HTTP client per process.
+    """
+    if _search_client is None and not os.getenv("FIRECRAWL_API_KEY"):
+        return {
+            "error": "Missing FIRECRAWL_API_KEY",
+            "message": "Please set FIRECRAWL_API_KEY environment variable",
+            "query": query
+        }
+    
+    if search_cache is None:
+        return await _search_research_first_async(query)
+    
+    return await search_cache.get_or_compute_async(
+        query,
+        SEARCH_LIMIT,
+        lambda: _search_research_first_async(query),
+        should_cache=lambda result: bool(result.get("success")),
+    )
+
+async def deep_web_search_tool(query: str) -> Dict[str, Any]:
+    """
+    Search the web and read the top result pages, returning only the most relevant passages.
+    Use it when the search snippets are not enough (detailed questions, comparisons, research).
+
+    Args:
+        query: The search query
+
+    Returns:
+        Dict with the best passages (url, title, text, score) within the token budget and the sources
+    """
+    from .extract import MAX_PAGES, extract_passages
+
+    search = await _search_and_remember_async(query, MAX_PAGES)
+    if not search.get("success"):
+        return search
+    extracted = await extract_passages(query, search["results"], on_pages=_remember_pages)
+    return {"success": bool(extracted["passages"]), "query": query, **extracted}
+
+class _NamedFunctionTool(FunctionTool):
+    """FunctionTool que declara al modelo su `name` y no el __name__ de la función."""
+
+    def _get_declaration(self):
+        declaration = super()._get_declaration()
+        if declaration is not None:
+            declaration.name = self.name
+        return declaration
+
+def create_search_tool():
+    """Devuelve la herramienta de búsqueda (async si está disponible) con el nombre 'web_search_tool'."""
+    if not USE_ASYNC_SEARCH:
+        return web_search_tool
+    
+    search_tool = _NamedFunctionTool(func=web_search_tool_async)
+    # Mismo nombre que la versión sync para que la instrucción del agente siga siendo válida
+    # (el nombre de la declaración y la clave en tools_dict tienen que coincidir)
+    search_tool.name = "web_search_tool"
+    return search_tool
+
 def create_web_searcher_agent() -> Agent:
     """Create the web searcher agent."""
     
-    model = LiteLlm(
-        model="gemini/gemini-1.5-flash",
-        api_key=os.getenv("GOOGLE_API_KEY"),
-    )
+    model = get_model("gemini/gemini-1.5-flash", "GOOGLE_API_KEY")
+    tools = [create_search_tool(), deep_web_search_tool] if USE_ASYNC_SEARCH else [create_search_tool()]
+    research_store = get_research_store()
 
     agent = Agent(
         name="web_searcher_agent",
         model=model,
         description="Advanced web search agent that finds and summarizes the most relevant information from the web.",
-        instruction="""
+        instruction=f"""
         You are the Ultimate Web Searcher, specialized in finding and presenting relevant web information.
         
         CORE PROTOCOL:
@@ -96,17 +327,26 @@ def create_web_searcher_agent() -> Agent:
         4. Provide clear, well-structured summary
         5. Include relevant source links
         6. Suggest follow-up searches if helpful
-        
+        {DEEP_SEARCH_INSTRUCTION if USE_ASYNC_SEARCH else ""}
         IMPORTANT: Your primary purpose is web search and information retrieval. Always use the search tool before providing any web-based information.
-        """,
-        tools=[web_search_tool]
+        """ + (RESEARCH_INSTRUCTION if research_store is not None else ""),
+        tools=tools
     )
     
     return agent
 
-web_searcher_agent = create_web_searcher_agent()
+_web_searcher_agent = None
+
+def __getattr__(name):
+    # El agente se crea en el primer acceso: importar el módulo no construye clientes de modelo
+    global _web_searcher_agent
+    if name == "web_searcher_agent":
+        if _web_searcher_agent is None:
+            _web_searcher_agent = create_web_searcher_agent()
+        return _web_searcher_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # For backward compatibility
 async def get_web_searcher_agent():
     """Get the web searcher agent instance."""
-    return web_searcher_agent
\ No newline at end of file
+    return __getattr__("web_searcher_agent")
\ No newline at end of file
@@ -0,0 +1,317 @@
+"""
+Cache de resultados para web_search_tool.
+
+- Clave: consulta normalizada + limit
+- TTL configurable y tamaño acotado con desalojo LRU
+- Persistencia opcional en SQLite para sobrevivir reinicios
+- Coalescencia: consultas idénticas concurrentes comparten una única llamada upstream
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+DEFAULT_TTL = float(os.getenv("AUTO_SEARCH_CACHE_TTL", "300"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("AUTO_SEARCH_CACHE_SIZE", "512"))
+DEFAULT_DB_MAX_ENTRIES = int(os.getenv("AUTO_SEARCH_CACHE_DB_SIZE", "10000"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normaliza una consulta: minúsculas, espacios colapsados y sin puntuación final."""
+    normalized = _WHITESPACE_RE.sub(" ", query.casefold()).strip()
+    return normalized.rstrip("?!.¿¡ ").lstrip("¿¡ ")
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convierte objetos de resultados (p.ej. modelos pydantic de Firecrawl) a algo serializable."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "__dict__"):
+        return vars(value)
+    return str(value)
+
+
+class SearchCache:
+    """Cache LRU con TTL para resultados de búsqueda, thread-safe.
+
+    La memoria y SQLite tienen locks separados: una escritura a disco (en un hilo, desde la
+    versión async) no bloquea las búsquedas en memoria del event loop.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        db_path: Optional[str] = None,
+        db_max_entries: int = DEFAULT_DB_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_max_entries = db_max_entries
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, int], Future] = {}
+        # clave -> [tarea que calcula, número de esperas activas]
+        self._async_inflight: Dict[Tuple[str, int], List[Any]] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expired": 0,
+            "disk_hits": 0,
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(query: str, limit: int) -> Tuple[str, int]:
+        return normalize_query(query), int(limit)
+
+    # --- Acceso básico ---
+
+    def get(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        """Devuelve el valor cacheado o None, sin contar métricas."""
+        with self._lock:
+            value = self._get_memory_locked(key)
+        if value is None:
+            value = self._get_disk(key)
+        return value
+
+    def set(self, key: Tuple[str, int], value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember_locked(key, now + self.ttl, value)
+        self._set_disk(key, value, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def _get_memory_locked(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at > time.time():
+            self._entries.move_to_end(key)
+            return value
+        del self._entries[key]
+        self.stats["expired"] += 1
+        return None
+
+    def _get_disk(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        """Busca en SQLite (bloqueante: la versión async lo llama en un hilo)."""
+        if self._db is None:
+            return None
+        now = time.time()
+        db_key = json.dumps(key)
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM search_cache WHERE key = ?", (db_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM search_cache WHERE key = ?", (db_key,))
+                self._db.commit()
+                expired = True
+            else:
+                self._db.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, db_key))
+                self._db.commit()
+                expired = False
+
+        with self._lock:
+            if expired:
+                self.stats["expired"] += 1
+                return None
+            value = json.loads(row[0])
+            self._remember_locked(key, row[1], value)
+            self.stats["disk_hits"] += 1
+        return value
+
+    def _set_disk(self, key: Tuple[str, int], value: Dict[str, Any], now: float) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (json.dumps(key), json.dumps(value, default=_to_jsonable), now + self.ttl, now),
+            )
+            # Mantener la tabla acotada: borrar las entradas menos usadas
+            self._db.execute(
+                "DELETE FROM search_cache WHERE key NOT IN ("
+                " SELECT key FROM search_cache ORDER BY last_access DESC LIMIT ?)",
+                (self.db_max_entries,),
+            )
+            self._db.commit()
+
+    def _remember_locked(self, key: Tuple[str, int], expires_at: float, value: Dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # --- Lectura con cálculo y coalescencia ---
+
+    def get_or_compute(
+        self,
+        query: str,
+        limit: int,
+        compute: Callable[[], Dict[str, Any]],
+        should_cache: Callable[[Dict[str, Any]], bool] = lambda value: True,
+    ) -> Dict[str, Any]:
+        """Devuelve el resultado cacheado o llama a `compute` (una sola vez por clave en vuelo)."""
+        key = self.make_key(query, limit)
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return value
+
+        with self._lock:
+            value = self._get_memory_locked(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                self.stats["misses"] += 1
+                pending = Future()
+                self._inflight[key] = pending
+                owner = True
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        if should_cache(value):
+            self.set(key, value)
+        pending.set_result(value)
+        return value
+
+    async def _compute_and_store(
+        self,
+        key: Tuple[str, int],
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        should_cache: Callable[[Dict[str, Any]], bool],
+    ) -> Dict[str, Any]:
+        try:
+            value = await compute()
+            if should_cache(value):
+                if self._db is None:
+                    self.set(key, value)
+                else:
+                    await asyncio.to_thread(self.set, key, value)
+            return value
+        finally:
+            with self._lock:
+                entry = self._async_inflight.get(key)
+                if entry is not None and entry[0] is asyncio.current_task():
+                    del self._async_inflight[key]
+
+    async def get_or_compute_async(
+        self,
+        query: str,
+        limit: int,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        should_cache: Callable[[Dict[str, Any]], bool] = lambda value: True,
+    ) -> Dict[str, Any]:
+        """Versión async de get_or_compute para herramientas que corren en el event loop.
+
+        El cálculo corre en su propia tarea y cada llamada la espera con shield: cancelar una
+        petición no cancela a las demás que esperan la misma clave. La tarea solo se cancela
+        cuando ya no queda nadie esperándola.
+        """
+        key = self.make_key(query, limit)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._get_memory_locked(key)
+            entry = self._async_inflight.get(key)
+        if value is None and entry is None and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key)
+
+        with self._lock:
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+            entry = self._async_inflight.get(key)
+            if entry is not None and entry[0].get_loop() is loop:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                task = loop.create_task(self._compute_and_store(key, compute, should_cache))
+                # Evitar "exception was never retrieved" si todas las esperas se cancelaron
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
+                entry = [task, 0]
+                self._async_inflight[key] = entry
+            entry[1] += 1
+        task = entry[0]
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0 and not task.done()
+                if abandoned and self._async_inflight.get(key) is entry:
+                    # Nadie más espera: las próximas llamadas empiezan un cálculo nuevo
+                    del self._async_inflight[key]
+            if abandoned:
+                task.cancel()
+            raise
+
+    # --- Métricas ---
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+            upstream_saved = self.stats["hits"] + self.stats["coalesced"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "persistent": self._db is not None,
+                "hit_rate": (upstream_saved / lookups) if lookups else 0.0,
+            }
+
+
+def create_search_cache_from_env() -> Optional[SearchCache]:
+    """Crea el cache según AUTO_SEARCH_CACHE / AUTO_SEARCH_CACHE_DB (None si está desactivado)."""
+    if os.getenv("AUTO_SEARCH_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return SearchCache(db_path=os.getenv("AUTO_SEARCH_CACHE_DB") or None)
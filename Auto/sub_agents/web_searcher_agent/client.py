@@ -0,0 +1,196 @@
+"""
+Cliente async de Firecrawl con un único pool de conexiones (keep-alive) por proceso.
+
+Reemplaza el FirecrawlApp síncrono por llamada: las búsquedas no bloquean el event loop,
+hay un límite de búsquedas concurrentes y timeout por llamada.
+
+Las páginas de resultados se descargan con un pool aparte (get_fetch_client) que solo acepta
+URLs http(s) hacia direcciones públicas, comprobadas en cada redirección: los resultados de
+búsqueda no deben poder llevar al agente a la red local ni a endpoints de metadatos.
+"""
+import os
+import socket
+import asyncio
+import weakref
+import ipaddress
+from urllib.parse import urlsplit
+from typing import Dict, Any, List, Optional
+
+from ...lifecycle import lifecycle
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+DEFAULT_BASE_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("AUTO_SEARCH_MAX_CONNECTIONS", "20"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("AUTO_SEARCH_MAX_CONCURRENCY", "10"))
+DEFAULT_TIMEOUT = float(os.getenv("AUTO_SEARCH_TIMEOUT", "15"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("AUTO_FETCH_MAX_CONNECTIONS", "20"))
+FETCH_TIMEOUT = float(os.getenv("AUTO_FETCH_TIMEOUT", "10"))
+FETCH_USER_AGENT = os.getenv("AUTO_FETCH_USER_AGENT", "Mozilla/5.0 (compatible; AutoWebSearcher/1.0)")
+# Hosts locales o privados que sí se pueden descargar (p.ej. "127.0.0.1" para el servidor de fixtures)
+FETCH_ALLOW_HOSTS = {
+    host.strip().lower() for host in os.getenv("AUTO_FETCH_ALLOW_HOSTS", "").split(",") if host.strip()
+}
+
+
+class FirecrawlSearchError(Exception):
+    """Error devuelto por la API de Firecrawl (respuesta con success=false)."""
+
+
+class BlockedUrlError(ValueError):
+    """URL que no se descarga: esquema distinto de http(s) o destino local, privado o reservado."""
+
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # is_global excluye loopback, privadas, link-local (169.254.169.254), CGNAT y reservadas
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_fetch_url(url: str) -> None:
+    """BlockedUrlError si `url` no es http(s) o alguna de las direcciones de su host no es pública."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise BlockedUrlError(f"only http(s) URLs can be fetched: {url}")
+    host = (parts.hostname or "").lower()
+    if not host:
+        raise BlockedUrlError(f"URL has no host: {url}")
+    if host in FETCH_ALLOW_HOSTS:
+        return
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+        addresses = [info[4][0] for info in infos]
+    blocked = [address for address in addresses if not _public_address(address)]
+    if blocked:
+        raise BlockedUrlError(f"refusing to fetch {host}: resolves to non-public address {blocked[0]}")
+
+
+async def _check_request(request) -> None:
+    # Hook de httpx: se ejecuta para la petición inicial y para cada redirección
+    await check_fetch_url(str(request.url))
+
+
+class AsyncFirecrawlClient:
+    """Cliente HTTP async para el endpoint /v1/search de Firecrawl."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = DEFAULT_BASE_URL,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {"requests": 0, "errors": 0, "timeouts": 0, "in_flight": 0, "max_in_flight": 0}
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        """Cliente httpx subyacente, para reutilizar el pool en otras peticiones."""
+        return self._client
+
+    async def search(self, query: str, limit: int = 5, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Busca `query` y devuelve la lista `data` de Firecrawl."""
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                response = await asyncio.wait_for(
+                    self._client.post("/v1/search", json={"query": query, "limit": limit}),
+                    timeout=timeout or self.timeout,
+                )
+                response.raise_for_status()
+                payload = response.json()
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+        if not payload.get("success", True):
+            self.stats["errors"] += 1
+            raise FirecrawlSearchError(payload.get("error") or "Firecrawl search failed")
+        return payload.get("data") or []
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# Un cliente por event loop: las conexiones httpx no se pueden compartir entre loops.
+# Se indexa por el loop (no por id(loop), que se reutiliza cuando un loop cerrado se libera)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncFirecrawlClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncFirecrawlClient:
+    """Devuelve el cliente compartido del event loop actual, creándolo si hace falta."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncFirecrawlClient(api_key=os.getenv("FIRECRAWL_API_KEY"))
+        _clients[loop] = client
+        lifecycle.register("firecrawl_client", lambda: _close_client(_clients, loop))
+    return client
+
+
+# Pool aparte para descargar páginas de resultados: sin base_url ni la API key de Firecrawl
+_fetch_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_fetch_client() -> "httpx.AsyncClient":
+    """Devuelve el cliente httpx compartido para descargar páginas en el event loop actual."""
+    loop = asyncio.get_running_loop()
+    client = _fetch_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers={"User-Agent": FETCH_USER_AGENT, "Accept": "text/html,text/plain;q=0.9,*/*;q=0.5"},
+            limits=httpx.Limits(
+                max_connections=FETCH_MAX_CONNECTIONS,
+                max_keepalive_connections=FETCH_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(FETCH_TIMEOUT),
+            follow_redirects=True,
+            event_hooks={"request": [_check_request]},
+        )
+        _fetch_clients[loop] = client
+        lifecycle.register("fetch_client", lambda: _close_client(_fetch_clients, loop))
+    return client
+
+
+async def _close_client(clients: "weakref.WeakKeyDictionary", loop: asyncio.AbstractEventLoop) -> None:
+    client = clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+async def close_async_clients() -> None:
+    """Cierra los clientes del event loop actual (p.ej. al apagar el servidor)."""
+    loop = asyncio.get_running_loop()
+    await _close_client(_clients, loop)
+    await _close_client(_fetch_clients, loop)
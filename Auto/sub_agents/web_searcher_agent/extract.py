@@ -0,0 +1,369 @@
+"""
+Extracción de contenido para búsquedas profundas.
+
+Después de la búsqueda, para las N primeras URLs:
+1. Descarga concurrente con el pool httpx compartido (get_fetch_client), con límite de
+   concurrencia, timeout y tamaño máximo por página; solo URLs http(s) hacia hosts públicos
+2. Extracción del texto principal del HTML (sin scripts, menús, cabeceras ni pies)
+   dividido en pasajes de ~AUTO_EXTRACT_PASSAGE_WORDS palabras
+3. Eliminación de pasajes casi duplicados entre páginas (shingles de palabras + MinHash con LSH)
+4. Ranking de pasajes por relevancia a la consulta (BM25)
+5. Selección de los mejores pasajes hasta AUTO_EXTRACT_TOKEN_BUDGET tokens
+
+Si una página no se puede descargar se usa la descripción del resultado de búsqueda.
+"""
+import os
+import re
+import math
+import time
+import asyncio
+import hashlib
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Callable, Awaitable
+
+from ...memory import estimate_tokens
+from .client import check_fetch_url
+
+MAX_PAGES = int(os.getenv("AUTO_EXTRACT_PAGES", "8"))
+FETCH_CONCURRENCY = int(os.getenv("AUTO_EXTRACT_CONCURRENCY", "8"))
+MAX_PAGE_BYTES = int(os.getenv("AUTO_EXTRACT_MAX_PAGE_BYTES", str(1024 * 1024)))
+PASSAGE_WORDS = int(os.getenv("AUTO_EXTRACT_PASSAGE_WORDS", "120"))
+TOKEN_BUDGET = int(os.getenv("AUTO_EXTRACT_TOKEN_BUDGET", "3000"))
+# Similitud de Jaccard estimada a partir de la cual dos pasajes se consideran duplicados
+DUPLICATE_THRESHOLD = float(os.getenv("AUTO_EXTRACT_DUPLICATE_THRESHOLD", "0.7"))
+
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+MIN_PASSAGE_WORDS = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Etiquetas cuyo contenido no es texto principal
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "iframe", "button", "select"}
+# Etiquetas que cortan bloques de texto
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "br", "hr", "figcaption",
+}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed", "source", "track", "wbr"}
+
+
+class _TextExtractor(HTMLParser):
+    """Recoge bloques de texto visibles y el <title> de una página HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[str] = []
+        self.title = ""
+        self._current: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def _flush(self) -> None:
+        text = _WHITESPACE_RE.sub(" ", "".join(self._current)).strip()
+        if text:
+            self.blocks.append(text)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            if tag not in VOID_TAGS:
+                self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in BLOCK_TAGS and not self._skip_depth:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in BLOCK_TAGS and not self._skip_depth:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_text(html: str) -> Tuple[str, List[str]]:
+    """Devuelve (título, bloques de texto principal) de una página HTML."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # HTML muy roto: nos quedamos con lo que se haya podido leer
+        parser._flush()
+    # Los bloques muy cortos suelen ser restos de navegación, botones o migas de pan
+    blocks = [block for block in parser.blocks if len(block.split()) >= 4 or block.endswith((".", ":", "?", "!"))]
+    return _WHITESPACE_RE.sub(" ", parser.title).strip(), blocks
+
+
+def split_passages(blocks: Iterable[str], passage_words: int = PASSAGE_WORDS) -> List[str]:
+    """Un pasaje por bloque: los bloques largos se cortan cada passage_words palabras y los
+    muy cortos (títulos, etiquetas) se unen al bloque siguiente."""
+    passages: List[str] = []
+    carry: List[str] = []
+    for block in blocks:
+        words = carry + block.split()
+        if len(words) < MIN_PASSAGE_WORDS:
+            carry = words
+            continue
+        carry = []
+        for start in range(0, len(words), passage_words):
+            chunk = words[start:start + passage_words]
+            if len(chunk) < MIN_PASSAGE_WORDS and passages:
+                passages[-1] += " " + " ".join(chunk)
+            else:
+                passages.append(" ".join(chunk))
+    if carry and passages:
+        passages[-1] += " " + " ".join(carry)
+    return passages
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_RE.findall(text.casefold())
+
+
+# --- Deduplicación (MinHash + LSH) ---
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Parámetros (a, b) deterministas para las funciones hash h(x) = (a*x + b) mod p."""
+    params = []
+    for i in range(count):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutations(MINHASH_PERMUTATIONS)
+
+
+def shingles(tokens: List[str], size: int = SHINGLE_WORDS) -> set:
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(shingle_set: set) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "big") for shingle in shingle_set]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class NearDuplicateFilter:
+    """Descarta textos cuya similitud de Jaccard estimada con uno anterior supera el umbral."""
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = MINHASH_PERMUTATIONS // bands
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._signatures: List[Tuple[int, ...]] = []
+
+    def add(self, tokens: List[str]) -> bool:
+        """Registra el texto y devuelve True si es nuevo, False si es casi duplicado."""
+        signature = minhash(shingles(tokens))
+        band_keys = [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+        candidates = {index for key in band_keys for index in self._buckets.get(key, ())}
+        if any(estimated_similarity(signature, self._signatures[index]) >= self.threshold for index in candidates):
+            return False
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(index)
+        return True
+
+
+# --- Ranking (BM25) ---
+
+def bm25_scores(query: str, documents: List[List[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Puntuación BM25 de cada documento (lista de tokens) para la consulta."""
+    if not documents:
+        return []
+    terms = set(tokenize(query))
+    average_length = sum(len(document) for document in documents) / len(documents) or 1.0
+    document_frequency = Counter(term for document in documents for term in set(document) & terms)
+    total = len(documents)
+    scores = []
+    for document in documents:
+        counts = Counter(document)
+        score = 0.0
+        for term in terms:
+            frequency = counts.get(term)
+            if not frequency:
+                continue
+            idf = math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * len(document) / average_length))
+        scores.append(score)
+    return scores
+
+
+# --- Descarga ---
+
+async def fetch_page(client, url: str, max_bytes: int = MAX_PAGE_BYTES) -> Dict[str, Any]:
+    """Descarga una página (solo HTML o texto) hasta max_bytes.
+
+    La URL se comprueba antes de pedirla (http(s) y host público); las redirecciones las
+    comprueba el hook del cliente compartido (get_fetch_client).
+    """
+    await check_fetch_url(url)
+    start = time.perf_counter()
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "").lower()
+        if content_type and "html" not in content_type and not content_type.startswith("text/"):
+            raise ValueError(f"unsupported content type: {content_type.split(';')[0]}")
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+        body = b"".join(chunks)[:max_bytes].decode(response.encoding or "utf-8", errors="replace")
+    return {
+        "url": url,
+        "html": body if "html" in content_type or not content_type else None,
+        "text": body if content_type.startswith("text/") and "html" not in content_type else None,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+async def fetch_pages(
+    urls: List[str],
+    client=None,
+    concurrency: int = FETCH_CONCURRENCY,
+    max_bytes: int = MAX_PAGE_BYTES,
+) -> List[Dict[str, Any]]:
+    """Descarga todas las URLs a la vez (como mucho `concurrency` simultáneas), en el mismo orden."""
+    if client is None:
+        from .client import get_fetch_client
+        client = get_fetch_client()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await fetch_page(client, url, max_bytes)
+            except Exception as e:
+                return {"url": url, "error": str(e) or type(e).__name__}
+
+    return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+# --- Pipeline ---
+
+def _result_field(result: Any, name: str) -> str:
+    value = result.get(name) if isinstance(result, dict) else getattr(result, name, None)
+    return value or ""
+
+
+def select_passages(
+    query: str,
+    pages: List[Dict[str, Any]],
+    token_budget: int = TOKEN_BUDGET,
+) -> Dict[str, Any]:
+    """Deduplica, ordena por relevancia y recorta al presupuesto los pasajes de las páginas."""
+    duplicates = NearDuplicateFilter()
+    candidates: List[Dict[str, Any]] = []
+    total_passages = 0
+    for page in pages:
+        for passage in page["passages"]:
+            total_passages += 1
+            tokens = tokenize(passage)
+            if duplicates.add(tokens):
+                candidates.append({"url": page["url"], "title": page["title"], "text": passage, "tokens": tokens})
+
+    scores = bm25_scores(query, [candidate["tokens"] for candidate in candidates])
+    # Empates (p.ej. consultas sin términos en común): mantener el orden de los resultados
+    ranked = sorted(range(len(candidates)), key=lambda index: -scores[index])
+
+    selected, used = [], 0
+    for index in ranked:
+        candidate = candidates[index]
+        cost = estimate_tokens(candidate["text"])
+        if used + cost > token_budget:
+            continue
+        used += cost
+        selected.append({
+            "url": candidate["url"],
+            "title": candidate["title"],
+            "text": candidate["text"],
+            "score": round(scores[index], 3),
+        })
+    return {
+        "passages": selected,
+        "tokens": used,
+        "passages_total": total_passages,
+        "duplicates_removed": total_passages - len(candidates),
+    }
+
+
+async def extract_passages(
+    query: str,
+    results: List[Any],
+    max_pages: int = MAX_PAGES,
+    token_budget: int = TOKEN_BUDGET,
+    client=None,
+    concurrency: int = FETCH_CONCURRENCY,
+    on_pages: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None,
+) -> Dict[str, Any]:
+    """Descarga las primeras `max_pages` URLs de los resultados y devuelve los mejores pasajes.
+
+    `on_pages` recibe los pasajes de las páginas descargadas (p.ej. para guardarlas en el
+    almacén de investigación).
+    """
+    start = time.perf_counter()
+    results = [result for result in results if _result_field(result, "url")][:max_pages]
+    fetched = await fetch_pages([_result_field(result, "url") for result in results], client, concurrency)
+
+    pages, failures, raw_tokens = [], [], 0
+    for result, page in zip(results, fetched):
+        title = _result_field(result, "title")
+        if "error" in page:
+            failures.append({"url": page["url"], "error": page["error"]})
+            blocks = [_result_field(result, "description")]
+        elif page["html"] is not None:
+            page_title, blocks = extract_text(page["html"])
+            title = title or page_title
+        else:
+            blocks = page["text"].split("\n\n")
+        passages = split_passages(block for block in blocks if block)
+        raw_tokens += sum(estimate_tokens(passage) for passage in passages)
+        pages.append({"url": page["url"], "title": title, "passages": passages})
+
+    # El ranking y MinHash son CPU: fuera del event loop
+    selection = await asyncio.to_thread(select_passages, query, pages, token_budget)
+    if on_pages is not None:
+        failed = {failure["url"] for failure in failures}
+        await on_pages([page for page in pages if page["url"] not in failed])
+    return {
+        **selection,
+        "sources": [{"url": page["url"], "title": page["title"]} for page in pages],
+        "pages_fetched": len(results) - len(failures),
+        "failures": failures,
+        "extracted_tokens": raw_tokens,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
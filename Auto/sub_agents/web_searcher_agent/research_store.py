@@ -0,0 +1,399 @@
+"""
+Almacén local de investigación para web_searcher_agent.
+
+Los resultados que trae web_search_tool de Firecrawl (y las páginas que lee deep_web_search_tool)
+se usaban una vez y se tiraban; los usuarios investigan temas que se solapan y se pagaba otra vez
+por las mismas páginas. ResearchStore los guarda en SQLite (AUTO_RESEARCH_DB) y web_search_tool
+los consulta antes de buscar en la web, dentro de la misma llamada (sin otra vuelta al modelo):
+
+- Recuperación híbrida: texto completo (FTS5, bm25) y vectores (embeddings locales en NumPy, los
+  mismos del cache semántico) combinados con reciprocal rank fusion. Una consulta idéntica a una
+  búsqueda anterior recupera directamente sus resultados.
+- Un documento solo cuenta como acierto si cubre al menos AUTO_RESEARCH_MIN_COVERAGE de las
+  palabras de contenido de la consulta (sin las que solo dan forma a la pregunta, como
+  "tutorial" o "explained") y todos sus números ("part 2" no vale para "part 1").
+- Frescura: se ignoran los documentos más viejos que AUTO_RESEARCH_MAX_AGE (1 día), o que
+  AUTO_RESEARCH_NEWS_MAX_AGE (1 hora) si la consulta pide algo actual ("latest", "news", "hoy"...).
+- Compactación por tamaño: por encima de AUTO_RESEARCH_MAX_MB se borran los documentos fuera de
+  AUTO_RESEARCH_RETENTION y después los menos usados hasta el 80% del límite; luego se optimiza
+  el índice FTS y se devuelven las páginas libres con incremental_vacuum.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+from ...lifecycle import lifecycle
+from ...semantic_cache import NUMPY_AVAILABLE, content_words, normalize
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+    from ...semantic_cache import DIMENSIONS, embed
+
+RESEARCH_DB = os.getenv("AUTO_RESEARCH_DB", os.path.join(os.path.expanduser("~"), ".cache", "auto", "research.sqlite"))
+MAX_AGE = float(os.getenv("AUTO_RESEARCH_MAX_AGE", str(24 * 3600)))
+NEWS_MAX_AGE = float(os.getenv("AUTO_RESEARCH_NEWS_MAX_AGE", "3600"))
+RETENTION = float(os.getenv("AUTO_RESEARCH_RETENTION", str(30 * 24 * 3600)))
+MAX_BYTES = int(float(os.getenv("AUTO_RESEARCH_MAX_MB", "100")) * 1024 * 1024)
+MIN_COVERAGE = float(os.getenv("AUTO_RESEARCH_MIN_COVERAGE", "0.75"))
+
+MAX_TEXT_CHARS = 20_000
+EMBED_CHARS = 2_000
+SNIPPET_CHARS = 600
+# Los embeddings del cache semántico (2048) se pliegan a 512 dimensiones: mismo hashing con más
+# colisiones, pero la matriz de todos los documentos cabe en memoria (2 KB por documento)
+VECTOR_DIMENSIONS = 512
+CANDIDATES = 50
+RRF_K = 60
+COMPACT_TARGET = 0.8
+COMPACT_BATCH = 200
+
+# Palabras que dan forma a la consulta pero no dicen de qué trata
+FRAMING_WORDS = frozenset("""
+explain explained explanation tutorial guide work learn best resource beginner introduction intro
+overview example info information about basic basics understand understanding
+explica explicacion guia aprender ejemplo ejemplos informacion sobre
+""".split())
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+# Consultas sobre cosas que cambian: resultados más viejos que NEWS_MAX_AGE no valen
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(latest|news|today|tonight|yesterday|current|currently|now|live|breaking|price|prices|score|scores|"
+    r"weather|this\s+week|hoy|ayer|ahora|actual|actuales|noticias|[uú]ltim[oa]s?|precio|precios|tiempo)\b",
+    re.IGNORECASE,
+)
+
+RESEARCH_INSTRUCTION = """
+
+RESEARCH STORE:
+- web_search_tool may answer from results and page passages fetched earlier (in this or previous
+  sessions) that are still fresh: they come with "source": "research_store" and an age_minutes per result
+- Answer from them as from any search (cite the URLs) and mention how long ago they were retrieved
+"""
+
+
+def _field(result: Any, name: str) -> str:
+    value = result.get(name) if isinstance(result, dict) else getattr(result, name, None)
+    return value if isinstance(value, str) else ""
+
+
+def freshness_for(query: str) -> float:
+    """Antigüedad máxima (segundos) de los documentos que valen para esta consulta."""
+    return NEWS_MAX_AGE if _TIME_SENSITIVE_RE.search(query) else MAX_AGE
+
+
+def _fts_query(words: Iterable[str]) -> str:
+    # Cualquiera de las palabras (OR): bm25 premia los documentos que tienen más
+    return " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def embed_folded(normalized: str) -> "np.ndarray":
+    """Embedding local plegado a VECTOR_DIMENSIONS (suma de bloques) y normalizado L2."""
+    vector = embed(normalized).reshape(DIMENSIONS // VECTOR_DIMENSIONS, VECTOR_DIMENSIONS).sum(axis=0)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def query_terms(normalized: str) -> frozenset:
+    """Palabras de contenido de la consulta sin las de forma; todas si solo hay de forma."""
+    words = content_words(normalized)
+    return (words - FRAMING_WORDS) or words
+
+
+def _coverage(query_words: frozenset, text: str) -> float:
+    """Fracción de las palabras de la consulta presentes en el texto (0 si falta algún número)."""
+    if not query_words:
+        return 0.0
+    text_words = content_words(normalize(text))
+    if any(word not in text_words for word in query_words if _NUMBER_RE.fullmatch(word)):
+        return 0.0
+    return len(query_words & text_words) / len(query_words)
+
+
+class ResearchStore:
+    """Resultados de búsqueda y páginas descargadas en SQLite, con recuperación por texto y por vectores."""
+
+    def __init__(self, db_path: str = RESEARCH_DB, max_bytes: int = MAX_BYTES, retention: float = RETENTION):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self._lock = threading.Lock()
+        self.stats = {
+            "lookups": 0, "hits": 0, "exact_hits": 0, "misses": 0,
+            "documents_stored": 0, "compactions": 0, "documents_removed": 0,
+        }
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # Antes de crear tablas: permite devolver páginas libres al compactar
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, title TEXT, text TEXT, kind TEXT,"
+            " fetched_at REAL NOT NULL, last_access REAL NOT NULL, bytes INTEGER NOT NULL, embedding BLOB)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS documents_last_access ON documents (last_access)")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS searches (query TEXT PRIMARY KEY, urls TEXT NOT NULL, fetched_at REAL NOT NULL)")
+        self._db.commit()
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM documents").fetchone()[0]
+
+        # Vectores en memoria para la búsqueda por similitud (float16 en disco); se cargan en la primera consulta
+        self._vectors: Optional[Dict[int, Tuple[float, "np.ndarray"]]] = None
+        self._matrix: Optional[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]] = None
+
+    # --- Ingesta ---
+
+    def add_search(self, query: str, results: List[Any]) -> int:
+        """Guarda los resultados de una búsqueda (título + descripción o markdown de cada URL)."""
+        documents = []
+        for result in results:
+            url = _field(result, "url")
+            text = _field(result, "markdown") or _field(result, "description")
+            if url and text:
+                documents.append((url, _field(result, "title"), text, "search"))
+        now = time.time()
+        with self._lock:
+            stored = self._store_locked(documents, now)
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches (query, urls, fetched_at) VALUES (?, ?, ?)",
+                (normalize(query), json.dumps([url for url, _, _, _ in documents]), now),
+            )
+            self._db.commit()
+        self._maybe_compact()
+        return stored
+
+    def add_pages(self, pages: List[Dict[str, Any]]) -> int:
+        """Guarda el texto de páginas descargadas ({"url", "title", "passages"} de extract_passages)."""
+        documents = [
+            (page["url"], page.get("title") or "", "\n\n".join(page["passages"]), "page")
+            for page in pages if page.get("url") and page.get("passages")
+        ]
+        with self._lock:
+            stored = self._store_locked(documents, time.time())
+            self._db.commit()
+        self._maybe_compact()
+        return stored
+
+    def _store_locked(self, documents: List[Tuple[str, str, str, str]], now: float) -> int:
+        stored = 0
+        for url, title, text, kind in documents:
+            text = text[:MAX_TEXT_CHARS]
+            row = self._db.execute("SELECT id, kind, bytes FROM documents WHERE url = ?", (url,)).fetchone()
+            if row is not None:
+                doc_id, previous_kind, previous_bytes = row
+                if previous_kind == "page" and kind == "search":
+                    # El texto de la página es más completo que el snippet del buscador
+                    continue
+                self._delete_locked([(doc_id, previous_bytes)])
+            vector = embed_folded(normalize(f"{title} {text[:EMBED_CHARS]}")) if NUMPY_AVAILABLE else None
+            blob = vector.astype(np.float16).tobytes() if vector is not None else None
+            # El texto se guarda dos veces (tabla + índice FTS)
+            size = 2 * (len(title) + len(text)) + len(url) + (len(blob) if blob else 0)
+            cursor = self._db.execute(
+                "INSERT INTO documents (url, title, text, kind, fetched_at, last_access, bytes, embedding)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, title, text, kind, now, now, size, blob),
+            )
+            self._db.execute("INSERT INTO documents_fts (rowid, title, text) VALUES (?, ?, ?)", (cursor.lastrowid, title, text))
+            self._total_bytes += size
+            if self._vectors is not None and vector is not None:
+                self._vectors[cursor.lastrowid] = (now, vector)
+                self._matrix = None
+            stored += 1
+        self.stats["documents_stored"] += stored
+        return stored
+
+    def _delete_locked(self, rows: List[Tuple[int, int]]) -> None:
+        for doc_id, size in rows:
+            self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._total_bytes -= size
+            if self._vectors is not None:
+                self._vectors.pop(doc_id, None)
+        if rows:
+            self._matrix = None
+
+    # --- Consulta ---
+
+    def lookup(self, query: str, max_results: int = 5, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Documentos frescos relevantes para `query`, mejor primero."""
+        max_age = freshness_for(query) if max_age is None else max_age
+        now = time.time()
+        cutoff = now - max_age
+        normalized = normalize(query)
+        query_words = query_terms(normalized)
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            rankings: List[List[int]] = []
+            exact = self._db.execute("SELECT urls, fetched_at FROM searches WHERE query = ?", (normalized,)).fetchone()
+            exact_ids: List[int] = []
+            if exact is not None and exact[1] >= cutoff:
+                urls = json.loads(exact[0])
+                by_url = dict(self._db.execute(
+                    f"SELECT url, id FROM documents WHERE fetched_at >= ? AND url IN ({','.join('?' * len(urls))})",
+                    [cutoff, *urls],
+                ).fetchall()) if urls else {}
+                exact_ids = [by_url[url] for url in urls if url in by_url]
+                rankings.append(exact_ids)
+            if query_words:
+                rankings.append([doc_id for doc_id, in self._db.execute(
+                    "SELECT documents.id FROM documents_fts JOIN documents ON documents.id = documents_fts.rowid"
+                    " WHERE documents_fts MATCH ? AND documents.fetched_at >= ? ORDER BY bm25(documents_fts) LIMIT ?",
+                    (_fts_query(sorted(query_words)), cutoff, CANDIDATES),
+                )])
+            if NUMPY_AVAILABLE and normalized:
+                rankings.append(self._nearest_locked(embed_folded(normalized), cutoff))
+
+            # Reciprocal rank fusion de las listas (exacta, texto, vectores)
+            fused: Dict[int, float] = {}
+            for ranking in rankings:
+                for rank, doc_id in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            ordered = sorted(fused, key=fused.get, reverse=True)
+
+            results = []
+            for doc_id in ordered:
+                row = self._db.execute("SELECT url, title, text, kind, fetched_at FROM documents WHERE id = ?", (doc_id,)).fetchone()
+                if row is None:
+                    continue
+                url, title, text, kind, fetched_at = row
+                coverage = _coverage(query_words, f"{title} {text}")
+                if doc_id not in exact_ids and coverage < MIN_COVERAGE:
+                    continue
+                results.append({
+                    "url": url,
+                    "title": title,
+                    "text": text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS].rsplit(" ", 1)[0] + " …",
+                    "kind": kind,
+                    "age_minutes": round((now - fetched_at) / 60, 1),
+                    "coverage": round(coverage, 2),
+                    "id": doc_id,
+                })
+                if len(results) >= max_results:
+                    break
+
+            if results:
+                self._db.executemany("UPDATE documents SET last_access = ? WHERE id = ?", [(now, r.pop("id")) for r in results])
+                self._db.commit()
+                self.stats["hits"] += 1
+                self.stats["exact_hits"] += bool(exact_ids)
+            else:
+                self.stats["misses"] += 1
+
+        return {
+            "success": True,
+            "query": query,
+            "fresh": bool(results),
+            "max_age_minutes": round(max_age / 60),
+            "results": results,
+            "count": len(results),
+        }
+
+    def _nearest_locked(self, vector: "np.ndarray", cutoff: float) -> List[int]:
+        if self._vectors is None:
+            self._vectors = {
+                doc_id: (fetched_at, np.frombuffer(blob, dtype=np.float16).astype(np.float32))
+                for doc_id, fetched_at, blob in self._db.execute("SELECT id, fetched_at, embedding FROM documents WHERE embedding IS NOT NULL")
+                if len(blob) == VECTOR_DIMENSIONS * 2
+            }
+        if not self._vectors:
+            return []
+        if self._matrix is None:
+            ids = np.fromiter(self._vectors, dtype=np.int64, count=len(self._vectors))
+            fetched = np.array([self._vectors[doc_id][0] for doc_id in ids])
+            self._matrix = (ids, fetched, np.vstack([self._vectors[doc_id][1] for doc_id in ids]))
+        ids, fetched, matrix = self._matrix
+        scores = matrix @ vector
+        scores[fetched < cutoff] = -1.0
+        top = np.argsort(-scores)[:CANDIDATES]
+        return [int(ids[row]) for row in top if scores[row] > 0]
+
+    # --- Compactación ---
+
+    def _maybe_compact(self) -> None:
+        if self._total_bytes > self.max_bytes:
+            self.compact()
+
+    def compact(self) -> Dict[str, Any]:
+        """Borra lo caducado y, si hace falta, lo menos usado hasta el 80% del tamaño máximo."""
+        started = time.perf_counter()
+        removed = 0
+        with self._lock:
+            cutoff = time.time() - self.retention
+            expired = self._db.execute("SELECT id, bytes FROM documents WHERE fetched_at < ?", (cutoff,)).fetchall()
+            self._delete_locked(expired)
+            removed += len(expired)
+            self._db.execute("DELETE FROM searches WHERE fetched_at < ?", (cutoff,))
+            target = self.max_bytes * COMPACT_TARGET
+            while self._total_bytes > target:
+                batch = self._db.execute(
+                    "SELECT id, bytes FROM documents ORDER BY last_access LIMIT ?", (COMPACT_BATCH,)
+                ).fetchall()
+                if not batch:
+                    break
+                for row in batch:
+                    self._delete_locked([row])
+                    removed += 1
+                    if self._total_bytes <= target:
+                        break
+            self._db.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+            self._db.commit()
+            self._db.execute("PRAGMA incremental_vacuum")
+            self.stats["compactions"] += 1
+            self.stats["documents_removed"] += removed
+        return {"removed": removed, "bytes": self._total_bytes, "seconds": time.perf_counter() - started}
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            return {
+                **self.stats,
+                "documents": documents,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.stats["hits"] / self.stats["lookups"]) if self.stats["lookups"] else 0.0,
+                "vectors": NUMPY_AVAILABLE,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def create_research_store_from_env() -> Optional[ResearchStore]:
+    """Crea el almacén según AUTO_RESEARCH_STORE (None si está desactivado)."""
+    if os.getenv("AUTO_RESEARCH_STORE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return ResearchStore()
+
+
+_research_store: Optional[ResearchStore] = None
+_research_store_ready = False
+
+
+def set_research_store(store: Optional[ResearchStore]) -> None:
+    """Reemplaza el almacén del proceso (p.ej. uno temporal en benchmarks); None lo desactiva."""
+    global _research_store, _research_store_ready
+    _research_store = store
+    _research_store_ready = True
+
+
+def get_research_store() -> Optional[ResearchStore]:
+    global _research_store, _research_store_ready
+    if not _research_store_ready:
+        _research_store = create_research_store_from_env()
+        _research_store_ready = True
+        if _research_store is not None:
+            lifecycle.register("research_store", _research_store.close)
+    return _research_store
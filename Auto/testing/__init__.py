@@ -0,0 +1,3 @@
+"""
+Backends falsos y deterministas para probar y medir Auto sin red ni claves de API.
+"""
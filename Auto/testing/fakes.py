@@ -0,0 +1,164 @@
+"""
+Implementaciones falsas de los clientes externos que usa Auto.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Callable, AsyncGenerator
+
+from google.genai import types
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from ..models import model_registry
+from ..memory import estimate_tokens
+
+
+class FakeSearchResponse:
+    """Imita la respuesta de FirecrawlApp.search (atributo `data`)."""
+
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+
+
+class FakeFirecrawlApp:
+    """Cliente Firecrawl falso: resultados deterministas, latencia configurable y contador de llamadas."""
+
+    def __init__(self, latency: float = 0.0, results: Optional[List[Dict[str, Any]]] = None, fail: bool = False):
+        self.latency = latency
+        self.results = results
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, limit: int = 5, **kwargs) -> FakeSearchResponse:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("fake firecrawl failure")
+        if self.results is not None:
+            return FakeSearchResponse(self.results[:limit])
+        return FakeSearchResponse([
+            {
+                "url": f"https://example.com/{i}?q={query.replace(' ', '+')}",
+                "title": f"Result {i} for {query}",
+                "description": f"Fake description {i} about {query}.",
+            }
+            for i in range(limit)
+        ])
+
+
+def request_text(llm_request: LlmRequest) -> str:
+    """Todo el texto que se envía al modelo: instrucción de sistema + contenidos."""
+    chunks = []
+    config = llm_request.config
+    if config is not None and config.system_instruction:
+        instruction = config.system_instruction
+        chunks.append(instruction if isinstance(instruction, str) else str(instruction))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                chunks.append(part.text)
+            elif part.function_call:
+                chunks.append(str(part.function_call.args))
+            elif part.function_response:
+                chunks.append(str(part.function_response.response))
+    return "\n".join(chunks)
+
+
+class FakeLlm(BaseLlm):
+    """Modelo falso y determinista que cuenta los tokens de entrada.
+
+    Por defecto responde `reply`; con `script` se puede devolver cualquier LlmResponse
+    a partir de la petición (p.ej. llamadas a herramientas).
+    Las llamadas pasan por el ModelRegistry, igual que las de LiteLlm.
+
+    Inyección de fallos (proveedor falso): `error_rate` es la fracción de llamadas que fallan
+    y `slow_rate` la fracción que tarda `slow_latency` en lugar de `latency` (cola de latencia).
+
+    Generación: `latency` es el tiempo hasta el primer token y `chunk_latency` lo que tarda cada
+    palabra de una respuesta de texto; con stream=True las palabras llegan como respuestas parciales.
+    """
+
+    reply: str = "ok"
+    latency: float = 0.0
+    script: Optional[Callable[[LlmRequest], LlmResponse]] = None
+    calls: int = 0
+    input_tokens: int = 0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    chunk_latency: float = 0.0
+    errors: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for llm_response in model_registry.run(self.model, lambda: self._generate(llm_request, stream)):
+            yield llm_response
+
+    async def _generate(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        prompt_tokens = estimate_tokens(request_text(llm_request))
+        self.input_tokens += prompt_tokens
+        latency = self.slow_latency if self.slow_rate and random.random() < self.slow_rate else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            raise RuntimeError(f"fake provider error from {self.model}")
+
+        if self.script is not None:
+            llm_response = self.script(llm_request)
+        else:
+            llm_response = LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(text=self.reply)])
+            )
+
+        output_text = "".join(part.text or "" for part in (llm_response.content.parts if llm_response.content else []))
+        llm_response.usage_metadata = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(output_text),
+            total_token_count=prompt_tokens + estimate_tokens(output_text),
+        )
+        words = output_text.split(" ") if output_text and self.chunk_latency else []
+        if stream:
+            for index, word in enumerate(words):
+                await asyncio.sleep(self.chunk_latency)
+                text = word if index == len(words) - 1 else word + " "
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), partial=True)
+        elif words:
+            await asyncio.sleep(self.chunk_latency * len(words))
+        yield llm_response
+
+
+def fake_model_factory(**kwargs) -> Callable[[str, Optional[str]], FakeLlm]:
+    """Factory para set_model_factory(): un FakeLlm por modelo con los mismos parámetros."""
+    def factory(model: str, api_key_env: Optional[str]) -> FakeLlm:
+        return FakeLlm(model=model, **kwargs)
+    return factory
+
+
+class FakeTtsBackend:
+    """Backend TTS falso para el pipeline: escribe bytes deterministas con latencia por carácter."""
+
+    def __init__(self, seconds_per_char: float = 0.0005, base_latency: float = 0.05, output_dir: Optional[str] = None):
+        self.seconds_per_char = seconds_per_char
+        self.base_latency = base_latency
+        self.output_dir = output_dir or tempfile.mkdtemp(prefix="fake-tts-")
+        self.calls: List[str] = []
+
+    async def __call__(self, text: str) -> str:
+        self.calls.append(text)
+        await asyncio.sleep(self.base_latency + self.seconds_per_char * len(text))
+        path = os.path.join(self.output_dir, f"chunk_{uuid.uuid4().hex}.mp3")
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8"))
+        return path
@@ -0,0 +1,156 @@
+"""
+Servidor HTTP local con páginas de prueba para el pipeline de extracción de búsquedas.
+
+    with serve_fixture_pages(latency=0.2) as server:
+        results = server.search_results()   # formato de Firecrawl: url, title, description
+        ...
+
+Sirve FIXTURE_PAGES (o las páginas que se le pasen) en 127.0.0.1 con un puerto libre y una
+latencia opcional por petición. Incluye páginas con pasajes casi duplicados, ruido de
+navegación/scripts, un 404 y una página lenta.
+
+También responde POST /v1/search como la API de Firecrawl (con resultados que apuntan a sus
+páginas): con FIRECRAWL_API_URL=server.base_url el cliente async de búsquedas habla con él.
+Usa HTTP/1.1 con keep-alive y cuenta conexiones, para ver si los clientes reutilizan el pool.
+"""
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+
+_SHARED = (
+    "Python 3.13 ships an experimental free-threaded build that can run without the global interpreter lock. "
+    "The release also adds a new interactive interpreter with multi-line editing and colour output."
+)
+
+FIXTURE_PAGES: Dict[str, Tuple[str, str]] = {
+    "/python-release": ("text/html; charset=utf-8", f"""<html><head><title>Python 3.13 released</title>
+<script>var tracking = "do not index this";</script><style>p {{ color: red }}</style></head>
+<body><nav><a href="/">Home</a> <a href="/news">News</a> <a href="/about">About</a></nav>
+<header><h1>Site header</h1></header>
+<main><article><h1>Python 3.13 released</h1>
+<p>{_SHARED}</p>
+<p>The just-in-time compiler is disabled by default but can be enabled at build time. Early benchmarks
+show modest speedups for pure Python code, and the core team expects the JIT to improve in later releases.</p>
+<p>Several deprecated modules were removed from the standard library, including cgi, crypt and telnetlib.</p>
+</article></main>
+<footer>Copyright 2024 Example News. All rights reserved. Privacy policy. Terms of use.</footer></body></html>"""),
+    "/python-mirror": ("text/html; charset=utf-8", f"""<html><head><title>What's new in Python 3.13</title></head>
+<body><div class="content">
+<p>{_SHARED} Read more below.</p>
+<p>Typing improvements include defaults for type parameters and a new ReadOnly qualifier for TypedDict items.
+The locals() builtin now has well-defined semantics when a frame is being debugged.</p>
+</div><aside>Related: Python 3.12 release notes, Python 3.11 release notes</aside></body></html>"""),
+    "/rust-release": ("text/html; charset=utf-8", """<html><head><title>Rust 1.80</title></head>
+<body><article><h2>Rust 1.80 stabilizes LazyCell and LazyLock</h2>
+<p>LazyCell and LazyLock allow values to be initialized on first access, replacing the popular
+lazy_static and once_cell crates for most use cases. Exclusive ranges are now allowed in patterns.</p>
+<p>Cargo now checks cfg names and values at compile time, catching typos in feature flags early.</p>
+</article></body></html>"""),
+    "/plain.txt": ("text/plain; charset=utf-8",
+                   "Release notes in plain text. The free-threaded Python build is experimental and must be "
+                   "enabled explicitly when building the interpreter from source.\n\n"
+                   "Extension modules need to declare support for running without the GIL."),
+    "/image.png": ("image/png", "\x89PNG not really an image"),
+}
+
+# Rutas que tardan más que el resto (para comprobar que no bloquean a las demás)
+SLOW_PATHS = {"/rust-release": 0.3}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "AutoFixture/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+
+    def _count_and_wait(self) -> None:
+        server = self.server
+        with server.counter_lock:
+            server.requests += 1
+        delay = server.latency + server.slow_paths.get(self.path, 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _send(self, content_type: str, payload: bytes) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._count_and_wait()
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        content_type, body = page
+        self._send(content_type, body.encode("utf-8", errors="surrogateescape"))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._count_and_wait()
+        if self.path != "/v1/search":
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self.send_error(400)
+            return
+        limit = int(request.get("limit") or 5)
+        data = self.server.search_results(list(self.server.pages)[:limit])
+        for result in data:
+            result["description"] += f" for {request.get('query', '')}"
+        self._send("application/json", json.dumps({"success": True, "data": data}).encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages: Dict[str, Tuple[str, str]], latency: float, slow_paths: Dict[str, float]):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.pages = pages
+        self.latency = latency
+        self.slow_paths = slow_paths
+        self.requests = 0
+        self.connections = 0
+        self.counter_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def search_results(self, paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Resultados de búsqueda (formato Firecrawl) que apuntan a las páginas del servidor."""
+        paths = paths or list(self.pages) + ["/missing"]
+        return [
+            {"url": self.base_url + path, "title": "", "description": f"Fixture page {path}"}
+            for path in paths
+        ]
+
+
+@contextmanager
+def serve_fixture_pages(
+    pages: Optional[Dict[str, Tuple[str, str]]] = None,
+    latency: float = 0.0,
+    slow_paths: Optional[Dict[str, float]] = None,
+):
+    """Arranca el servidor en un hilo y lo para al salir del bloque."""
+    server = FixtureServer(pages or FIXTURE_PAGES, latency, SLOW_PATHS if slow_paths is None else slow_paths)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,147 @@
+"""
+Servidor MCP stdio falso para pruebas y benchmarks sin red.
+
+Habla JSON-RPC por stdin/stdout (initialize, tools/list, tools/call) y expone las mismas
+herramientas que file-system-mcp o elevenlabs-mcp con respuestas deterministas:
+
+    python Auto/testing/stub_mcp_server.py file-system [--latency 0.01]
+    python Auto/testing/stub_mcp_server.py elevenlabs [--latency 0.2] [--output-dir /tmp/stub-tts]
+
+Se conecta a los agentes con AUTO_MCP_FILE_SYSTEM_COMMAND / AUTO_MCP_ELEVENLABS_COMMAND.
+No importa el paquete Auto, para poder lanzarse como script independiente.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional, Callable
+
+
+def _schema(**properties: str) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {name: {"type": kind} for name, kind in properties.items()},
+        "required": list(properties),
+    }
+
+
+def file_system_tools() -> Dict[str, Dict[str, Any]]:
+    def read_file(args: Dict[str, Any]) -> str:
+        path = args.get("path", "")
+        return "".join(f"{path}: stub line {i}\n" for i in range(20))
+
+    def write_file(args: Dict[str, Any]) -> str:
+        return f"Wrote {len(args.get('content', ''))} characters to {args.get('path', '')}"
+
+    def list_directory(args: Dict[str, Any]) -> str:
+        return json.dumps([{"name": f"file_{i}.txt", "type": "file", "size": 100 + i} for i in range(10)])
+
+    def move_file(args: Dict[str, Any]) -> str:
+        return f"Moved {args.get('source', '')} to {args.get('destination', '')}"
+
+    def delete_file(args: Dict[str, Any]) -> str:
+        return f"Deleted {args.get('path', '')}"
+
+    def create_directory(args: Dict[str, Any]) -> str:
+        return f"Created directory {args.get('path', '')}"
+
+    return {
+        "read_file": {"handler": read_file, "schema": _schema(path="string")},
+        "write_file": {"handler": write_file, "schema": _schema(path="string", content="string")},
+        "list_directory": {"handler": list_directory, "schema": _schema(path="string")},
+        "move_file": {"handler": move_file, "schema": _schema(source="string", destination="string")},
+        "delete_file": {"handler": delete_file, "schema": _schema(path="string")},
+        "create_directory": {"handler": create_directory, "schema": _schema(path="string")},
+    }
+
+
+def elevenlabs_tools(output_dir: str) -> Dict[str, Dict[str, Any]]:
+    def text_to_speech(args: Dict[str, Any]) -> str:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"tts_{uuid.uuid4().hex}.mp3")
+        with open(path, "wb") as f:
+            f.write(args.get("text", "").encode("utf-8"))
+        voice = args.get("voice_name") or "Will"
+        return f"Success. File saved as: {path}. Voice used: {voice}"
+
+    return {
+        "text_to_speech": {"handler": text_to_speech, "schema": _schema(text="string", voice_name="string")},
+    }
+
+
+class StubServer:
+    def __init__(self, name: str, tools: Dict[str, Dict[str, Any]], latency: float = 0.0):
+        self.name = name
+        self.tools = tools
+        self.latency = latency
+
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "id" not in message:
+            # Notificaciones (p.ej. notifications/initialized): sin respuesta
+            return None
+        method = message.get("method")
+        params = message.get("params") or {}
+
+        if method == "initialize":
+            result = {
+                "protocolVersion": params.get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": f"stub-{self.name}", "version": "1.0"},
+            }
+        elif method == "tools/list":
+            result = {
+                "tools": [
+                    {"name": name, "description": f"Stub {name}", "inputSchema": tool["schema"]}
+                    for name, tool in self.tools.items()
+                ]
+            }
+        elif method == "tools/call":
+            tool = self.tools.get(params.get("name"))
+            if tool is None:
+                return _error(message["id"], -32602, f"Unknown tool: {params.get('name')}")
+            if self.latency:
+                time.sleep(self.latency)
+            text = tool["handler"](params.get("arguments") or {})
+            result = {"content": [{"type": "text", "text": text}], "isError": False}
+        elif method == "ping":
+            result = {}
+        else:
+            return _error(message["id"], -32601, f"Method not found: {method}")
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    def serve(self, stdin=sys.stdin, stdout=sys.stdout) -> None:
+        for line in stdin:
+            if not line.strip():
+                continue
+            response = self.handle(json.loads(line))
+            if response is not None:
+                stdout.write(json.dumps(response) + "\n")
+                stdout.flush()
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+PROFILES: Dict[str, Callable[[argparse.Namespace], Dict[str, Dict[str, Any]]]] = {
+    "file-system": lambda args: file_system_tools(),
+    "elevenlabs": lambda args: elevenlabs_tools(args.output_dir),
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline stub MCP server")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep on each tool call")
+    parser.add_argument("--output-dir", default=os.path.join(tempfile.gettempdir(), "auto-stub-tts"))
+    args = parser.parse_args(argv)
+
+    StubServer(args.profile, PROFILES[args.profile](args), args.latency).serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+"""
+Trazas por turno: árbol de spans del agente raíz, delegaciones, llamadas LLM y herramientas.
+
+Cada turno produce una traza:
+
+    agent Auto
+    ├── llm gemini/gemini-1.5-flash        (tokens, bytes enviados/recibidos)
+    ├── agent_tool web_searcher_agent       (delegación vía AgentTool)
+    │   └── agent web_searcher_agent
+    │       ├── llm gemini/gemini-1.5-flash
+    │       └── tool web_search_tool
+    └── llm gemini/gemini-1.5-flash
+
+Los spans se crean con los callbacks de ADK (sin tocar los agentes) y se enlazan con un
+contextvar. Cada span actualiza un histograma en proceso (tracer.summary()); las trazas
+muestreadas se exportan en segundo plano, en lotes:
+- AUTO_TRACE_FILE: JSONL, un span por línea
+- AUTO_TRACE_OTLP_ENDPOINT (u OTEL_EXPORTER_OTLP_ENDPOINT): OTLP/HTTP JSON a /v1/traces
+
+Configuración: AUTO_TRACE (1 por defecto), AUTO_TRACE_SAMPLE (fracción de turnos exportados).
+
+Resumen de un archivo de trazas:
+    python -m Auto.tracing summarize traces.jsonl
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import secrets
+import argparse
+import threading
+import contextvars
+import urllib.request
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
+
+from .callbacks import add_callbacks, attach_including_lazy
+
+TRACE_ENABLED = os.getenv("AUTO_TRACE", "1").lower() not in ("0", "false", "no", "off")
+TRACE_SAMPLE = float(os.getenv("AUTO_TRACE_SAMPLE", "1.0"))
+TRACE_FILE = os.getenv("AUTO_TRACE_FILE")
+TRACE_OTLP_ENDPOINT = os.getenv("AUTO_TRACE_OTLP_ENDPOINT") or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+SERVICE_NAME = os.getenv("AUTO_TRACE_SERVICE", "auto")
+
+EXPORT_INTERVAL = 2.0
+EXPORT_BATCH = 512
+EXPORT_QUEUE = 10_000
+RECENT_TRACES = 50
+
+# Límites de los buckets del histograma, en milisegundos
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10_000, 30_000, 60_000)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("auto_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent", "start_ns", "end_ns", "_start_perf", "duration", "attributes", "status", "sampled")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], sampled: bool, attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.sampled = parent.sampled if parent else sampled
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter()
+        self.end_ns: Optional[int] = None
+        self.duration = 0.0
+        self.attributes = attributes
+        self.status = "ok"
+
+    def finish(self, status: str = "ok") -> None:
+        self.duration = time.perf_counter() - self._start_perf
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration * 1000,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Histogram:
+    """Histograma de latencias con buckets fijos (percentiles aproximados por bucket)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        index = 0
+        while index < len(BUCKETS_MS) and ms > BUCKETS_MS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> float:
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": (self.total_ms / self.count) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+        }
+
+
+# --- Exportadores ---
+
+class JsonlExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Envía spans a un collector OpenTelemetry por OTLP/HTTP con codificación JSON."""
+
+    def __init__(self, endpoint: str, service_name: str = SERVICE_NAME, timeout: float = 5.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else endpoint + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "Auto.tracing"},
+                    "spans": [
+                        {
+                            "traceId": span["trace_id"],
+                            "spanId": span["span_id"],
+                            **({"parentSpanId": span["parent_id"]} if span["parent_id"] else {}),
+                            "name": f"{span['kind']} {span['name']}",
+                            "kind": 1,
+                            "startTimeUnixNano": str(span["start_ns"]),
+                            "endTimeUnixNano": str(span["end_ns"]),
+                            "attributes": [
+                                {"key": f"auto.{key}", "value": _otlp_value(value)}
+                                for key, value in {"kind": span["kind"], **span["attributes"]}.items()
+                            ],
+                            "status": {"code": 2 if span["status"] == "error" else 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload(spans)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class BatchExporter:
+    """Cola acotada + hilo en segundo plano: exportar nunca bloquea un turno."""
+
+    def __init__(self, exporters: List[Any], interval: float = EXPORT_INTERVAL, batch_size: int = EXPORT_BATCH):
+        self.exporters = exporters
+        self.interval = interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=EXPORT_QUEUE)
+        self.stats = {"exported": 0, "dropped": 0, "errors": 0}
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        # El hilo arranca con la primera traza, no al importar
+        self._thread = threading.Thread(target=self._run, name="auto-trace-export", daemon=True)
+        self._thread.start()
+        # Lo que quede en la cola se exporta al salir del proceso
+        atexit.register(self.flush)
+
+    def submit(self, spans: List[Dict[str, Any]]) -> None:
+        if self._thread is None:
+            with self._flush_lock:
+                if self._thread is None:
+                    self._start()
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.stats["dropped"] += 1
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Dict[str, Any]]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Trace export to {type(exporter).__name__} failed: {e}")
+        self.stats["exported"] += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            batch = self._drain()
+            while batch:
+                self._export(batch)
+                batch = self._drain()
+
+
+# --- Tamaños de payload ---
+
+def _contents_size(contents) -> int:
+    size = 0
+    for content in contents or []:
+        for part in content.parts or []:
+            if part.text:
+                size += len(part.text)
+            elif part.function_call:
+                size += len(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response:
+                size += len(json.dumps(part.function_response.response or {}, default=str))
+    return size
+
+
+def _payload_size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+def _tool_kind(tool) -> str:
+    from google.adk.tools.agent_tool import AgentTool
+
+    if isinstance(tool, AgentTool):
+        return "agent_tool"
+    if type(tool).__name__ in ("McpTool", "MCPTool"):
+        return "mcp"
+    return "tool"
+
+
+class Tracer:
+    """Crea spans desde los callbacks de ADK, mantiene histogramas y exporta trazas."""
+
+    def __init__(self, sample_rate: float = TRACE_SAMPLE, exporter: Optional[BatchExporter] = None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple, Span] = {}
+        self._traces: Dict[str, List[Span]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.recent: deque = deque(maxlen=RECENT_TRACES)
+
+    # --- Spans ---
+
+    def start_span(self, key: Tuple, name: str, kind: str, attributes: Dict[str, Any], activate: bool = False) -> Span:
+        parent = _current_span.get()
+        span = Span(name, kind, parent, random.random() < self.sample_rate, attributes)
+        with self._lock:
+            self._open[key] = span
+        if activate:
+            _current_span.set(span)
+        return span
+
+    def end_span(self, key: Tuple, status: str = "ok", deactivate: bool = False, **attributes: Any) -> Optional[Span]:
+        with self._lock:
+            span = self._open.pop(key, None)
+        if span is None:
+            return None
+        span.attributes.update(attributes)
+        span.finish(status)
+        if deactivate and _current_span.get() is span:
+            _current_span.set(span.parent)
+        self._record(span)
+        return span
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            histogram = self._histograms.get(f"{span.kind}:{span.name}")
+            if histogram is None:
+                histogram = self._histograms[f"{span.kind}:{span.name}"] = Histogram()
+            histogram.record(span.duration * 1000)
+            if span.kind == "llm":
+                tokens = self.tokens.setdefault(span.name, {"input": 0, "output": 0})
+                tokens["input"] += span.attributes.get("input_tokens") or 0
+                tokens["output"] += span.attributes.get("output_tokens") or 0
+
+            trace = self._traces.setdefault(span.trace_id, [])
+            trace.append(span)
+            if span.parent is not None:
+                return
+            # Fin del span raíz: la traza está completa
+            del self._traces[span.trace_id]
+            dangling = [key for key, open_span in self._open.items() if open_span.trace_id == span.trace_id]
+            for key in dangling:
+                open_span = self._open.pop(key)
+                open_span.finish("unfinished")
+                trace.append(open_span)
+
+        if span.sampled:
+            spans = [item.to_dict() for item in trace]
+            self.recent.append(spans)
+            if self.exporter is not None:
+                self.exporter.submit(spans)
+
+    # --- Callbacks de ADK ---
+
+    def before_agent_callback(self, callback_context) -> None:
+        key = ("agent", callback_context.invocation_id, callback_context.agent_name)
+        self.start_span(key, callback_context.agent_name, "agent", {}, activate=True)
+        return None
+
+    def after_agent_callback(self, callback_context) -> None:
+        self.end_span(("agent", callback_context.invocation_id, callback_context.agent_name), deactivate=True)
+        return None
+
+    def before_model_callback(self, callback_context, llm_request) -> None:
+        key = ("llm", callback_context.invocation_id, callback_context.agent_name)
+        self.start_span(key, llm_request.model or "unknown", "llm", {
+            "agent": callback_context.agent_name,
+            "request_chars": _contents_size(llm_request.contents),
+        })
+        return None
+
+    def after_model_callback(self, callback_context, llm_response) -> None:
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        self.end_span(
+            ("llm", callback_context.invocation_id, callback_context.agent_name),
+            status="error" if llm_response.error_code else "ok",
+            response_chars=_contents_size([llm_response.content] if llm_response.content else []),
+            input_tokens=(usage.prompt_token_count or 0) if usage else 0,
+            output_tokens=(usage.candidates_token_count or 0) if usage else 0,
+        )
+        return None
+
+    def on_model_error_callback(self, callback_context, llm_request, error) -> None:
+        self.end_span(("llm", callback_context.invocation_id, callback_context.agent_name), status="error", error=str(error))
+        return None
+
+    def before_tool_callback(self, tool, args, tool_context) -> None:
+        key = ("tool", tool_context.function_call_id)
+        self.start_span(key, tool.name, _tool_kind(tool), {
+            "agent": tool_context.agent_name,
+            "args_chars": _payload_size(args),
+        }, activate=True)
+        return None
+
+    def after_tool_callback(self, tool, args, tool_context, tool_response) -> None:
+        failed = isinstance(tool_response, dict) and (tool_response.get("isError") or tool_response.get("success") is False)
+        self.end_span(
+            ("tool", tool_context.function_call_id),
+            status="error" if failed else "ok",
+            deactivate=True,
+            response_chars=_payload_size(tool_response),
+        )
+        return None
+
+    def on_tool_error_callback(self, tool, args, tool_context, error) -> None:
+        self.end_span(("tool", tool_context.function_call_id), status="error", deactivate=True, error=str(error))
+        return None
+
+    def instrument(self, root_agent) -> None:
+        """Engancha los callbacks de trazas en `root_agent` y todos sus sub-agentes.
+
+        Los before_model/before_tool van al final (si otro callback responde antes, no hubo
+        llamada real que medir); el resto va al principio para que siempre se ejecute.
+        """
+        attach_including_lazy(root_agent, self._instrument_agent)
+
+    def _instrument_agent(self, agent) -> None:
+        add_callbacks(
+            agent,
+            first=True,
+            before_agent_callback=self.before_agent_callback,
+            after_agent_callback=self.after_agent_callback,
+            after_model_callback=self.after_model_callback,
+            on_model_error_callback=self.on_model_error_callback,
+            after_tool_callback=self.after_tool_callback,
+            on_tool_error_callback=self.on_tool_error_callback,
+        )
+        add_callbacks(
+            agent,
+            before_model_callback=self.before_model_callback,
+            before_tool_callback=self.before_tool_callback,
+        )
+
+    # --- Métricas ---
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {key: histogram.summary() for key, histogram in sorted(self._histograms.items())}
+            tokens = {model: dict(counts) for model, counts in self.tokens.items()}
+        summary = {"spans": spans, "tokens": tokens, "open_spans": len(self._open)}
+        if self.exporter is not None:
+            summary["export"] = dict(self.exporter.stats)
+        return summary
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+def create_tracer_from_env() -> Optional[Tracer]:
+    """Crea el tracer según AUTO_TRACE* (None si está desactivado)."""
+    if not TRACE_ENABLED:
+        return None
+    exporters: List[Any] = []
+    if TRACE_FILE:
+        exporters.append(JsonlExporter(TRACE_FILE))
+    if TRACE_OTLP_ENDPOINT:
+        exporters.append(OtlpHttpExporter(TRACE_OTLP_ENDPOINT))
+    return Tracer(exporter=BatchExporter(exporters) if exporters else None)
+
+
+tracer = create_tracer_from_env()
+
+
+def summarize_file(path: str) -> Dict[str, Any]:
+    """Histogramas por span a partir de un archivo JSONL exportado."""
+    histograms: Dict[str, Histogram] = {}
+    traces = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            span = json.loads(line)
+            traces.add(span["trace_id"])
+            histograms.setdefault(f"{span['kind']}:{span['name']}", Histogram()).record(span["duration_ms"])
+    return {
+        "traces": len(traces),
+        "spans": {key: histogram.summary() for key, histogram in sorted(histograms.items())},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Auto trace tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = subparsers.add_parser("summarize", help="latency histogram per span from a JSONL trace file")
+    summarize_parser.add_argument("trace_file")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(summarize_file(args.trace_file), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())